@@ -0,0 +1,161 @@
+"""
+Moteur de téléchargement asynchrone des feeds RSS
+Garde des centaines de téléchargements en vol, avec un plafond global
+et un plafond par hôte pour ne pas surcharger un même serveur
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from http_client import USER_AGENT
+
+logger = logging.getLogger(__name__)
+
+# --------------------------
+# Configuration
+# --------------------------
+GLOBAL_CONCURRENCY = 200      # Téléchargements simultanés (tous hôtes confondus)
+PER_HOST_CONCURRENCY = 6      # Téléchargements simultanés vers un même hôte
+REQUEST_TIMEOUT = 20          # Secondes par feed (connexion + lecture)
+MAX_FEED_BYTES = 10 * 1024 * 1024  # Un feed RSS ne dépasse jamais 10 Mo
+READ_CHUNK_BYTES = 64 * 1024  # Morceaux lus du corps de la réponse
+
+
+@dataclass
+class FetchResult:
+    """Résultat brut du téléchargement d'un feed"""
+    source: str
+    url: str
+    status: int = 0
+    content: bytes = b""
+    headers: Dict[str, str] = field(default_factory=dict)  # Clés en minuscules
+    error: str = ""
+    elapsed: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return not self.error and 200 <= self.status < 300
+
+    @property
+    def not_modified(self) -> bool:
+        return self.status == 304
+
+
+async def read_body(response: aiohttp.ClientResponse, limit: int = MAX_FEED_BYTES) -> bytes:
+    """
+    Corps complet de la réponse, jusqu'à la fin du flux. content.read(n) ne
+    rend que ce qui est déjà arrivé (un gros feed serait tronqué sans erreur);
+    au-delà de limit octets, ValueError. Un corps lu entièrement rend la
+    connexion réutilisable (keep-alive)
+    """
+    if response.content_length is not None and response.content_length > limit:
+        raise ValueError(f"feed de plus de {limit:,} octets")
+    chunks, size = [], 0
+    async for chunk in response.content.iter_chunked(READ_CHUNK_BYTES):
+        size += len(chunk)
+        if size > limit:
+            raise ValueError(f"feed de plus de {limit:,} octets")
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+class AsyncFeedFetcher:
+    """Télécharge un ensemble de feeds en parallèle avec asyncio"""
+
+    def __init__(self, global_limit: int = GLOBAL_CONCURRENCY,
+                 per_host_limit: int = PER_HOST_CONCURRENCY,
+                 timeout: float = REQUEST_TIMEOUT):
+        self.global_limit = global_limit
+        self.per_host_limit = per_host_limit
+        self.timeout = timeout
+        self._global_slots: Optional[asyncio.Semaphore] = None
+        self._host_slots: Dict[str, asyncio.Semaphore] = {}
+
+    def _host_semaphore(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).hostname or ""
+        if host not in self._host_slots:
+            self._host_slots[host] = asyncio.Semaphore(self.per_host_limit)
+        return self._host_slots[host]
+
+    async def fetch(self, session: aiohttp.ClientSession, source: str, url: str,
+                    headers: Optional[Dict[str, str]] = None) -> FetchResult:
+        """Télécharge un feed en respectant les plafonds global et par hôte"""
+        result = FetchResult(source=source, url=url)
+
+        async with self._global_slots, self._host_semaphore(url):
+            start = time.perf_counter()
+            try:
+                async with session.get(url, headers=headers) as response:
+                    result.status = response.status
+                    # Clés en minuscules, comme les attend feedparser
+                    result.headers = {k.lower(): v for k, v in response.headers.items()}
+                    # URL finale (après redirections) pour résoudre les liens relatifs
+                    result.headers.setdefault('content-location', str(response.url))
+                    result.content = await read_body(response)
+            except asyncio.TimeoutError:
+                result.error = f"timeout apres {self.timeout}s"
+            except Exception as e:
+                result.error = str(e) or type(e).__name__
+            result.elapsed = time.perf_counter() - start
+
+        if not result.error and not result.ok and not result.not_modified:
+            result.error = f"HTTP {result.status}"
+        return result
+
+    async def fetch_all(self, feeds: Dict[str, str],
+                        on_result: Callable[[FetchResult], Awaitable[None]],
+                        request_headers: Optional[Callable[[str], Dict[str, str]]] = None,
+                        time_limit: Optional[float] = None,
+                        session: Optional[aiohttp.ClientSession] = None) -> List[str]:
+        """
+        Lance tous les téléchargements et appelle on_result dès qu'un feed arrive,
+        ce qui permet de parser pendant que les autres téléchargements continuent.
+        request_headers(url) fournit des en-têtes propres à chaque feed (GET conditionnel).
+        Les feeds obtiennent leurs créneaux dans l'ordre du dictionnaire; au-delà
+        de time_limit secondes, ceux qui ne sont pas terminés sont annulés et
+        leurs noms retournés. session: session partagée (http_client.py),
+        sinon une session propre à cet appel
+        """
+        if session is None:
+            timeout = aiohttp.ClientTimeout(total=self.timeout)
+            connector = aiohttp.TCPConnector(limit=self.global_limit,
+                                             limit_per_host=self.per_host_limit)
+            async with aiohttp.ClientSession(timeout=timeout, connector=connector,
+                                             headers={"User-Agent": USER_AGENT}) as own_session:
+                return await self.fetch_all(feeds, on_result, request_headers, time_limit, own_session)
+
+        self._global_slots = asyncio.Semaphore(self.global_limit)
+        self._host_slots = {}
+
+        async def fetch_and_handle(source: str, url: str):
+            headers = request_headers(url) if request_headers else None
+            result = await self.fetch(session, source, url, headers)
+            try:
+                await on_result(result)
+            except Exception as e:
+                logger.error(f"  [ERREUR] {source}: {e}")
+
+        tasks = {asyncio.ensure_future(fetch_and_handle(source, url)): source
+                 for source, url in feeds.items()}
+        pending = set()
+        if tasks:
+            _, pending = await asyncio.wait(tasks, timeout=time_limit)
+        # Échéance atteinte: les retardataires sont annulés, les feeds déjà
+        # traités restent acquis
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        cancelled = [source for task, source in tasks.items() if task in pending]
+        logger.info(f"[Fetch] {len(feeds) - len(cancelled)} feeds telecharges "
+                    f"({len(self._host_slots)} hotes, max {self.global_limit} en vol)")
+        if cancelled:
+            logger.warning(f"[Fetch] {len(cancelled)} feeds annules (delai de {time_limit:.0f}s atteint)")
+        return cancelled
@@ -0,0 +1,146 @@
+"""
+Benchmark et comparaison du classifieur de type de news
+Rejoue la classification sur les articles archivés de data/raw et compare
+l'ancienne implémentation (recherche de sous-chaîne par mot-clé, reproduite
+ci-dessous) au classifieur compilé de news_classifier.py:
+  - débit (textes/s) de l'ancienne version, de classify() et de classify_batch()
+  - taux d'accord entre les deux et désaccords les plus fréquents (avec exemple)
+  - exactitude face aux catégories fournies par NewsAPI (seule vérité terrain
+    disponible; 'health' est compté comme 'science', comme les mots-clés)
+
+Usage:
+    python bench_classifier.py
+    python bench_classifier.py --sources rss reddit --repeat 5 --examples 15
+"""
+
+import argparse
+import os
+import statistics
+import time
+from collections import Counter
+from typing import List, Tuple
+
+import news_classifier
+from raw_catalog import read_raw_file
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+RAW_DIR = os.path.join(PROJECT_ROOT, "data", "raw")
+SOURCES = ('rss', 'newsapi', 'reddit', 'scraping')
+
+
+def legacy_classify(title: str, summary: str = "", category: str = "") -> str:
+    """Implémentation d'origine de classify_news_type (référence)"""
+    text = (title + " " + summary).lower()
+    if category:
+        return category
+    keywords = {
+        'technology': ['ai', 'intelligence artificielle', 'tech', 'technolog', 'software',
+                       'app', 'digital', 'cyber', 'robot', 'internet', 'data', 'algorithm',
+                       'startup', 'google', 'apple', 'microsoft', 'meta', 'tesla'],
+        'business': ['business', 'market', 'stock', 'économie', 'economy', 'finance',
+                     'bank', 'trade', 'invest', 'company', 'ceo', 'entreprise',
+                     'dollar', 'euro', 'bourse', 'croissance'],
+        'politics': ['politic', 'government', 'election', 'president', 'minister',
+                     'parlement', 'vote', 'law', 'congress', 'senate', 'diplomacy',
+                     'gouvernement', 'ministre', 'député'],
+        'science': ['science', 'research', 'study', 'scientist', 'discover',
+                    'space', 'nasa', 'climat', 'climate', 'environment', 'energy',
+                    'médical', 'health', 'covid', 'vaccine', 'cancer'],
+        'sports': ['sport', 'football', 'basketball', 'tennis', 'match', 'game',
+                   'player', 'team', 'champion', 'olympic', 'world cup', 'league'],
+        'entertainment': ['film', 'movie', 'music', 'actor', 'celebrity', 'hollywood',
+                          'series', 'tv', 'concert', 'album', 'netflix', 'disney'],
+    }
+    scores = {name: sum(1 for kw in kws if kw in text) for name, kws in keywords.items()}
+    best = max(scores, key=scores.get)
+    return best if scores[best] else 'general'
+
+
+def load_articles(raw_dir: str, sources) -> Tuple[List[Tuple[str, str, str]], int]:
+    """(titre, résumé, catégorie NewsAPI) des fichiers lisibles, et nombre de fichiers illisibles"""
+    articles, unreadable = [], 0
+    for source in sources:
+        directory = os.path.join(raw_dir, source)
+        if not os.path.isdir(directory):
+            continue
+        for name in sorted(os.listdir(directory)):
+            records = read_raw_file(os.path.join(directory, name))
+            if records is None:
+                unreadable += 1
+                continue
+            for record in records:
+                title = str(record.get('title') or "")
+                if not title:
+                    continue
+                # Même texte que les collecteurs: résumé RSS tronqué, description NewsAPI
+                summary = str(record.get('summary') or record.get('description') or "")[:200]
+                label = str(record.get('category') or "") if source == 'newsapi' else ""
+                articles.append((title, summary, label))
+    return articles, unreadable
+
+
+def measure(function, repeat: int) -> Tuple[float, List[str]]:
+    """Durée médiane de function() et son résultat"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), result
+
+
+def accuracy(predictions: List[str], labels: List[str]) -> float:
+    pairs = [(p, news_classifier.to_category(l)) for p, l in zip(predictions, labels) if l]
+    return sum(1 for p, l in pairs if p == l) / len(pairs) if pairs else float('nan')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du classifieur de type de news")
+    parser.add_argument('--raw-dir', default=RAW_DIR)
+    parser.add_argument('--sources', nargs='+', default=list(SOURCES))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--examples', type=int, default=10, help='Desaccords les plus frequents a afficher')
+    args = parser.parse_args()
+
+    articles, unreadable = load_articles(args.raw_dir, args.sources)
+    print(f"{len(articles):,} articles charges ({unreadable} fichiers illisibles, ex: pointeurs Git LFS)")
+    if not articles:
+        print("Aucun article archive lisible: rien a comparer")
+        return
+
+    texts = [f"{title} {summary}" for title, summary, _ in articles]
+    cases = {
+        "ancien": lambda: [legacy_classify(t, s) for t, s, _ in articles],
+        "compile": lambda: [news_classifier.classify(t, s) for t, s, _ in articles],
+        "lot": lambda: news_classifier.classify_batch(texts),
+    }
+    print(f"\n{'version':>8} {'mediane':>9} {'textes/s':>12}")
+    print("-" * 32)
+    results = {}
+    for name, function in cases.items():
+        seconds, results[name] = measure(function, args.repeat)
+        print(f"{name:>8} {seconds:>8.3f}s {len(articles) / seconds:>12,.0f}")
+    legacy, compiled = results["ancien"], results["compile"]
+    if results["lot"] != compiled:
+        print("ATTENTION: classify_batch ne donne pas le meme resultat que classify")
+
+    agree = sum(1 for a, b in zip(legacy, compiled) if a == b)
+    print(f"\nAccord ancien / compile: {agree / len(articles):.1%} ({len(articles) - agree:,} desaccords)")
+    disagreements = Counter((a, b) for a, b in zip(legacy, compiled) if a != b)
+    examples = {}
+    for (title, _, _), a, b in zip(articles, legacy, compiled):
+        examples.setdefault((a, b), title)
+    for (a, b), count in disagreements.most_common(args.examples):
+        print(f"  {a:>13} -> {b:<13} {count:>6,}  ex: {examples[(a, b)][:70]}")
+
+    labels = [label for _, _, label in articles]
+    if any(labels):
+        # Sans la catégorie fournie, pour juger les mots-clés eux-mêmes
+        print(f"\nExactitude face aux categories NewsAPI ({sum(1 for l in labels if l):,} articles):")
+        print(f"  ancien : {accuracy(legacy, labels):.1%}")
+        print(f"  compile: {accuracy(compiled, labels):.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Micro-benchmark de contention du dédoublonnage concurrent
+Compare, à 5, 50 et 500 workers qui voient les mêmes articles syndiqués:
+  - naif     : is_new() puis add_hash() séparés, sans verrou (comportement historique)
+  - global   : un seul verrou autour de check_and_add
+  - striped  : StripedDedupIndex (verrous répartis par hash)
+  - sqlite   : SqliteHashSet partagé entre processus (option --processes),
+               la base utilisée par les workers de sharded_collector.py
+Pour chaque cas: débit et nombre d'articles acceptés en double
+
+Usage:
+    python bench_dedup.py
+    python bench_dedup.py --ops 500000 --workers 5 50 500 --processes
+"""
+
+import argparse
+import hashlib
+import multiprocessing
+import os
+import random
+import tempfile
+import threading
+import time
+
+from dedup_index import SqliteHashSet, StripedDedupIndex
+
+
+def make_workload(total_ops: int, workers: int, unique: int, seed: int = 42):
+    """Chaque worker reçoit sa part d'opérations, tirées dans un même univers de hashes"""
+    rng = random.Random(seed)
+    universe = [hashlib.md5(str(i).encode()).hexdigest() for i in range(unique)]
+    per_worker = total_ops // workers
+    return [[rng.choice(universe) for _ in range(per_worker)] for _ in range(workers)]
+
+
+class NaiveIndex:
+    """Reproduit l'ancien couple is_new() / add_hash() non atomique"""
+
+    def __init__(self):
+        self.known = set()
+
+    def check_and_add(self, content_hash) -> bool:
+        if content_hash in self.known:
+            return False
+        time.sleep(0)  # Laisse la main comme le ferait le code entre les deux appels
+        self.known.add(content_hash)
+        return True
+
+
+class GlobalLockIndex:
+    def __init__(self):
+        self.known = set()
+        self.lock = threading.Lock()
+
+    def check_and_add(self, content_hash) -> bool:
+        with self.lock:
+            if content_hash in self.known:
+                return False
+            self.known.add(content_hash)
+            return True
+
+
+def run_threads(index, workload):
+    accepted = [0] * len(workload)
+
+    def worker(i):
+        count = 0
+        for content_hash in workload[i]:
+            if index.check_and_add(content_hash):
+                count += 1
+        accepted[i] = count
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(len(workload))]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return time.perf_counter() - start, sum(accepted)
+
+
+def _process_worker(db_file, hashes, results, i):
+    # Chaque processus ouvre sa propre connexion, comme un worker de sharded_collector.py
+    store = SqliteHashSet(db_file)
+    results[i] = sum(1 for h in hashes if store.add(h))
+    store.close()
+
+
+def run_processes(workload):
+    with tempfile.TemporaryDirectory() as directory:
+        db_file = os.path.join(directory, "dedup.sqlite")
+        SqliteHashSet(db_file).close()   # Schéma créé avant le départ des workers
+        results = multiprocessing.Array('i', len(workload))
+        procs = [multiprocessing.Process(target=_process_worker, args=(db_file, hashes, results, i))
+                 for i, hashes in enumerate(workload)]
+        start = time.perf_counter()
+        for p in procs:
+            p.start()
+        for p in procs:
+            p.join()
+        return time.perf_counter() - start, sum(results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de contention du dedoublonnage")
+    parser.add_argument('--ops', type=int, default=200_000, help='Operations au total')
+    parser.add_argument('--unique', type=int, default=20_000, help='Articles distincts')
+    parser.add_argument('--workers', type=int, nargs='+', default=[5, 50, 500])
+    parser.add_argument('--processes', action='store_true', help='Mesurer aussi SqliteHashSet entre processus')
+    args = parser.parse_args()
+
+    print(f"{'workers':>8} {'methode':>8} {'ops/s':>12} {'acceptes':>9} {'doublons':>9}")
+    print("-" * 52)
+    for workers in args.workers:
+        workload = make_workload(args.ops, workers, args.unique)
+        expected = len({h for part in workload for h in part})
+        ops = sum(len(part) for part in workload)
+
+        cases = [
+            ("naif", lambda: run_threads(NaiveIndex(), workload)),
+            ("global", lambda: run_threads(GlobalLockIndex(), workload)),
+            ("striped", lambda: run_threads(StripedDedupIndex(set()), workload)),
+        ]
+        if args.processes:
+            cases.append(("sqlite", lambda: run_processes(workload)))
+
+        for name, run in cases:
+            elapsed, accepted = run()
+            print(f"{workers:>8} {name:>8} {ops / elapsed:>12,.0f} {accepted:>9,} {accepted - expected:>9,}")
+
+
+if __name__ == "__main__":
+    main()
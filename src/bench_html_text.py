@@ -0,0 +1,146 @@
+"""
+Benchmark de l'extraction du texte des résumés RSS
+Compare, sur les résumés HTML de vrais feeds, BeautifulSoup(..., "html.parser")
+.get_text() (ancienne méthode) à html_text.html_to_text():
+  - débit (résumés/s) de chaque méthode, tronquée à SUMMARY_MAX_CHARS et complète
+  - nombre de résumés dont le texte diffère, avec exemples
+
+Les feeds sont lus depuis des fichiers XML, des dossiers de fichiers XML ou
+des URL; sans argument, les feeds de feeds.json sont téléchargés (--save
+les archive pour rejouer le benchmark plus tard sur les mêmes données)
+
+Usage:
+    python bench_html_text.py
+    python bench_html_text.py --save ../data/feeds_sample
+    python bench_html_text.py ../data/feeds_sample --repeat 5
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import time
+from typing import List, Tuple
+
+import feedparser
+from bs4 import BeautifulSoup
+
+from html_text import html_to_text
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+FEEDS_FILE = os.getenv("FEEDS_FILE", os.path.join(SCRIPT_DIR, "feeds.json"))
+SUMMARY_MAX_CHARS = 500
+
+
+def load_sources(sources: List[str], feeds_file: str) -> List[Tuple[str, str]]:
+    """(nom, fichier ou URL) de chaque feed à lire"""
+    if not sources:
+        with open(feeds_file, "r", encoding='utf-8') as f:
+            return list(json.load(f).items())
+    feeds = []
+    for source in sources:
+        if os.path.isdir(source):
+            feeds += [(name, os.path.join(source, name)) for name in sorted(os.listdir(source))
+                      if name.endswith('.xml')]
+        else:
+            feeds.append((os.path.basename(source) or source, source))
+    return feeds
+
+
+def download(feeds: List[Tuple[str, str]], save_dir: str = "") -> List[bytes]:
+    """Contenu brut de chaque feed (les fichiers locaux sont lus tels quels)"""
+    from http_client import HttpClient
+
+    client, contents = HttpClient(), []
+    if save_dir:
+        os.makedirs(save_dir, exist_ok=True)
+    for name, location in feeds:
+        if not location.startswith(('http://', 'https://')):
+            with open(location, 'rb') as f:
+                contents.append(f.read())
+            continue
+        try:
+            response = client.get(location)
+            response.raise_for_status()
+        except Exception as e:
+            print(f"  [ERREUR] {name}: {e}")
+            continue
+        contents.append(response.content)
+        if save_dir:
+            safe_name = re.sub(r"[^\w.-]+", "_", name)
+            with open(os.path.join(save_dir, f"{safe_name}.xml"), 'wb') as f:
+                f.write(response.content)
+    client.close()
+    return contents
+
+
+def summary_fragments(contents: List[bytes]) -> List[str]:
+    """HTML du résumé de chaque entrée, choisi comme dans extract_feed_articles"""
+    fragments = []
+    for content in contents:
+        for entry in feedparser.parse(content).entries:
+            if hasattr(entry, 'summary'):
+                fragments.append(entry.summary)
+            elif hasattr(entry, 'description'):
+                fragments.append(entry.description)
+            elif hasattr(entry, 'content'):
+                fragments.append(str(entry.content))
+    return fragments
+
+
+def measure(function, repeat: int) -> Tuple[float, List[str]]:
+    """Durée médiane de function() et son résultat"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de l'extraction du texte des resumes RSS")
+    parser.add_argument('sources', nargs='*', help='Fichiers XML, dossiers ou URL (defaut: feeds.json)')
+    parser.add_argument('--feeds', default=FEEDS_FILE)
+    parser.add_argument('--save', default="", help='Dossier ou archiver les feeds telecharges')
+    parser.add_argument('--limit', type=int, default=SUMMARY_MAX_CHARS)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--examples', type=int, default=5, help='Differences a afficher')
+    args = parser.parse_args()
+
+    feeds = load_sources(args.sources, args.feeds)
+    contents = download(feeds, args.save)
+    fragments = summary_fragments(contents)
+    print(f"{len(fragments):,} resumes dans {len(contents)} feeds "
+          f"({sum(len(f) for f in fragments) / max(1, len(fragments)):,.0f} caracteres HTML en moyenne)")
+    if not fragments:
+        return
+
+    limit = args.limit
+    cases = {
+        "bs4": lambda: [BeautifulSoup(f, "html.parser").get_text()[:limit] for f in fragments],
+        "rapide": lambda: [html_to_text(f, limit) for f in fragments],
+        "bs4 complet": lambda: [BeautifulSoup(f, "html.parser").get_text() for f in fragments],
+        "rapide complet": lambda: [html_to_text(f) for f in fragments],
+    }
+    print(f"\n{'methode':>15} {'mediane':>9} {'resumes/s':>12}")
+    print("-" * 38)
+    results, timings = {}, {}
+    for name, function in cases.items():
+        timings[name], results[name] = measure(function, args.repeat)
+        print(f"{name:>15} {timings[name]:>8.3f}s {len(fragments) / timings[name]:>12,.0f}")
+    print(f"\nAcceleration: x{timings['bs4'] / timings['rapide']:.1f} "
+          f"(x{timings['bs4 complet'] / timings['rapide complet']:.1f} sans limite)")
+
+    for label, reference, fast in (("tronque", "bs4", "rapide"), ("complet", "bs4 complet", "rapide complet")):
+        different = [(f, a, b) for f, a, b in zip(fragments, results[reference], results[fast]) if a != b]
+        print(f"Textes differents ({label}): {len(different)}/{len(fragments)}")
+        for fragment, expected, got in different[:args.examples]:
+            print(f"  HTML : {fragment[:120]!r}")
+            print(f"  bs4  : {expected[:120]!r}")
+            print(f"  rapide: {got[:120]!r}")
+
+
+if __name__ == "__main__":
+    main()
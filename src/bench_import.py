@@ -0,0 +1,71 @@
+"""
+Benchmark du démarrage à froid du collecteur
+Chaque mesure est faite dans un nouvel interpréteur (cache d'import vide):
+  - import     : import collect_data_tracking seul
+  - tracker    : import + premier accès au tracker (chargement des hashes)
+  - stats      : python continuous_collector.py --stats
+Affiche la médiane sur --repeat exécutions, puis les modules les plus coûteux
+de l'import (python -X importtime)
+
+Usage:
+    python bench_import.py
+    python bench_import.py --repeat 10 --top 15
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+CASES = {
+    "import": [sys.executable, "-c", "import collect_data_tracking"],
+    "tracker": [sys.executable, "-c", "import collect_data_tracking as c; len(c.tracker)"],
+    "stats": [sys.executable, os.path.join(SCRIPT_DIR, "continuous_collector.py"), "--stats"],
+}
+
+
+def measure(command) -> float:
+    start = time.perf_counter()
+    subprocess.run(command, cwd=SCRIPT_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+    return time.perf_counter() - start
+
+
+def top_imports(count: int):
+    """Modules dont l'import cumulé est le plus long (en ms)"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import collect_data_tracking"],
+                            cwd=SCRIPT_DIR, capture_output=True, text=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        rows.append((int(parts[1]) / 1000, parts[2].rstrip()))
+    return sorted(rows, reverse=True)[:count]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Temps de demarrage du collecteur")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--top', type=int, default=10, help='Modules les plus lents a afficher')
+    args = parser.parse_args()
+
+    # Un premier lancement pour chauffer le cache disque et les .pyc
+    measure(CASES["import"])
+
+    print(f"{'cas':>8} {'mediane':>9} {'min':>9} {'max':>9}")
+    print("-" * 38)
+    for name, command in CASES.items():
+        timings = [measure(command) for _ in range(args.repeat)]
+        print(f"{name:>8} {statistics.median(timings):>8.3f}s {min(timings):>8.3f}s {max(timings):>8.3f}s")
+
+    print("\nImports les plus couteux (cumules):")
+    for ms, module in top_imports(args.top):
+        print(f"  {ms:8.1f} ms  {module}")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,24 +6,45 @@ VERSION CORRIGÉE - Chemins adaptés à votre structure
 
 import os
 import json
-from datetime import datetime, timedelta
-import pandas as pd
-import feedparser
-from bs4 import BeautifulSoup
-import requests
-import tweepy
 from datetime import datetime, timedelta, timezone
-import praw
-from dotenv import load_dotenv
 import time
 import hashlib
-from urllib.parse import urljoin
+import uuid
 import logging
-from typing import List, Dict, Set
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import asyncio
 import sys
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from types import SimpleNamespace
 from dotenv import load_dotenv, find_dotenv
 
+# Les dépendances lourdes (pandas, feedparser, requests, aiohttp)
+# sont importées dans les fonctions qui les utilisent: importer ce module
+# (planificateur, commandes --stats...) reste rapide
+from feed_cache import FeedValidatorCache
+from http_client import HttpClient
+from feed_scheduler import FeedScheduler
+from feed_stream import FULL_READ_EVERY, FeedMarks, StreamError, stream_feed
+from source_health import SourceHealth
+from hash_store import GenerationalHashStore
+from dedup_index import SqliteHashSet, StripedDedupIndex
+from html_text import html_to_text
+from reddit_collector import (API_URL as REDDIT_API_URL, AUTH_URL as REDDIT_AUTH_URL, SUBREDDITS,
+                              RedditAPI, RedditCollector, RedditMarks, SubredditResult)
+from site_scraper import SITES, ScrapeResult, SiteScraper
+import news_classifier
+from near_duplicates import NearDuplicateIndex
+from url_canonical import url_key
+from jsonl_sink import EXTENSION, JsonlSink, read_records, recover_partials
+from raw_catalog import RawCatalog
+from run_budget import RunBudget
+from sharding import select_shard
+
 
 # --------------------------
 # CONFIGURATION UTF-8 POUR WINDOWS
@@ -60,6 +81,8 @@ PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
 
 # Chemins absolus vers les dossiers de données
 RAW_DIR = os.path.join(PROJECT_ROOT, "data", "raw")
+PARQUET_DIR = os.path.join(PROJECT_ROOT, "data", "parquet")
+MASTER_DIR = os.path.join(PROJECT_ROOT, "data", "master")
 TRACKING_DIR = os.path.join(PROJECT_ROOT, "data", "tracking")
 
 # Créer les sous-dossiers
@@ -67,6 +90,56 @@ for subdir in ['rss', 'twitter', 'reddit', 'scraping', 'newsapi', 'combined']:
     os.makedirs(os.path.join(RAW_DIR, subdir), exist_ok=True)
 os.makedirs(TRACKING_DIR, exist_ok=True)
 
+# Liste des feeds RSS
+FEEDS_FILE = os.getenv("FEEDS_FILE", os.path.join(SCRIPT_DIR, "feeds.json"))
+
+# Mode réparti: ce worker ne collecte que sa part (hachage cohérent) des feeds
+# et des sites; les hashes sont alors dédoublonnés dans une base SQLite
+# partagée par tous les workers (voir sharded_collector.py)
+SHARD_INDEX = int(os.getenv("SHARD_INDEX", "0"))
+SHARD_COUNT = int(os.getenv("SHARD_COUNT", "1"))
+SHARED_DEDUP_DB = os.getenv("SHARED_DEDUP_DB", "")
+# Base créée par sharded_collector.py: dès qu'elle existe, elle seule fait foi,
+# y compris pour les collectes non réparties (sinon les deux historiques divergent)
+DEFAULT_SHARED_DEDUP_DB = os.path.join(TRACKING_DIR, "shared_dedup.sqlite")
+
+# Pool de parsing des feeds (CPU): borné pour laisser de la marge au téléchargement
+PARSE_WORKERS = min(4, os.cpu_count() or 1)
+
+# Longueur maximale du résumé d'un article RSS (texte extrait du HTML)
+SUMMARY_MAX_CHARS = 500
+
+# Budget global: nombre maximum de feeds RSS interrogés par exécution
+RSS_REQUEST_BUDGET = 1000
+
+# Intervalle par défaut entre deux collectes RSS, quand le planning ne le
+# précise pas (RunConfig.interval_minutes): un feed est réinterrogé au plus
+# tard une collecte avant que la fenêtre hours_back ne dépasse son dernier passage
+RSS_INTERVAL_MINUTES = 60
+
+# Durée maximale d'une collecte: au-delà, les requêtes restantes sont
+# abandonnées mais tout ce qui a été collecté est conservé
+RUN_BUDGET_SECONDS = float(os.getenv("RUN_BUDGET_SECONDS", 30 * 60))
+
+# Requêtes NewsAPI par collecte (le quota gratuit est de 100 requêtes par jour)
+NEWSAPI_REQUESTS_PER_RUN = 4
+NEWSAPI_DAILY_QUOTA = 100
+
+# Format(s) de sauvegarde: 'jsonl' (flux JSONL gzip, défaut), 'both' (CSV + JSON,
+# historique), 'parquet', ou une liste séparée par des virgules, ex: 'jsonl,parquet'.
+# Les collecteurs écrivent toujours en JSONL au fil de l'eau; les autres formats
+# sont produits à la fin de chaque collecte à partir de ce fichier
+STORAGE_FORMAT = os.getenv("STORAGE_FORMAT", "jsonl")
+
+# Classification du type de news: 'keywords' (mots-clés, défaut) ou 'model'
+# (classifieur entraîné sur les catégories NewsAPI, voir news_model.py;
+# les mots-clés restent utilisés tant que le modèle n'est pas entraîné)
+NEWS_TYPE_BACKEND = os.getenv("NEWS_TYPE_BACKEND", "keywords")
+
+# Durée de rétention des hashes (bien au-delà de hours_back: un article plus
+# ancien est de toute façon écarté par le filtre temporel)
+HASH_TTL_DAYS = 28
+
 logger.info(f"[Config] Dossier projet: {PROJECT_ROOT}")
 logger.info(f"[Config] Données brutes: {RAW_DIR}")
 logger.info(f"[Config] Tracking: {TRACKING_DIR}")
@@ -74,73 +147,225 @@ logger.info(f"[Config] Tracking: {TRACKING_DIR}")
 # --------------------------
 # 🔑 SYSTÈME DE TRACKING HISTORIQUE
 # --------------------------
+def configure_shard(shard_index: int, shard_count: int, shared_dedup_db: str = ""):
+    """À appeler avant la première collecte (le tracker et les états sont créés au premier accès)"""
+    global SHARD_INDEX, SHARD_COUNT, SHARED_DEDUP_DB
+    SHARD_INDEX, SHARD_COUNT, SHARED_DEDUP_DB = shard_index, shard_count, shared_dedup_db
+
+def shared_dedup_db() -> str:
+    """Base de dédoublonnage partagée à utiliser ('' = historique local par générations)"""
+    if SHARED_DEDUP_DB:
+        return SHARED_DEDUP_DB
+    return DEFAULT_SHARED_DEDUP_DB if os.path.exists(DEFAULT_SHARED_DEDUP_DB) else ""
+
+def state_dir() -> str:
+    """Dossier des états propres au worker (validateurs HTTP, rythme des feeds, santé...)"""
+    if SHARD_COUNT <= 1:
+        return TRACKING_DIR
+    directory = os.path.join(TRACKING_DIR, "shards", f"{SHARD_INDEX}-of-{SHARD_COUNT}")
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+# Compteurs de la collecte en cours (DataTracker.counting()): les collectes
+# planifiées en parallèle ne comptent pas les articles des autres
+_run_counts: ContextVar[Optional[Dict[str, int]]] = ContextVar('dedup_run_counts', default=None)
+
 class DataTracker:
     """Gère le suivi des données déjà collectées"""
     
     def __init__(self):
+        # Anciens formats, migrés une seule fois vers le HashStore par générations
         self.tracking_file = os.path.join(TRACKING_DIR, "collected_hashes.json")
-        self.history_file = os.path.join(TRACKING_DIR, "collection_history.json")
-        self.known_hashes: Set[str] = set()
+        self.backup_file = os.path.join(TRACKING_DIR, "backup_hashes.json")
+        self.history_file = os.path.join(state_dir(), "collection_history.json")
+        self.shared_db = shared_dedup_db()
+        self.shared = bool(self.shared_db)
+        if self.shared:
+            # Workers répartis: une seule base pour tous, ajout atomique entre processus
+            self.known_hashes = SqliteHashSet(self.shared_db, "content_hashes", ttl_days=HASH_TTL_DAYS)
+            self.known_urls = SqliteHashSet(self.shared_db, "url_keys", ttl_days=HASH_TTL_DAYS)
+        else:
+            self.known_hashes = GenerationalHashStore(os.path.join(TRACKING_DIR, "hashes"),
+                                                      ttl_days=HASH_TTL_DAYS)
+            # Index secondaire: MD5 de l'URL canonique (sans utm_*, AMP, www, http...)
+            self.known_urls = GenerationalHashStore(os.path.join(TRACKING_DIR, "url_hashes"),
+                                                    ttl_days=HASH_TTL_DAYS)
+        # Vérification + ajout atomiques entre threads (verrous répartis par hash)
+        self.index = StripedDedupIndex(self.known_hashes)
+        # Collectes planifiées en parallèle: une seule écriture de l'historique à la fois
+        self._history_lock = threading.Lock()
         self.load_tracking()
     
     def load_tracking(self):
         """Charge l'historique des hashes collectés"""
-        if os.path.exists(self.tracking_file):
-            try:
-                with open(self.tracking_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    self.known_hashes = set(data.get('hashes', []))
-                logger.info(f"[Tracking] {len(self.known_hashes):,} hashes charges depuis l'historique")
-            except Exception as e:
-                logger.error(f"[Tracking] Erreur chargement: {e}")
-                self.known_hashes = set()
+        legacy_files = [self.tracking_file, self.backup_file]
+        if self.shared:
+            # La base partagée reprend l'historique local (sharded_collector.py)
+            logger.info(f"[Tracking] Base partagee {self.shared_db}: {len(self.known_hashes):,} hashes")
+            return
+        if len(self.known_hashes) == 0 and any(os.path.exists(p) for p in legacy_files):
+            logger.info("[Tracking] Migration de l'historique vers le format par generations")
+            self.known_hashes.migrate_from_json(legacy_files)
+            self.known_hashes.compact()
+        
+        if len(self.known_hashes):
+            logger.info(f"[Tracking] {len(self.known_hashes):,} hashes charges depuis l'historique")
         else:
             logger.info("[Tracking] Aucun historique trouve, creation d'un nouveau fichier")
     
+    def __len__(self) -> int:
+        return len(self.known_hashes)
+    
     def is_new(self, content_hash: str) -> bool:
         """Vérifie si le hash est nouveau"""
         return content_hash not in self.known_hashes
     
     def add_hash(self, content_hash: str):
         """Ajoute un hash à la liste des connus"""
-        self.known_hashes.add(content_hash)
+        self.index.check_and_add(content_hash)
+    
+    def check_and_add(self, content_hash: str, url: str = "") -> bool:
+        """
+        Enregistre le hash (et l'URL canonique) et retourne True si l'article
+        est nouveau, en une seule opération atomique: deux threads ne peuvent
+        pas accepter le même article. Un article dont l'URL canonique est déjà
+        connue est un doublon même si son titre a changé
+        """
+        if not url:
+            if not self.index.check_and_add(content_hash):
+                return False
+            self._count('new_hashes')
+            return True
+        
+        link_key = url_key(url)
+        with self.index.locked(content_hash, link_key):
+            # add() vérifie et enregistre en une fois (atomique aussi entre
+            # processus avec la base partagée); le hash est enregistré dans
+            # tous les cas: la prochaine fois il suffira
+            if not self.known_hashes.add(content_hash):
+                return False
+            self._count('new_hashes')
+            if not self.known_urls.add(link_key):
+                # Doublon détecté uniquement grâce à l'URL
+                self._count('url_duplicates')
+                return False
+            return True
+    
+    @contextmanager
+    def counting(self):
+        """
+        Compteurs de la collecte courante (new_hashes, url_duplicates): seuls
+        les appels faits depuis ce contexte (et ses tâches asyncio) y sont comptés
+        """
+        counts = {'new_hashes': 0, 'url_duplicates': 0}
+        token = _run_counts.set(counts)
+        try:
+            yield counts
+        finally:
+            _run_counts.reset(token)
+    
+    @staticmethod
+    def _count(name: str):
+        counts = _run_counts.get()
+        if counts is not None:
+            counts[name] += 1
     
     def save_tracking(self):
-        """Sauvegarde l'historique mis à jour"""
+        """Sauvegarde l'historique mis à jour (ajout en fin de journal, sans réécriture)"""
         try:
-            with open(self.tracking_file, 'w', encoding='utf-8') as f:
-                json.dump({
-                    'hashes': list(self.known_hashes),
-                    'last_updated': datetime.now().isoformat(),
-                    'total_count': len(self.known_hashes)
-                }, f, indent=2)
+            with self.index.exclusive():
+                self.known_hashes.flush()
+                self.known_urls.flush()
             logger.info(f"[Tracking] {len(self.known_hashes):,} hashes sauvegardes")
         except Exception as e:
             logger.error(f"[Tracking] Erreur sauvegarde: {e}")
     
     def save_collection_stats(self, stats: Dict):
         """Enregistre les statistiques de la collecte"""
-        history = []
-        if os.path.exists(self.history_file):
-            try:
-                with open(self.history_file, 'r', encoding='utf-8') as f:
-                    history = json.load(f)
-            except:
-                pass
-        
-        history.append({
-            'timestamp': datetime.now().isoformat(),
-            'stats': stats
-        })
-        
-        # Garder seulement les 100 dernières collectes
-        history = history[-100:]
-        
-        with open(self.history_file, 'w', encoding='utf-8') as f:
-            json.dump(history, f, indent=2)
+        with self._history_lock:
+            history = []
+            if os.path.exists(self.history_file):
+                try:
+                    with open(self.history_file, 'r', encoding='utf-8') as f:
+                        history = json.load(f)
+                except:
+                    pass
+            
+            history.append({
+                'timestamp': datetime.now().isoformat(),
+                'stats': stats
+            })
+            
+            # Garder seulement les 100 dernières collectes
+            history = history[-100:]
+            
+            with open(self.history_file, 'w', encoding='utf-8') as f:
+                json.dump(history, f, indent=2)
+
+class LazyInstance:
+    """
+    Crée l'objet au premier accès à l'un de ses attributs: les index et
+    fichiers d'état ne sont chargés que par les collectes qui s'en servent
+    """
+    
+    def __init__(self, factory):
+        self._factory = factory
+        self._instance = None
+        self._lock = threading.Lock()
+    
+    def _get(self):
+        if self._instance is None:
+            with self._lock:
+                if self._instance is None:
+                    self._instance = self._factory()
+        return self._instance
+    
+    @property
+    def loaded(self) -> bool:
+        return self._instance is not None
+    
+    def __getattr__(self, name):
+        return getattr(self._get(), name)
+    
+    def __len__(self):
+        return len(self._get())
 
 # Instance globale du tracker
-tracker = DataTracker()
+tracker = LazyInstance(DataTracker)
+
+# Validateurs HTTP (ETag / Last-Modified) des feeds RSS
+feed_validators = LazyInstance(lambda: FeedValidatorCache(os.path.join(state_dir(), "feed_validators.json")))
+
+# Rythme de publication appris pour chaque feed RSS
+feed_scheduler = LazyInstance(lambda: FeedScheduler(os.path.join(state_dir(), "feed_schedule.json")))
+
+# Marque de niveau haut de chaque feed (parsing arrêté aux entrées déjà lues)
+feed_marks = LazyInstance(lambda: FeedMarks(os.path.join(state_dir(), "feed_marks.json")))
+
+# Dernier post vu de chaque subreddit
+reddit_marks = LazyInstance(lambda: RedditMarks(os.path.join(state_dir(), "reddit_marks.json")))
+
+# Santé des sources (RSS et scraping): quarantaine des sources mortes
+source_health = LazyInstance(lambda: SourceHealth(os.path.join(state_dir(), "source_health.json")))
+
+# Sessions HTTP gardées ouvertes entre les collectes (connexions keep-alive réutilisées)
+http_client = LazyInstance(HttpClient)
+_reddit_api = None
+
+# Quasi-doublons entre sources: une même dépêche reprise partout = un seul story_cluster_id
+# (base SQLite commune à tous les shards, comme les hashes)
+story_index = LazyInstance(lambda: NearDuplicateIndex(os.path.join(TRACKING_DIR, "story_signatures.sqlite"),
+                                                      ttl_days=HASH_TTL_DAYS))
+
+# Catalogue des fichiers de data/raw (source, lignes, dates de publication, checksum)
+raw_catalog = LazyInstance(lambda: RawCatalog(os.path.join(TRACKING_DIR, "raw_catalog.sqlite"), RAW_DIR))
+
+def _load_news_type_model():
+    from news_model import NewsTypeModel
+    return NewsTypeModel.load(os.path.join(TRACKING_DIR, "news_type_model.npz"))
+
+# Classifieur entraîné (chargé seulement avec NEWS_TYPE_BACKEND=model)
+news_type_model = LazyInstance(_load_news_type_model)
 
 # --------------------------
 # Utilitaires
@@ -151,147 +376,295 @@ def generate_hash(text: str) -> str:
 
 def classify_news_type(title: str, summary: str = "", category: str = "") -> str:
     """Classifie automatiquement le type de news basé sur le contenu"""
-    
-    # Combiner titre + résumé pour analyse
-    text = (title + " " + summary).lower()
-    
     # Si catégorie déjà fournie (NewsAPI), l'utiliser
     if category:
         return category
-    
-    # Mots-clés par catégorie
-    tech_keywords = ['ai', 'intelligence artificielle', 'tech', 'technolog', 'software', 
-                     'app', 'digital', 'cyber', 'robot', 'internet', 'data', 'algorithm',
-                     'startup', 'google', 'apple', 'microsoft', 'meta', 'tesla']
-    
-    business_keywords = ['business', 'market', 'stock', 'économie', 'economy', 'finance',
-                        'bank', 'trade', 'invest', 'company', 'ceo', 'entreprise',
-                        'dollar', 'euro', 'bourse', 'croissance']
-    
-    politics_keywords = ['politic', 'government', 'election', 'president', 'minister',
-                        'parlement', 'vote', 'law', 'congress', 'senate', 'diplomacy',
-                        'gouvernement', 'ministre', 'député']
-    
-    science_keywords = ['science', 'research', 'study', 'scientist', 'discover',
-                       'space', 'nasa', 'climat', 'climate', 'environment', 'energy',
-                       'médical', 'health', 'covid', 'vaccine', 'cancer']
-    
-    sports_keywords = ['sport', 'football', 'basketball', 'tennis', 'match', 'game',
-                      'player', 'team', 'champion', 'olympic', 'world cup', 'league']
-    
-    entertainment_keywords = ['film', 'movie', 'music', 'actor', 'celebrity', 'hollywood',
-                             'series', 'tv', 'concert', 'album', 'netflix', 'disney']
-    
-    # Compter les occurrences
-    scores = {
-        'technology': sum(1 for kw in tech_keywords if kw in text),
-        'business': sum(1 for kw in business_keywords if kw in text),
-        'politics': sum(1 for kw in politics_keywords if kw in text),
-        'science': sum(1 for kw in science_keywords if kw in text),
-        'sports': sum(1 for kw in sports_keywords if kw in text),
-        'entertainment': sum(1 for kw in entertainment_keywords if kw in text)
-    }
-    
-    # Retourner la catégorie avec le score le plus élevé
-    max_category = max(scores, key=scores.get)
-    
-    # Si aucun match significatif, retourner 'general'
-    if scores[max_category] == 0:
-        return 'general'
-    
-    return max_category
+    return classify_news_types([title + " " + summary])[0]
 
-def save_data(data: List[Dict], filename: str, format='both'):
-    """Sauvegarde les données en CSV et JSON"""
+def classify_news_types(texts: List[str]) -> List[str]:
+    """Type de news d'un lot de textes, avec le classifieur choisi par NEWS_TYPE_BACKEND"""
+    if NEWS_TYPE_BACKEND == "model" and news_type_model.ready:
+        return news_type_model.predict(texts)
+    return news_classifier.classify_batch(texts)
+
+def storage_formats(format: str) -> set:
+    """Traduit un format de sauvegarde ('jsonl', 'both', 'csv,parquet'...) en ensemble"""
+    if format == 'both':
+        return {'csv', 'json'}
+    return {f.strip() for f in format.split(',') if f.strip()}
+
+def save_data(data: List[Dict], filename: str, format=None):
+    """Sauvegarde les données en CSV, JSON et/ou Parquet partitionné"""
     if not data:
         logger.warning(f"Aucune donnee a sauvegarder pour {filename}")
         return
     
+    formats = storage_formats(format or STORAGE_FORMAT)
+    
+    if 'parquet' in formats:
+        try:
+            from parquet_store import write_partitioned
+            write_partitioned(data, PARQUET_DIR, os.path.basename(filename))
+        except ImportError:
+            # pyarrow absent: on retombe sur le format historique
+            logger.warning("[Parquet] pyarrow non installe, sauvegarde en CSV + JSON")
+            formats |= {'csv', 'json'}
+    
+    if not formats & {'csv', 'json'}:
+        return
+    
+    import pandas as pd
     df = pd.DataFrame(data)
     
-    if format in ['csv', 'both']:
+    if 'csv' in formats:
         df.to_csv(f"{filename}.csv", index=False, encoding='utf-8')
+        raw_catalog.register(f"{filename}.csv", data)
         logger.info(f"[OK] Sauvegarde: {filename}.csv ({len(data)} entrees)")
     
-    if format in ['json', 'both']:
+    if 'json' in formats:
         df.to_json(f"{filename}.json", orient="records", force_ascii=False, indent=2)
+        raw_catalog.register(f"{filename}.json", data)
         logger.info(f"[OK] Sauvegarde: {filename}.json ({len(data)} entrees)")
 
+def open_sink(subdir: str, name: str) -> JsonlSink:
+    """Ouvre le flux d'écriture d'une collecte (après récupération d'un éventuel crash)"""
+    directory = os.path.join(RAW_DIR, subdir)
+    for path in recover_partials(directory):
+        store_raw_files([path], path[:-len(EXTENSION)])
+    today = datetime.today().strftime("%Y-%m-%d_%H%M%S")
+    # Plusieurs workers (ou deux collectes rapprochées) écrivent dans le même
+    # dossier à la même seconde: suffixe propre à chaque exécution
+    shard = f"_shard{SHARD_INDEX}of{SHARD_COUNT}" if SHARD_COUNT > 1 else ""
+    return JsonlSink(os.path.join(directory, f"{name}_{today}{shard}_{uuid.uuid4().hex[:8]}"))
+
+def finalize_sink(sink: JsonlSink) -> int:
+    """
+    Ferme le flux d'une collecte et produit les autres formats demandés
+    (ceux-ci rechargent la collecte en mémoire); retourne le nombre d'enregistrements
+    """
+    store_raw_files(sink.close(), sink.base_path)
+    return sink.count
+
+def store_raw_files(paths: List[str], base_path: str):
+    """
+    Enregistre des fichiers JSONL finalisés dans le catalogue (ou les
+    convertit dans les autres formats demandés): même chemin pour une
+    collecte terminée et pour un .partial récupéré après un crash
+    """
+    formats = storage_formats(STORAGE_FORMAT)
+    if 'jsonl' in formats:
+        for path in paths:
+            raw_catalog.register(path, read_records(path))
+    other_formats = formats - {'jsonl'}
+    if other_formats and paths:
+        records = [record for path in paths for record in read_records(path)]
+        if records:
+            save_data(records, base_path, format=','.join(sorted(other_formats)))
+        if 'jsonl' not in formats:
+            for path in paths:
+                os.remove(path)
+
 # --------------------------
 # 1- RSS avec filtrage temporel
 # --------------------------
-def parse_single_feed(source: str, url: str, hours_back: int = 24) -> List[Dict]:
-    """Parse un seul feed RSS avec filtrage temporel"""
+def extract_feed_articles(source: str, feed, hours_back: int = 24) -> List[Dict]:
+    """Extrait les articles récents d'un feed déjà parsé (sans vérification des doublons)"""
     articles = []
     cutoff_time = datetime.now() - timedelta(hours=hours_back)
     
-    try:
-        feed = feedparser.parse(url)
+    for entry in feed.entries:
+        # Extraction du contenu (texte du HTML, arrêtée à SUMMARY_MAX_CHARS caractères)
+        summary = ""
+        if hasattr(entry, 'summary'):
+            summary = html_to_text(entry.summary, SUMMARY_MAX_CHARS)
+        elif hasattr(entry, 'description'):
+            summary = html_to_text(entry.description, SUMMARY_MAX_CHARS)
+        elif hasattr(entry, 'content'):
+            summary = html_to_text(str(entry.content), SUMMARY_MAX_CHARS)
         
-        for entry in feed.entries:
-            # Extraction du contenu
-            summary = ""
-            if hasattr(entry, 'summary'):
-                summary = BeautifulSoup(entry.summary, "html.parser").get_text()
-            elif hasattr(entry, 'description'):
-                summary = BeautifulSoup(entry.description, "html.parser").get_text()
-            elif hasattr(entry, 'content'):
-                summary = BeautifulSoup(str(entry.content), "html.parser").get_text()
-            
-            # Extraction de la date
-            published = ""
-            entry_date = None
-            if hasattr(entry, 'published_parsed') and entry.published_parsed:
-                entry_date = datetime(*entry.published_parsed[:6])
-                published = entry_date.isoformat()
-            elif hasattr(entry, 'updated_parsed') and entry.updated_parsed:
-                entry_date = datetime(*entry.updated_parsed[:6])
-                published = entry_date.isoformat()
-            
-            # FILTRE TEMPOREL: Ignorer les articles trop anciens
-            if entry_date and entry_date < cutoff_time:
-                continue
+        # Extraction de la date
+        published = ""
+        entry_date = None
+        if hasattr(entry, 'published_parsed') and entry.published_parsed:
+            entry_date = datetime(*entry.published_parsed[:6])
+            published = entry_date.isoformat()
+        elif hasattr(entry, 'updated_parsed') and entry.updated_parsed:
+            entry_date = datetime(*entry.updated_parsed[:6])
+            published = entry_date.isoformat()
+        
+        # FILTRE TEMPOREL: Ignorer les articles trop anciens
+        if entry_date and entry_date < cutoff_time:
+            continue
+        
+        # Même nettoyage pour les deux parseurs (flux XML ou feedparser): texte
+        # sans balises ni entités, donc même titre et même hash quel que soit le chemin
+        title = html_to_text(entry.title).strip() if hasattr(entry, 'title') else ""
+        link = entry.link if hasattr(entry, 'link') else ""
+        if not link.startswith(('http://', 'https://')):
+            link = ""   # feedparser reprend l'id Atom (urn:uuid:...) comme lien
+        
+        articles.append({
+            "source_type": "rss",
+            "source": source,
+            "title": title,
+            "link": link,
+            "published": published,
+            "summary": summary,
+            "news_type": "",  # Classé en lot ci-dessous
+            "content_hash": generate_hash(title + link),
+            "retrieved_date": datetime.now().isoformat()
+        })
+    
+    # Tous les articles du feed classés en un seul appel
+    news_types = classify_news_types([a["title"] + " " + a["summary"][:200] for a in articles])
+    for article, news_type in zip(articles, news_types):
+        article["news_type"] = news_type
+    
+    return articles
+
+def parse_feed_content(source: str, content: bytes, headers: Dict[str, str],
+                       hours_back: int = 24, mark: Optional[Dict] = None) -> Tuple[List[Dict], Dict]:
+    """
+    Parse un feed déjà téléchargé (exécuté dans le pool de workers CPU).
+    Lecture en flux arrêtée à la marque du feed (feed_marks.get), feedparser
+    si le document n'est pas du XML strict. Retourne les articles et le
+    résultat à transmettre à feed_marks.update
+    """
+    mark = mark or {}
+    retry_in = mark.get('stream_retry_in', 0)
+    if retry_in <= 0:
+        cutoff_time = datetime.now() - timedelta(hours=hours_back)
+        try:
+            stream = stream_feed(content, headers.get('content-location', ''), mark, cutoff_time)
+        except StreamError:
+            outcome = {'fallback': True, 'stream_retry_in': FULL_READ_EVERY}
+        else:
+            outcome = {'entries': len(stream.entries), 'sorted': stream.in_order,
+                       'stopped_early': stream.stopped_early,
+                       'bytes_skipped': len(content) - stream.bytes_read, 'stream_retry_in': 0}
+            if stream.newest:
+                outcome['published'] = stream.newest.isoformat()
+            if stream.newest_guid:
+                outcome['guid'] = stream.newest_guid
+            return extract_feed_articles(source, SimpleNamespace(entries=stream.entries), hours_back), outcome
+    else:
+        outcome = {'fallback': True, 'stream_retry_in': retry_in - 1}
+    
+    import feedparser
+    feed = feedparser.parse(content, response_headers=headers)
+    outcome['entries'] = len(feed.entries)
+    return extract_feed_articles(source, feed, hours_back), outcome
+
+def keep_new_articles(candidates: List[Dict]) -> List[Dict]:
+    """Ne garde que les articles jamais collectés et les enregistre dans le tracker"""
+    articles = []
+    for article in candidates:
+        content_hash = article["content_hash"]
+        
+        # VÉRIFICATION: Ignorer si déjà collecté (vérification + ajout atomiques)
+        if not tracker.check_and_add(content_hash, article["link"]):
+            continue
+        
+        # Titre seul, comme pour NewsAPI, Reddit et le scraping: même dépêche, même signature
+        article["story_cluster_id"] = story_index.assign(article["title"], content_hash)
+        articles.append(article)
+    return articles
+
+def max_poll_interval(hours_back: int, interval_minutes: Optional[float] = None) -> float:
+    """
+    Intervalle maximal entre deux requêtes d'un même feed (minutes): la
+    fenêtre de collecte moins un intervalle de planning, pour qu'une collecte
+    en retard (planning, budget épuisé) couvre encore le dernier passage
+    """
+    from feed_scheduler import MIN_INTERVAL_MINUTES
+    margin = max(interval_minutes or RSS_INTERVAL_MINUTES, MIN_INTERVAL_MINUTES)
+    return max(MIN_INTERVAL_MINUTES, hours_back * 60 - margin)
+
+async def fetch_and_parse_feeds(rss_feeds: Dict[str, str], sink: JsonlSink, hours_back: int = 24,
+                                budget: Optional[RunBudget] = None,
+                                interval_minutes: Optional[float] = None) -> int:
+    """
+    Télécharge tous les feeds en asynchrone et confie le parsing à un pool de
+    processus borné; le dédoublonnage reste dans la boucle d'événements.
+    Les nouveaux articles sont écrits dans le flux; retourne leur nombre.
+    Les feeds encore en cours à l'échéance du budget sont annulés.
+    interval_minutes: intervalle entre deux collectes RSS (voir max_poll_interval)
+    """
+    budget = budget or RunBudget()
+    max_interval = max_poll_interval(hours_back, interval_minutes)
+    from async_fetcher import REQUEST_TIMEOUT, AsyncFeedFetcher, FetchResult
+    loop = asyncio.get_running_loop()
+    total = 0
+    # Limite le nombre de documents téléchargés en attente de parsing
+    parse_slots = asyncio.Semaphore(PARSE_WORKERS * 2)
+    
+    # 'spawn': les collectes planifiées tournent dans des threads, un fork
+    # pourrait copier un verrou tenu par un autre thread
+    with ProcessPoolExecutor(max_workers=PARSE_WORKERS,
+                             mp_context=multiprocessing.get_context('spawn')) as parse_pool:
+        
+        async def handle(result: FetchResult):
+            nonlocal total
+            if result.error:
+                source_health.record_failure(f"rss/{result.source}", result.elapsed, result.error)
+            else:
+                source_health.record_success(f"rss/{result.source}", result.elapsed)
             
-            title = entry.title if hasattr(entry, 'title') else ""
-            link = entry.link if hasattr(entry, 'link') else ""
+            # Feed inchangé depuis la dernière collecte: rien à parser
+            if result.not_modified:
+                feed_validators.record_not_modified(result.url)
+                feed_scheduler.record_poll(result.source, 0, max_interval_minutes=max_interval)
+                return
             
-            content_hash = generate_hash(title + link)
+            if not result.ok:
+                logger.error(f"  [ERREUR] {result.source}: {result.error}")
+                feed_scheduler.record_error(result.source)
+                return
             
-            # VÉRIFICATION: Ignorer si déjà collecté
-            if not tracker.is_new(content_hash):
-                continue
+            async with parse_slots:
+                candidates, outcome = await loop.run_in_executor(
+                    parse_pool, parse_feed_content,
+                    result.source, result.content, result.headers, hours_back,
+                    feed_marks.get(result.source)
+                )
             
-            article = {
-                "source_type": "rss",
-                "source": source,
-                "title": title,
-                "link": link,
-                "published": published,
-                "summary": summary[:500],
-                "news_type": classify_news_type(title, summary[:200]),  # NOUVEAU
-                "content_hash": content_hash,
-                "retrieved_date": datetime.now().isoformat()
-            }
-            articles.append(article)
-            tracker.add_hash(content_hash)
+            articles = keep_new_articles(candidates)
+            feed_validators.store(result.url, result.headers.get('etag', ''),
+                                  result.headers.get('last-modified', ''))
+            feed_marks.update(result.source, outcome)
+            # Intervalle max sous la fenêtre de collecte, pour ne jamais rater d'articles
+            feed_scheduler.record_poll(result.source, len(articles), max_interval_minutes=max_interval)
+            for article in articles:
+                sink.write(article)
+            total += len(articles)
+            logger.info(f"  [OK] {result.source}: {len(articles)} nouveaux articles")
         
-        logger.info(f"  [OK] {source}: {len(articles)} nouveaux articles")
-        return articles
-        
-    except Exception as e:
-        logger.error(f"  [ERREUR] {source}: {e}")
-        return []
+        time_limit = budget.remaining() if budget.deadline is not None else None
+        # Session aiohttp du client partagé: cache DNS, keep-alive et connexions comptées
+        async with http_client.async_session(timeout=REQUEST_TIMEOUT) as session:
+            cancelled = await AsyncFeedFetcher().fetch_all(rss_feeds, handle,
+                                                           request_headers=feed_validators.request_headers,
+                                                           time_limit=time_limit, session=session)
+        if cancelled:
+            # Restent à échéance: ils seront prioritaires à la prochaine collecte
+            budget.skip("rss", cancelled)
+    
+    return total
 
-def collect_rss(hours_back: int = 24):
-    """Collecte RSS avec filtrage temporel"""
+def collect_rss(hours_back: int = 24, budget: Optional[RunBudget] = None,
+                interval_minutes: Optional[float] = None):
+    """
+    Collecte RSS avec filtrage temporel, les feeds les plus productifs d'abord;
+    interval_minutes: intervalle du planning RSS (défaut RSS_INTERVAL_MINUTES)
+    """
     
     # Chercher feeds.json dans src/ (CORRIGÉ)
-    feeds_path = os.path.join(SCRIPT_DIR, "feeds.json")
+    feeds_path = FEEDS_FILE
     
     if not os.path.exists(feeds_path):
         logger.error(f"[RSS] Fichier feeds.json introuvable!")
         logger.error(f"       Cherche dans: {feeds_path}")
-        return []
+        return 0
     
     try:
         with open(feeds_path, "r", encoding='utf-8') as f:
@@ -299,38 +672,51 @@ def collect_rss(hours_back: int = 24):
         logger.info(f"[RSS] {len(rss_feeds)} feeds charges depuis {feeds_path}")
     except Exception as e:
         logger.error(f"[RSS] Erreur lecture feeds.json: {e}")
-        return []
+        return 0
     
     logger.info(f"[RSS] Collecte des articles des {hours_back} dernieres heures")
     
-    all_articles = []
-    
-    with ThreadPoolExecutor(max_workers=5) as executor:
-        futures = {executor.submit(parse_single_feed, source, url, hours_back): source 
-                   for source, url in rss_feeds.items()}
-        
-        for future in as_completed(futures):
-            articles = future.result()
-            all_articles.extend(articles)
-    
-    today = datetime.today().strftime("%Y-%m-%d_%H%M")
-    save_data(all_articles, os.path.join(RAW_DIR, "rss", f"articles_{today}"))
-    logger.info(f"[RSS] Total: {len(all_articles)} nouveaux articles")
-    return all_articles
+    # Mode réparti: seulement la part de ce worker
+    rss_feeds = select_shard(rss_feeds, SHARD_INDEX, SHARD_COUNT)
+    if SHARD_COUNT > 1:
+        logger.info(f"[RSS] Shard {SHARD_INDEX + 1}/{SHARD_COUNT}: {len(rss_feeds)} feeds")
+    
+    # Seuls les feeds sains et arrivés à échéance sont interrogés, dans la limite du budget
+    healthy_feeds = source_health.filter_allowed(rss_feeds, prefix="rss/")
+    due_feeds = feed_scheduler.due_feeds(healthy_feeds, max_feeds=RSS_REQUEST_BUDGET)
+    
+    feed_validators.reset_counters()
+    feed_marks.reset_counters()
+    with open_sink("rss", "articles") as sink:
+        asyncio.run(fetch_and_parse_feeds(due_feeds, sink, hours_back, budget, interval_minutes))
+    feed_validators.save()
+    feed_scheduler.save()
+    feed_marks.save()
+    source_health.save()
+    logger.info(f"[RSS] Cache HTTP: {feed_validators.hits} feeds inchanges (304), "
+                f"{feed_validators.misses} telecharges")
+    logger.info(f"[RSS] Parsing: {feed_marks.parsed_entries} entrees lues, {feed_marks.early_stops} feeds "
+                f"arretes a leur marque ({feed_marks.bytes_skipped // 1024} Ko non parses), "
+                f"{feed_marks.fallbacks} via feedparser")
+    
+    total = finalize_sink(sink)
+    logger.info(f"[RSS] Total: {total} nouveaux articles")
+    return total
 
 # --------------------------
 # 2- NewsAPI avec filtrage
 # --------------------------
 
-def collect_newsapi(hours_back: int = 24):
+def collect_newsapi(hours_back: int = 24, budget: Optional[RunBudget] = None):
     """Collecte NewsAPI avec filtrage temporel et gestion UTC propre."""
+    budget = budget or RunBudget()
 
     api_key = os.getenv("NEWS_API_KEY")
     if not api_key:
         logger.warning("[NewsAPI] Clé API manquante dans .env")
-        return []
+        return 0
 
-    articles = []
+    sink = open_sink("newsapi", "articles")
     countries = ['us', 'fr']
     categories = ['business', 'entertainment', 'health', 'science', 'sports', 'technology']
 
@@ -340,12 +726,15 @@ def collect_newsapi(hours_back: int = 24):
     cutoff_time = datetime.now(timezone.utc) - timedelta(hours=hours_back)
 
     request_count = 0
-    max_requests = 4
+    max_requests = NEWSAPI_REQUESTS_PER_RUN
 
     for country in countries:
         for category in categories:
             if request_count >= max_requests:
                 break
+            if budget.expired():
+                budget.skip("newsapi", [f"{country}/{category}"])
+                continue
             request_count += 1
 
             logger.info(f"[NewsAPI] ({request_count}/{max_requests}) {country}/{category}")
@@ -359,7 +748,7 @@ def collect_newsapi(hours_back: int = 24):
             }
 
             try:
-                response = requests.get(url, params=params, timeout=10)
+                response = http_client.get(url, params=params, timeout=budget.timeout(10))
                 response.raise_for_status()
                 data = response.json()
 
@@ -383,12 +772,12 @@ def collect_newsapi(hours_back: int = 24):
                         # Génération du hash unique
                         content_hash = generate_hash((art.get("title") or "") + (art.get("url") or ""))
 
-                        # Vérification de nouveauté
-                        if not tracker.is_new(content_hash):
+                        # Vérification de nouveauté (et enregistrement du hash)
+                        if not tracker.check_and_add(content_hash, art.get("url") or ""):
                             continue
 
                         # Ajout de l'article
-                        articles.append({
+                        sink.write({
                             "source_type": "newsapi",
                             "source": art.get("source", {}).get("name", "Unknown"),
                             "country": country,
@@ -400,9 +789,9 @@ def collect_newsapi(hours_back: int = 24):
                             "content": art.get("content"),
                             "news_type": category,
                             "content_hash": content_hash,
+                            "story_cluster_id": story_index.assign(art.get("title") or "", content_hash),
                             "retrieved_date": datetime.now(timezone.utc).isoformat()
                         })
-                        tracker.add_hash(content_hash)
                         kept += 1
 
                     logger.info(f"  [OK] {total} articles (garde {kept})")
@@ -414,26 +803,29 @@ def collect_newsapi(hours_back: int = 24):
             except Exception as e:
                 logger.error(f"  [ERREUR]: {e}")
 
-    # Sauvegarde des articles collectés
-    today = datetime.now().strftime("%Y-%m-%d_%H%M")
-    save_data(articles, os.path.join(RAW_DIR, "newsapi", f"articles_{today}"))
-    logger.info(f"[NewsAPI] Total: {len(articles)} nouveaux articles")
+    # Finalisation du flux des articles collectés
+    total = finalize_sink(sink)
+    logger.info(f"[NewsAPI] Total: {total} nouveaux articles")
 
-    return articles
+    return total
 # --------------------------
 # 3- Twitter DESACTIVE
 # --------------------------
-def collect_twitter(hours_back: int = 24):
+def collect_twitter(hours_back: int = 24, budget: Optional[RunBudget] = None):
     """Twitter désactivé - 176 feeds RSS suffisent"""
     logger.info("[Twitter] DESACTIVE - API payante depuis 2023")
     logger.info("[Twitter] Les 176 feeds RSS fournissent plus de donnees")
     logger.info("[Twitter] Pour activer: configurer TWITTER_BEARER_TOKEN dans .env et modifier cette fonction")
-    return []
+    return 0
 # --------------------------
 # 4- Reddit avec filtrage
 # --------------------------
-def collect_reddit(hours_back: int = 24):
-    """Collecte Reddit avec filtrage temporel"""
+def collect_reddit(hours_back: int = 24, budget: Optional[RunBudget] = None):
+    """
+    Collecte Reddit avec filtrage temporel: les subreddits sont lus en
+    parallèle (reddit_collector.py), chacun paginé jusqu'au dernier post vu
+    """
+    budget = budget or RunBudget()
     
     client_id = os.getenv("REDDIT_CLIENT_ID")
     client_secret = os.getenv("REDDIT_CLIENT_SECRET")
@@ -441,186 +833,273 @@ def collect_reddit(hours_back: int = 24):
     
     if not (client_id and client_secret) or client_id == "votre_client_id_ici":
         logger.warning("[Reddit] Identifiants manquants")
-        return []
+        return 0
     
-    try:
-        reddit = praw.Reddit(
-            client_id=client_id,
-            client_secret=client_secret,
-            user_agent=user_agent
-        )
-        logger.info("[Reddit] Connexion etablie")
-    except Exception as e:
-        logger.error(f"[Reddit] Erreur connexion: {e}")
-        return []
+    global _reddit_api
+    # Client conservé entre les collectes (jeton OAuth, quota et connexions réutilisés)
+    if _reddit_api is None:
+        _reddit_api = RedditAPI(http_client.session, client_id, client_secret, user_agent,
+                                auth_url=os.getenv("REDDIT_AUTH_URL", REDDIT_AUTH_URL),
+                                api_url=os.getenv("REDDIT_API_URL", REDDIT_API_URL))
     
-    subreddits = ["worldnews", "news", "technology", "science", "business"]
-    posts_data = []
+    sink = open_sink("reddit", "posts")
     cutoff_time = datetime.now() - timedelta(hours=hours_back)
     
     logger.info(f"[Reddit] Collecte des posts des {hours_back} dernieres heures")
     
-    for subreddit_name in subreddits:
-        logger.info(f"[Reddit] r/{subreddit_name}")
+    def handle(result: SubredditResult):
+        if result.error:
+            logger.error(f"  [ERREUR] r/{result.subreddit}: {result.error}")
         
-        try:
-            subreddit = reddit.subreddit(subreddit_name)
-            
-            for post in subreddit.new(limit=100):
-                post_date = datetime.fromtimestamp(post.created_utc)
-                if post_date < cutoff_time:
-                    continue
-                
-                content_hash = generate_hash(post.title + post.url)
-                
-                if not tracker.is_new(content_hash):
-                    continue
-                
-                posts_data.append({
-                    "source_type": "reddit",
-                    "subreddit": subreddit_name,
-                    "title": post.title,
-                    "url": post.url,
-                    "score": post.score,
-                    "created_utc": post_date.isoformat(),
-                    "news_type": classify_news_type(post.title),  # NOUVEAU
-                    "content_hash": content_hash,
-                    "retrieved_date": datetime.now().isoformat()
-                })
-                tracker.add_hash(content_hash)
+        news_types = classify_news_types([post["title"] for post in result.posts])
+        kept = 0
+        for post, news_type in zip(result.posts, news_types):
+            content_hash = generate_hash(post["title"] + post["url"])
             
-            logger.info(f"  [OK] {len([p for p in posts_data if p['subreddit'] == subreddit_name])} nouveaux posts")
-            time.sleep(1)
+            if not tracker.check_and_add(content_hash, post["url"]):
+                continue
             
-        except Exception as e:
-            logger.error(f"  [ERREUR]: {e}")
-    
-    today = datetime.today().strftime("%Y-%m-%d_%H%M")
-    save_data(posts_data, os.path.join(RAW_DIR, "reddit", f"posts_{today}"))
-    logger.info(f"[Reddit] Total: {len(posts_data)} nouveaux posts")
-    return posts_data
+            sink.write({
+                "source_type": "reddit",
+                "subreddit": result.subreddit,
+                "title": post["title"],
+                "url": post["url"],
+                "score": post.get("score", 0),
+                "created_utc": datetime.fromtimestamp(post["created_utc"]).isoformat(),
+                "news_type": news_type,
+                "content_hash": content_hash,
+                "story_cluster_id": story_index.assign(post["title"], content_hash),
+                "retrieved_date": datetime.now().isoformat()
+            })
+            kept += 1
+        
+        if result.gap:
+            logger.warning(f"  [Reddit] r/{result.subreddit}: limite de {result.pages} pages atteinte "
+                           f"avant le dernier post vu, posts plus anciens perdus")
+        elif not result.complete and not result.error:
+            logger.warning(f"  [Reddit] r/{result.subreddit}: rattrapage interrompu (budget epuise), "
+                           f"repris a la prochaine collecte")
+        logger.info(f"  [OK] r/{result.subreddit}: {kept} nouveaux posts "
+                    f"({len(result.posts)} lus, {result.pages} pages)")
+    
+    time_limit = budget.remaining() if budget.deadline is not None else None
+    skipped = RedditCollector(_reddit_api).collect(SUBREDDITS, reddit_marks, handle,
+                                                   cutoff_time.timestamp(), time_limit)
+    if skipped:
+        budget.skip("reddit", [f"r/{name}" for name in skipped])
+    reddit_marks.save()
+    
+    total = finalize_sink(sink)
+    logger.info(f"[Reddit] Total: {total} nouveaux posts")
+    return total
 
 # --------------------------
 # 5- Scraping avec filtrage
 # --------------------------
-def collect_scraping():
-    """Scraping avec filtrage"""
-    
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-    }
-    
-    sites = {
-    "BBC": "https://www.bbc.com/news",
-    "Reuters": "https://www.reuters.com/world/",
-    "Guardian": "https://www.theguardian.com/international",
-    "CNN": "https://edition.cnn.com/world",
-    "NYTimes": "https://www.nytimes.com/section/world",
-    "WashingtonPost": "https://www.washingtonpost.com/world/",
-    "AlJazeera": "https://www.aljazeera.com/news/",
-    "France24": "https://www.france24.com/en/",
-    "LeMonde": "https://www.lemonde.fr/",
-    "LeFigaro": "https://www.lefigaro.fr/",
-    "ElPais": "https://elpais.com/",
-    "DeutscheWelle": "https://www.dw.com/en/top-stories/s-9097",
-    "DerSpiegel": "https://www.spiegel.de/international/",
-    "CBC": "https://www.cbc.ca/news",
-    "AP": "https://apnews.com/hub/world-news",
-    "Bloomberg": "https://www.bloomberg.com/europe",
-    "Politico": "https://www.politico.eu/",
-    "TheEconomist": "https://www.economist.com/",
-    "TheVerge": "https://www.theverge.com/",
-    "TechCrunch": "https://techcrunch.com/",
-    "Wired": "https://www.wired.com/",
-    "HindustanTimes": "https://www.hindustantimes.com/world-news",
-    "TheHindu": "https://www.thehindu.com/news/",
-    "JapanTimes": "https://www.japantimes.co.jp/news/",
-    "ArabNews": "https://www.arabnews.com/",
-    "AlAhram": "https://english.ahram.org.eg/",
-    "TimesOfIsrael": "https://www.timesofisrael.com/",
-    "CBC (Canada)": "https://www.cbc.ca/news",
-    "ABC_Australia": "https://www.abc.net.au/news/",
-    }
-    
-    all_articles = []
-    
-    for source, url in sites.items():
-        logger.info(f"[Scraping] {source}")
+def collect_scraping(budget: Optional[RunBudget] = None):
+    """
+    Scraping avec filtrage: les sites sont téléchargés en parallèle
+    (site_scraper.py, un intervalle minimal entre deux requêtes vers un même
+    domaine), le dédoublonnage et l'écriture restent séquentiels
+    """
+    budget = budget or RunBudget()
+    
+    sites = select_shard(SITES, SHARD_INDEX, SHARD_COUNT)
+    sites = source_health.filter_allowed(sites, prefix="scraping/")
+    
+    sink = open_sink("scraping", "scraped_articles")
+    
+    def handle(result: ScrapeResult):
+        if result.error:
+            if result.request_failed:
+                # Erreur réseau / HTTP: compte pour la quarantaine du site
+                source_health.record_failure(f"scraping/{result.source}", result.elapsed, result.error)
+            logger.error(f"  [ERREUR] {result.source}: {result.error}")
+            return
+        source_health.record_success(f"scraping/{result.source}", result.elapsed)
         
-        try:
-            r = requests.get(url, headers=headers, timeout=15)
-            r.raise_for_status()
-            soup = BeautifulSoup(r.text, "html.parser")
-            
-            for tag in soup.find_all(['h1', 'h2', 'h3'], limit=100):
-                text = tag.get_text(strip=True)
-                
-                if len(text) < 15 or len(text) > 300:
-                    continue
-                
-                link = ""
-                link_tag = tag.find("a") or tag.find_parent("a")
-                if link_tag and link_tag.get("href"):
-                    href = link_tag["href"]
-                    link = urljoin(url, href) if not href.startswith('http') else href
-                
-                content_hash = generate_hash(text + link)
-                
-                if not tracker.is_new(content_hash):
-                    continue
-                
-                all_articles.append({
-                    "source_type": "scraping",
-                    "source": source,
-                    "title": text,
-                    "link": link,
-                    "news_type": classify_news_type(text),  # NOUVEAU
-                    "content_hash": content_hash,
-                    "retrieved_date": datetime.now().isoformat()
-                })
-                tracker.add_hash(content_hash)
+        news_types = classify_news_types([text for text, _ in result.headings])
+        kept = 0
+        for (text, link), news_type in zip(result.headings, news_types):
+            content_hash = generate_hash(text + link)
             
-            logger.info(f"  [OK] {len([a for a in all_articles if a['source'] == source])} nouveaux articles")
-            time.sleep(2)
+            if not tracker.check_and_add(content_hash, link):
+                continue
             
-        except Exception as e:
-            logger.error(f"  [ERREUR]: {e}")
+            sink.write({
+                "source_type": "scraping",
+                "source": result.source,
+                "title": text,
+                "link": link,
+                "news_type": news_type,
+                "content_hash": content_hash,
+                "story_cluster_id": story_index.assign(text, content_hash),
+                "retrieved_date": datetime.now().isoformat()
+            })
+            kept += 1
+        
+        truncated = " (page tronquee)" if result.truncated else ""
+        logger.info(f"  [OK] {result.source}: {kept} nouveaux articles{truncated}")
+    
+    time_limit = budget.remaining() if budget.deadline is not None else None
+    skipped = SiteScraper(http_client.session).scrape_all(sites, handle, time_limit)
+    if skipped:
+        budget.skip("scraping", skipped)
+    
+    source_health.save()
     
-    today = datetime.today().strftime("%Y-%m-%d_%H%M")
-    save_data(all_articles, os.path.join(RAW_DIR, "scraping", f"scraped_articles_{today}"))
-    logger.info(f"[Scraping] Total: {len(all_articles)} nouveaux articles")
-    return all_articles
+    total = finalize_sink(sink)
+    logger.info(f"[Scraping] Total: {total} nouveaux articles")
+    return total
 
 # --------------------------
 # Fusion
 # --------------------------
 def combine_all_sources():
-    """Combine toutes les sources"""
-    
-    today = datetime.today().strftime("%Y-%m-%d")
-    all_data = []
-    
-    for subdir in ['rss', 'twitter', 'reddit', 'scraping', 'newsapi']:
-        subdir_path = os.path.join(RAW_DIR, subdir)
-        if not os.path.exists(subdir_path):
-            continue
+    """
+    Ajoute au dataset maître dédoublonné (data/master) les fichiers de collecte
+    pas encore intégrés; retourne le nombre d'articles ajoutés
+    """
+    try:
+        from compactor import MasterCompactor
+    except ImportError:
+        logger.warning("[Fusion] pyarrow non installe, dataset maitre non mis a jour")
+        return 0
+    
+    # Fermé à la fin: le planificateur tourne des jours, sans mmap ni fichier laissé ouvert
+    with MasterCompactor(
+        RAW_DIR, MASTER_DIR,
+        manifest_file=os.path.join(TRACKING_DIR, "compaction_manifest.json"),
+        hash_base=os.path.join(TRACKING_DIR, "master_hashes"),
+        parquet_dir=PARQUET_DIR,
+    ) as compactor:
+        added = compactor.run(datetime.now().strftime("%Y-%m-%d_%H%M%S"))
+    
+    logger.info(f"[Fusion] {added} articles ajoutes au dataset maitre")
+    return added
+
+# --------------------------
+# Collecte en processus (API réutilisable)
+# --------------------------
+@dataclass
+class RunConfig:
+    """Paramètres d'une collecte"""
+    hours_back: int = 24
+    sources: Tuple[str, ...] = ('rss', 'newsapi', 'twitter', 'reddit', 'scraping')
+    compact: bool = True          # Mise à jour du dataset maître à la fin
+    budget_seconds: Optional[float] = RUN_BUDGET_SECONDS   # None = pas d'échéance
+    interval_minutes: Optional[float] = None   # Intervalle du planning (None = inconnu)
+
+@dataclass
+class RunResult:
+    """Résultat structuré d'une collecte"""
+    started_at: str
+    duration_seconds: float = 0.0
+    by_source: Dict[str, int] = field(default_factory=dict)
+    timings: Dict[str, float] = field(default_factory=dict)
+    errors: Dict[str, str] = field(default_factory=dict)
+    total_hashes: int = 0
+    new_hashes: int = 0
+    url_duplicates: int = 0
+    master_added: int = 0
+    rss_http_cache: Dict = field(default_factory=dict)
+    rss_parse: Dict = field(default_factory=dict)   # Entrées lues, arrêts à la marque
+    skipped: Dict[str, List[str]] = field(default_factory=dict)   # Non traités faute de temps
+    http: Dict = field(default_factory=dict)      # Requêtes, connexions ouvertes, réutilisation
+    
+    @property
+    def total_new(self) -> int:
+        return sum(self.by_source.values())
+    
+    def to_dict(self) -> Dict:
+        return {
+            'total_new': self.total_new,
+            'by_source': self.by_source,
+            'timings': self.timings,
+            'errors': self.errors,
+            'duration_seconds': self.duration_seconds,
+            'total_hashes': self.total_hashes,
+            'new_hashes': self.new_hashes,
+            'url_duplicates': self.url_duplicates,
+            'master_added': self.master_added,
+            'rss_http_cache': self.rss_http_cache,
+            'rss_parse': self.rss_parse,
+            'skipped': self.skipped,
+            'http': self.http
+        }
+
+COLLECTORS = {
+    'rss': lambda config, budget: collect_rss(hours_back=config.hours_back, budget=budget,
+                                              interval_minutes=config.interval_minutes),
+    'newsapi': lambda config, budget: collect_newsapi(hours_back=config.hours_back, budget=budget),
+    'twitter': lambda config, budget: collect_twitter(hours_back=config.hours_back, budget=budget),
+    'reddit': lambda config, budget: collect_reddit(hours_back=config.hours_back, budget=budget),
+    'scraping': lambda config, budget: collect_scraping(budget=budget),
+}
+
+def run_once(config: Optional[RunConfig] = None) -> RunResult:
+    """
+    Exécute une collecte complète dans le processus courant. Le tracker, les
+    index et les sessions HTTP restent chargés d'un appel à l'autre: un
+    planificateur peut appeler run_once en boucle sans coût de démarrage.
+    Passé config.budget_seconds, les sources restantes sont sautées (et listées
+    dans result.skipped) au lieu de faire échouer toute la collecte.
+    new_hashes, url_duplicates et http ne comptent que cette exécution, même
+    si d'autres collectes tournent en parallèle dans le processus
+    """
+    config = config or RunConfig()
+    start = time.perf_counter()
+    budget = RunBudget(config.budget_seconds)
+    result = RunResult(started_at=datetime.now().isoformat())
+    collected = set()
+    
+    with tracker.counting() as counts, http_client.stats.track() as http_stats:
+        try:
+            for phase, source in enumerate(config.sources, 1):
+                result.by_source[source] = 0
+                result.timings[source] = 0.0
+                if budget.expired():
+                    budget.skip(source)
+                    continue
+                logger.info(f"[Collecte] Phase {phase}/{len(config.sources)}: {source}")
+                source_start = time.perf_counter()
+                collected.add(source)
+                try:
+                    result.by_source[source] = COLLECTORS[source](config, budget)
+                except Exception as e:
+                    # Une source en échec n'interrompt pas les suivantes
+                    logger.error(f"[Collecte] {source} en echec: {e}")
+                    result.errors[source] = str(e)
+                result.timings[source] = round(time.perf_counter() - source_start, 3)
             
-        json_files = [f for f in os.listdir(subdir_path) 
-                      if f.endswith('.json') and today in f]
-        
-        for file in sorted(json_files, reverse=True)[:1]:
-            try:
-                with open(os.path.join(subdir_path, file), 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    all_data.extend(data)
-            except Exception as e:
-                logger.error(f"Erreur lecture {file}: {e}")
-    
-    timestamp = datetime.now().strftime("%Y-%m-%d_%H%M")
-    save_data(all_data, os.path.join(RAW_DIR, "combined", f"all_sources_{timestamp}"))
-    
-    logger.info(f"[Fusion] Total: {len(all_data)} articles combines")
-    return all_data
+            # Compaction incrémentale: si le temps manque, la suivante rattrapera
+            if config.compact and budget.expired():
+                budget.skip('compaction')
+            elif config.compact:
+                compact_start = time.perf_counter()
+                result.master_added = combine_all_sources()
+                result.timings['compaction'] = round(time.perf_counter() - compact_start, 3)
+        finally:
+            # Toujours persister ce qui a été collecté, même après une interruption
+            tracker.save_tracking()
+            story_index.save()
+    
+    result.skipped = budget.skipped
+    result.http = http_stats.summary()
+    if result.http['requests']:
+        logger.info(f"[HTTP] {result.http['requests']} requetes, {result.http['connections']} connexions "
+                    f"ouvertes (reutilisation {result.http['reuse_ratio']:.0%})")
+    result.total_hashes = len(tracker)
+    result.new_hashes = counts['new_hashes']
+    result.url_duplicates = counts['url_duplicates']
+    if 'rss' in collected:
+        # Compteurs remis à zéro par collect_rss: seulement si le RSS a tourné
+        result.rss_http_cache = feed_validators.summary()
+        result.rss_parse = feed_marks.summary()
+    result.duration_seconds = round(time.perf_counter() - start, 3)
+    
+    tracker.save_collection_stats({**result.to_dict(), 'hours_back': config.hours_back})
+    return result
 
 # --------------------------
 # Exécution principale
@@ -633,78 +1112,41 @@ if __name__ == "__main__":
     
     HOURS_BACK = 24
     
-    start_time = datetime.now()
-    stats = {"new": {}, "skipped": 0}
-    
-    initial_hash_count = len(tracker.known_hashes)
-    
-    print(f"Hashes connus: {initial_hash_count:,}")
+    print(f"Hashes connus: {len(tracker):,}")
     print(f"Periode de collecte: {HOURS_BACK} dernieres heures\n")
     
-    # Collecte
-    print("\nPhase 1/5: RSS")
-    print("-" * 80)
-    rss_data = collect_rss(hours_back=HOURS_BACK)
-    stats["new"]["rss"] = len(rss_data)
-    
-    print("\nPhase 2/5: NewsAPI")
-    print("-" * 80)
-    newsapi_data = collect_newsapi(hours_back=HOURS_BACK)
-    stats["new"]["newsapi"] = len(newsapi_data)
+    result = run_once(RunConfig(hours_back=HOURS_BACK))
     
-    print("\nPhase 3/5: Twitter")
-    print("-" * 80)
-    twitter_data = collect_twitter(hours_back=HOURS_BACK)
-    stats["new"]["twitter"] = len(twitter_data)
-    
-    print("\nPhase 4/5: Reddit")
-    print("-" * 80)
-    reddit_data = collect_reddit(hours_back=HOURS_BACK)
-    stats["new"]["reddit"] = len(reddit_data)
-    
-    print("\nPhase 5/5: Scraping")
-    print("-" * 80)
-    scraping_data = collect_scraping()
-    stats["new"]["scraping"] = len(scraping_data)
-    
-    print("\nFusion finale")
-    print("-" * 80)
-    combined_data = combine_all_sources()
-    
-    tracker.save_tracking()
-    
-    final_hash_count = len(tracker.known_hashes)
-    new_hashes_added = final_hash_count - initial_hash_count
-    
-    stats["skipped"] = sum(stats["new"].values()) - new_hashes_added if new_hashes_added < sum(stats["new"].values()) else 0
-    
-    duration = (datetime.now() - start_time).total_seconds()
-    total_new = sum(stats["new"].values())
+    total_new = result.total_new
+    skipped = total_new - result.new_hashes if result.new_hashes < total_new else 0
+    duration = result.duration_seconds
     
     print("\n" + "="*80)
     print("COLLECTE TERMINEE")
     print("="*80)
     print(f"Duree: {duration:.1f}s ({duration/60:.1f} min)")
     print(f"Nouveaux: {total_new:,} elements")
-    print(f"Total hashes: {final_hash_count:,} (+{new_hashes_added:,})")
-    print(f"Doublons evites: {stats['skipped']:,}\n")
+    print(f"Total hashes: {result.total_hashes:,} (+{result.new_hashes:,})")
+    print(f"Doublons evites: {skipped:,}")
+    print(f"Doublons detectes par URL canonique: {result.url_duplicates:,}")
+    if result.rss_parse:
+        print(f"Cache HTTP RSS: {feed_validators.hits:,} inchanges (304) / {feed_validators.misses:,} telecharges")
+        print(f"Parsing RSS: {result.rss_parse['parsed_entries']:,} entrees lues, "
+              f"{result.rss_parse['early_stops']:,} feeds arretes a leur marque")
+    print(f"Connexions HTTP: {result.http['connections']:,} ouvertes pour {result.http['requests']:,} requetes "
+          f"(reutilisation {result.http['reuse_ratio']:.0%})\n")
     
     print("Details par source:")
     print("-" * 80)
-    for source, count in sorted(stats["new"].items(), key=lambda x: x[1], reverse=True):
+    for source, count in sorted(result.by_source.items(), key=lambda x: x[1], reverse=True):
         percentage = (count / total_new * 100) if total_new > 0 else 0
-        print(f"   {source.upper():15s} : {count:6,} ({percentage:5.1f}%)")
+        print(f"   {source.upper():15s} : {count:6,} ({percentage:5.1f}%) en {result.timings[source]:.1f}s")
+    for source, items in result.skipped.items():
+        print(f"   {source.upper():15s} : {len(items)} non traite(s), budget epuise")
     
     print("\n" + "="*80)
     print("Donnees pretes!")
     print(f"Raw: {RAW_DIR}")
+    print(f"Maitre: {MASTER_DIR} (+{result.master_added:,})")
     print(f"Tracking: {TRACKING_DIR}")
     print("="*80 + "\n")
-    
-    tracker.save_collection_stats({
-        'total_new': total_new,
-        'by_source': stats["new"],
-        'duration_seconds': duration,
-        'hours_back': HOURS_BACK,
-        'total_hashes': final_hash_count
-    })
\ No newline at end of file
@@ -0,0 +1,209 @@
+"""
+Compaction incrémentale des collectes dans un dataset maître dédoublonné
+Chaque exécution ne lit que les fichiers de collecte pas encore intégrés
+(data/raw/<source>/*.json ou *.jsonl.gz et les fichiers du dataset data/parquet), écarte
+les articles déjà présents dans le maître et ajoute le reste à
+data/master, partitionné comme le dataset Parquet:
+    data/master/source_type=rss/collection_date=2025-10-22/<exécution>-0.parquet
+
+Le manifeste (data/tracking/compaction_manifest.json) retient pour chaque
+fichier intégré sa taille et sa date de modification: un fichier modifié
+(ex: pointeur Git LFS remplacé par les vraies données) est relu.
+Les hashes du maître sont conservés sans expiration dans un HashStore.
+Ordre d'écriture, à chaque lot de WRITE_BATCH enregistrements: données, puis
+hashes, puis manifeste (fichiers entièrement intégrés jusque-là). Après un
+crash, seuls les fichiers du lot en cours sont relus; un crash entre
+l'écriture d'un lot et la sauvegarde de ses hashes peut encore dupliquer ce
+seul lot dans le maître
+"""
+
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import pyarrow.parquet as pq
+
+from hash_store import HashStore
+from jsonl_sink import EXTENSION as JSONL_EXTENSION, collection_time, read_records
+from parquet_store import write_partitioned
+
+logger = logging.getLogger(__name__)
+
+SOURCES = ['rss', 'twitter', 'reddit', 'scraping', 'newsapi']
+WRITE_BATCH = 50_000   # Enregistrements accumulés avant écriture dans le maître
+
+
+def record_hash(record: Dict) -> str:
+    """Hash de contenu de l'enregistrement (recalculé pour les anciens fichiers qui n'en ont pas)"""
+    if record.get('content_hash'):
+        return record['content_hash']
+    link = record.get('link') or record.get('url') or ""
+    return hashlib.md5(((record.get('title') or "") + link).encode('utf-8')).hexdigest()
+
+
+def _partition_values(path: str) -> Dict[str, str]:
+    """Colonnes de partition encodées dans le chemin (source_type=rss/collection_date=...)"""
+    values = {}
+    for part in path.replace(os.sep, '/').split('/'):
+        if '=' in part:
+            key, value = part.split('=', 1)
+            values[key] = value
+    return values
+
+
+class MasterCompactor:
+    """Intègre les nouveaux fichiers de collecte au dataset maître"""
+
+    def __init__(self, raw_dir: str, master_dir: str, manifest_file: str, hash_base: str,
+                 parquet_dir: Optional[str] = None, sources=SOURCES):
+        self.raw_dir = raw_dir
+        self.master_dir = master_dir
+        self.manifest_file = manifest_file
+        self.parquet_dir = parquet_dir
+        self.sources = sources
+        self.known = HashStore(hash_base)
+        self.files: Dict[str, Dict] = {}
+        self.load()
+
+    def __enter__(self) -> "MasterCompactor":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        """Libère le HashStore du maître (mmap et fichiers), même après une erreur"""
+        self.known.close()
+
+    # --------------------------
+    # Manifeste
+    # --------------------------
+    def load(self):
+        if not os.path.exists(self.manifest_file):
+            return
+        try:
+            with open(self.manifest_file, 'r', encoding='utf-8') as f:
+                self.files = json.load(f).get('files', {})
+        except (ValueError, OSError) as e:
+            logger.error(f"[Compaction] Manifeste illisible, reconstruction: {e}")
+            self.files = {}
+
+    def save(self):
+        tmp_file = self.manifest_file + ".tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump({'last_run': datetime.now().isoformat(), 'files': self.files}, f, indent=2)
+        os.replace(tmp_file, self.manifest_file)
+
+    # --------------------------
+    # Fichiers à intégrer
+    # --------------------------
+    def _candidates(self) -> Iterator[Tuple[str, str]]:
+        """(clé du manifeste, chemin) de tous les fichiers de collecte"""
+        for source in self.sources:
+            directory = os.path.join(self.raw_dir, source)
+            if not os.path.isdir(directory):
+                continue
+            for name in os.listdir(directory):
+                if name.endswith(('.json', JSONL_EXTENSION)):
+                    yield f"raw/{source}/{name}", os.path.join(directory, name)
+
+        if self.parquet_dir and os.path.isdir(self.parquet_dir):
+            for root, _, names in os.walk(self.parquet_dir):
+                for name in names:
+                    if name.endswith('.parquet'):
+                        path = os.path.join(root, name)
+                        relative = os.path.relpath(path, self.parquet_dir).replace(os.sep, '/')
+                        yield f"parquet/{relative}", path
+
+    def pending_files(self) -> List[Tuple[str, str, Dict]]:
+        """Fichiers absents du manifeste ou modifiés depuis leur intégration"""
+        pending = []
+        for key, path in self._candidates():
+            stat = os.stat(path)
+            signature = {'size': stat.st_size, 'mtime': int(stat.st_mtime)}
+            entry = self.files.get(key)
+            if entry and entry['size'] == signature['size'] and entry['mtime'] == signature['mtime']:
+                continue
+            pending.append((key, path, signature))
+        # Ordre chronologique de collecte, toutes sources confondues
+        pending.sort(key=lambda p: (collection_time(p[1]), os.path.basename(p[1])))
+        return pending
+
+    @staticmethod
+    def read_file(path: str) -> Optional[List[Dict]]:
+        """Enregistrements d'un fichier de collecte (None si illisible, ex: pointeur Git LFS)"""
+        if path.endswith('.parquet'):
+            try:
+                records = pq.read_table(path).to_pylist()
+            except OSError:
+                return None
+            partition = _partition_values(path)
+            for record in records:
+                record.update(partition)
+            return records
+        if path.endswith(JSONL_EXTENSION):
+            return list(read_records(path))
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (ValueError, UnicodeDecodeError):
+            return None
+        return data if isinstance(data, list) else None
+
+    # --------------------------
+    # Compaction
+    # --------------------------
+    def _commit(self, done: List[Tuple[str, str, Dict]]):
+        """Hashes puis manifeste des fichiers dont les articles sont écrits dans le maître"""
+        self.known.flush()
+        for key, _, signature in done:
+            self.files[key] = signature
+        if done:
+            self.save()
+
+    def run(self, run_id: str) -> int:
+        """Intègre les fichiers en attente; retourne le nombre d'enregistrements ajoutés au maître"""
+        pending = self.pending_files()
+        new_records = []
+        done = []      # Fichiers lus dont les articles ne sont pas encore tous écrits
+        added = duplicates = unreadable = batches = 0
+
+        for key, path, signature in pending:
+            done.append((key, path, signature))
+            records = self.read_file(path)
+            if records is None:
+                unreadable += 1
+                signature['unreadable'] = True
+                continue
+            source = key.split('/')[1] if key.startswith('raw/') else None
+            for record in records:
+                content_hash = record_hash(record)
+                if not self.known.add(content_hash):
+                    duplicates += 1
+                    continue
+                record['content_hash'] = content_hash
+                if source:
+                    record.setdefault('source_type', source)
+                new_records.append(record)
+            signature['rows'] = len(records)
+
+            # Écriture par lots: la mémoire reste bornée même au premier passage sur tout l'historique
+            if len(new_records) >= WRITE_BATCH:
+                write_partitioned(new_records, self.master_dir, f"{run_id}-{batches}")
+                added += len(new_records)
+                batches += 1
+                new_records = []
+                self._commit(done)
+                done = []
+
+        if new_records:
+            write_partitioned(new_records, self.master_dir, f"{run_id}-{batches}")
+            added += len(new_records)
+        self._commit(done)
+
+        logger.info(f"[Compaction] {len(pending)} fichiers lus, {added} articles ajoutes, "
+                    f"{duplicates} doublons ecartes, {unreadable} illisibles")
+        return added
@@ -7,12 +7,11 @@ Version corrigée pour Windows avec gestion des chemins
 import schedule
 import time
 from datetime import datetime
-import subprocess
 import sys
 import json
 import os
 import logging
-import re
+import threading
 
 # --------------------------
 # Configuration UTF-8 pour Windows
@@ -49,6 +48,18 @@ logger = logging.getLogger(__name__)
 # Configuration
 # --------------------------
 COLLECT_INTERVAL_HOURS = 6  # Intervalle entre chaque collecte (6h recommandé)
+COLLECT_HOURS_BACK = 24     # Fenêtre temporelle de chaque collecte
+RUN_BUDGET_MINUTES = 30     # Durée max d'une collecte (ce qui est collecté est gardé)
+
+# Planning par source (minutes): chaque collecteur tourne à son rythme, en
+# parallèle des autres. NewsAPI: None = quota quotidien réparti sur la journée
+SOURCE_INTERVALS_MINUTES = {
+    'rss': 15,
+    'reddit': 30,
+    'scraping': 60,
+    'newsapi': None,
+}
+COMPACTION_INTERVAL_MINUTES = 60   # Mise à jour du dataset maître
 
 # --------------------------
 # Statistiques de session
@@ -56,6 +67,7 @@ COLLECT_INTERVAL_HOURS = 6  # Intervalle entre chaque collecte (6h recommandé)
 class SessionStats:
     def __init__(self):
         self.stats_file = os.path.join(TRACKING_DIR, "session_stats.json")
+        self._lock = threading.Lock()  # Collectes par source terminées en parallèle
         self.load_stats()
     
     def load_stats(self):
@@ -76,13 +88,22 @@ class SessionStats:
             'runs': []
         }
     
-    def add_run(self, new_data_count: int, duration: float):
+    def add_run(self, new_data_count: int, duration: float, by_source=None, timings=None, errors=None,
+                skipped=None):
+        with self._lock:
+            self._add_run(new_data_count, duration, by_source, timings, errors, skipped)
+    
+    def _add_run(self, new_data_count, duration, by_source, timings, errors, skipped):
         self.stats['total_runs'] += 1
         self.stats['total_collected'] += new_data_count
         self.stats['runs'].append({
             'timestamp': datetime.now().isoformat(),
             'new_data': new_data_count,
-            'duration_seconds': duration
+            'duration_seconds': duration,
+            'by_source': by_source or {},
+            'timings': timings or {},
+            'errors': errors or {},
+            'skipped': skipped or {}
         })
         
         # Garder seulement les 100 dernières exécutions
@@ -118,139 +139,163 @@ session_stats = SessionStats()
 # --------------------------
 # Fonction de collecte
 # --------------------------
-def run_collection():
-    """Exécute le script de collecte"""
+def run_collection(sources=None, compact: bool = True, budget_minutes: float = RUN_BUDGET_MINUTES,
+                   interval_minutes: float = COLLECT_INTERVAL_HOURS * 60):
+    """
+    Exécute une collecte dans le processus courant (collecteur chargé une seule
+    fois); toutes les sources par défaut, sinon seulement celles demandées.
+    Passé budget_minutes, la collecte s'arrête proprement et garde ses résultats.
+    interval_minutes: délai avant la prochaine collecte de ces sources
+    """
     logger.info("\n" + "="*80)
-    logger.info("DEMARRAGE DE LA COLLECTE")
+    logger.info(f"DEMARRAGE DE LA COLLECTE ({', '.join(sources) if sources else 'toutes les sources'})")
     logger.info("="*80)
     
     start_time = time.time()
     
     try:
-        # Trouver le chemin du script de collecte
-        collector_script = os.path.join(SCRIPT_DIR, "collect_data_tracking.py")
-        
-        # Vérifier que le fichier existe
-        if not os.path.exists(collector_script):
-            logger.error(f"ERREUR: Fichier introuvable: {collector_script}")
-            logger.error("Assurez-vous que collect_data_tracking.py est dans le meme dossier")
-            logger.error(f"Dossier actuel: {SCRIPT_DIR}")
-            try:
-                logger.error(f"Fichiers disponibles: {os.listdir(SCRIPT_DIR)}")
-            except:
-                pass
-            return
-        
-        logger.info(f"Execution: {collector_script}")
+        # Import au premier appel seulement: tracker, index et sessions HTTP
+        # restent chargés pour les collectes suivantes
+        import collect_data_tracking as collector
         
-        # Exécuter le script de collecte depuis le bon dossier
-        result = subprocess.run(
-            [sys.executable, collector_script],
-            capture_output=True,
-            text=True,
-            cwd=SCRIPT_DIR,  # Important: définir le working directory
-            timeout=1800,  # 30 minutes max
-            encoding='utf-8',
-            errors='replace'
-        )
+        config = collector.RunConfig(hours_back=COLLECT_HOURS_BACK, compact=compact,
+                                     budget_seconds=budget_minutes * 60,
+                                     interval_minutes=interval_minutes)
+        if sources:
+            config.sources = tuple(sources)
+        result = collector.run_once(config)
         
-        duration = time.time() - start_time
+        session_stats.add_run(result.total_new, result.duration_seconds,
+                              by_source=result.by_source, timings=result.timings,
+                              errors=result.errors, skipped=result.skipped)
         
-        # Parser la sortie pour extraire le nombre de nouvelles données
-        new_data_count = 0
-        
-        # Chercher "Nouveaux: XXX elements"
-        for line in result.stdout.split('\n'):
-            # Pattern: "Nouveaux: 123 elements" ou "Total: 123"
-            if "Nouveaux:" in line:
-                try:
-                    numbers = re.findall(r'Nouveaux:\s*(\d+)', line)
-                    if numbers:
-                        new_data_count = int(numbers[0])
-                        break
-                except:
-                    pass
-            elif "Total hashes:" in line and "+(" in line:
-                # Pattern: "Total hashes: 1,234 (+123)"
-                try:
-                    numbers = re.findall(r'\+(\d+)', line)
-                    if numbers:
-                        new_data_count = int(numbers[0])
-                        break
-                except:
-                    pass
-        
-        # Enregistrer les stats
-        session_stats.add_run(new_data_count, duration)
-        
-        logger.info(f"\nCollecte terminee: {new_data_count} nouvelles donnees en {duration:.1f}s")
-        
-        # Afficher les dernières lignes de sortie (résumé)
-        output_lines = result.stdout.split('\n')
+        logger.info(f"\nCollecte terminee: {result.total_new} nouvelles donnees en {result.duration_seconds:.1f}s")
         logger.info("\nResultat de la collecte:")
         logger.info("-" * 80)
+        for source, count in result.by_source.items():
+            logger.info(f"   {source.upper():15s} : {count:6,} en {result.timings[source]:.1f}s")
+        logger.info(f"   Hashes: {result.total_hashes:,} (+{result.new_hashes:,}), "
+                    f"maitre: +{result.master_added:,}")
+        if result.http.get('requests'):
+            logger.info(f"   HTTP: {result.http['requests']} requetes, {result.http['connections']} connexions "
+                        f"(reutilisation {result.http['reuse_ratio']:.0%})")
         
-        # Afficher les 30 dernières lignes non vides
-        relevant_lines = [line for line in output_lines if line.strip()][-30:]
-        for line in relevant_lines:
-            logger.info(line)
-        
-        if result.returncode != 0:
-            logger.error(f"\nErreurs detectees (code: {result.returncode}):")
-            stderr_lines = [line for line in result.stderr.split('\n') if line.strip()]
-            for line in stderr_lines[-20:]:  # 20 dernières lignes d'erreur
-                logger.error(line)
+        for source, error in result.errors.items():
+            logger.error(f"Erreur {source}: {error}")
+        for source, items in result.skipped.items():
+            logger.warning(f"Budget epuise, {source}: {len(items)} non traite(s)")
         
         # Afficher le résumé de session
         logger.info("\n" + session_stats.get_summary())
         
-    except subprocess.TimeoutExpired:
-        logger.error("ERREUR: La collecte a pris plus de 30 minutes")
-        duration = time.time() - start_time
-        session_stats.add_run(0, duration)
-    except FileNotFoundError as e:
-        logger.error(f"ERREUR: Fichier non trouve: {e}")
     except Exception as e:
         logger.error(f"ERREUR lors de la collecte: {e}")
         import traceback
         logger.error(traceback.format_exc())
+        session_stats.add_run(0, time.time() - start_time, errors={'run': str(e)})
     
     logger.info("="*80 + "\n")
 
 # --------------------------
 # Planification
 # --------------------------
-def schedule_collections():
-    """Configure le planning de collecte"""
+def newsapi_interval_minutes() -> int:
+    """Intervalle qui répartit le quota quotidien NewsAPI uniformément sur 24h"""
+    import collect_data_tracking as collector
+    runs_per_day = max(1, collector.NEWSAPI_DAILY_QUOTA // collector.NEWSAPI_REQUESTS_PER_RUN)
+    return -(-24 * 60 // runs_per_day)
+
+_job_locks = {}
+_job_threads = []
+
+def launch(name: str, target, *args):
+    """
+    Lance une tâche dans son propre thread; si l'exécution précédente de la
+    même tâche n'est pas terminée, ce tour est sauté (pas de chevauchement)
+    """
+    lock = _job_locks.setdefault(name, threading.Lock())
+    if not lock.acquire(blocking=False):
+        logger.warning(f"[Planning] {name}: execution precedente encore en cours, tour saute")
+        return
     
-    logger.info("\n" + "="*70)
-    logger.info("         COLLECTEUR CONTINU DE DONNEES - DEMARRE")
-    logger.info("="*70 + "\n")
+    def worker():
+        try:
+            target(*args)
+        except Exception as e:
+            logger.error(f"[Planning] {name}: {e}")
+        finally:
+            lock.release()
     
+    thread = threading.Thread(target=worker, name=f"collecte-{name}")
+    _job_threads[:] = [t for t in _job_threads if t.is_alive()] + [thread]
+    thread.start()
+
+def run_compaction():
+    import collect_data_tracking as collector
+    added = collector.combine_all_sources()
+    logger.info(f"[Planning] Compaction: {added} articles ajoutes au dataset maitre")
+
+def schedule_pipeline():
+    """Ancien mode: toutes les sources en un seul bloc toutes les N heures"""
     logger.info(f"Intervalle configure: toutes les {COLLECT_INTERVAL_HOURS} heures")
-    logger.info(f"Dossier de travail: {SCRIPT_DIR}")
-    logger.info(f"Dossier projet: {PROJECT_ROOT}")
-    logger.info(f"Logs: {os.path.join(TRACKING_DIR, 'collector_log.txt')}")
-    logger.info(f"Stats: {os.path.join(TRACKING_DIR, 'session_stats.json')}\n")
     
     # Exécuter immédiatement la première collecte
     logger.info("Premiere collecte (immediate)...\n")
-    run_collection()
+    interval_minutes = COLLECT_INTERVAL_HOURS * 60
+    run_collection(interval_minutes=interval_minutes)
     
     # Planifier les collectes suivantes
-    schedule.every(COLLECT_INTERVAL_HOURS).hours.do(run_collection)
+    schedule.every(COLLECT_INTERVAL_HOURS).hours.do(run_collection, interval_minutes=interval_minutes)
     
     next_run = datetime.now().replace(microsecond=0) + timedelta(hours=COLLECT_INTERVAL_HOURS)
     logger.info(f"\nProchaine collecte: {next_run.strftime('%Y-%m-%d %H:%M:%S')}")
+
+def schedule_sources():
+    """Un planning par source, exécutées en parallèle avec un tracker partagé"""
+    intervals = dict(SOURCE_INTERVALS_MINUTES)
+    if 'newsapi' in intervals and intervals['newsapi'] is None:
+        intervals['newsapi'] = newsapi_interval_minutes()
+    
+    for source, minutes in intervals.items():
+        logger.info(f"[Planning] {source:10s}: toutes les {minutes} min")
+        # Une collecte doit finir avant la suivante de la même source
+        budget = min(minutes, RUN_BUDGET_MINUTES)
+        launch(source, run_collection, (source,), False, budget, minutes)
+        schedule.every(minutes).minutes.do(launch, source, run_collection, (source,), False, budget, minutes)
+    
+    logger.info(f"[Planning] {'compaction':10s}: toutes les {COMPACTION_INTERVAL_MINUTES} min")
+    schedule.every(COMPACTION_INTERVAL_MINUTES).minutes.do(launch, 'compaction', run_compaction)
+
+def schedule_collections(pipeline: bool = False):
+    """Configure le planning de collecte"""
+    
+    logger.info("\n" + "="*70)
+    logger.info("         COLLECTEUR CONTINU DE DONNEES - DEMARRE")
+    logger.info("="*70 + "\n")
+    
+    logger.info(f"Dossier de travail: {SCRIPT_DIR}")
+    logger.info(f"Dossier projet: {PROJECT_ROOT}")
+    logger.info(f"Logs: {os.path.join(TRACKING_DIR, 'collector_log.txt')}")
+    logger.info(f"Stats: {os.path.join(TRACKING_DIR, 'session_stats.json')}\n")
+    
+    if pipeline:
+        schedule_pipeline()
+    else:
+        schedule_sources()
     logger.info("Le collecteur tourne en continu. Appuyez sur Ctrl+C pour arreter.\n")
     
     # Boucle infinie
     try:
         while True:
             schedule.run_pending()
-            time.sleep(60)  # Vérifier toutes les minutes
+            time.sleep(30)  # Granularité suffisante pour des intervalles de 15 min
     except KeyboardInterrupt:
         logger.info("\n\nArret du collecteur...")
+        # Les collectes en cours finissent proprement (fichiers finalisés, hashes sauvegardés)
+        for thread in _job_threads:
+            if thread.is_alive():
+                logger.info(f"Attente de {thread.name}...")
+                thread.join()
         logger.info(session_stats.get_summary())
         logger.info("Au revoir!\n")
 
@@ -267,6 +312,8 @@ def show_stats():
         for run in session_stats.stats['runs'][-5:]:
             timestamp = datetime.fromisoformat(run['timestamp']).strftime('%Y-%m-%d %H:%M')
             print(f"  {timestamp} -> {run['new_data']:4d} nouvelles donnees ({run['duration_seconds']:.1f}s)")
+            for source, count in run.get('by_source', {}).items():
+                print(f"      {source:10s} {count:5d} ({run.get('timings', {}).get(source, 0):.1f}s)")
 
 def reset_stats():
     """Réinitialise les statistiques"""
@@ -285,7 +332,11 @@ if __name__ == "__main__":
     parser.add_argument('--stats', action='store_true', help='Afficher les statistiques')
     parser.add_argument('--reset', action='store_true', help='Reinitialiser les statistiques')
     parser.add_argument('--once', action='store_true', help='Executer une seule collecte')
-    parser.add_argument('--interval', type=int, default=6, help='Intervalle en heures (defaut: 6)')
+    parser.add_argument('--interval', type=int, default=6, help='Intervalle en heures du mode --pipeline (defaut: 6)')
+    parser.add_argument('--pipeline', action='store_true',
+                        help='Toutes les sources en un seul bloc (ancien mode) au lieu d\'un planning par source')
+    parser.add_argument('--every', action='append', default=[], metavar='SOURCE=MINUTES',
+                        help='Intervalle d\'une source, ex: --every rss=10 (repetable)')
     
     args = parser.parse_args()
     
@@ -297,4 +348,7 @@ if __name__ == "__main__":
         run_collection()
     else:
         COLLECT_INTERVAL_HOURS = args.interval
-        schedule_collections()
\ No newline at end of file
+        for override in args.every:
+            source, minutes = override.split('=', 1)
+            SOURCE_INTERVALS_MINUTES[source] = int(minutes)
+        schedule_collections(pipeline=args.pipeline)
\ No newline at end of file
@@ -0,0 +1,136 @@
+"""
+Index de dédoublonnage concurrent
+Fournit une opération atomique check_and_add (vérifier + enregistrer en une
+seule étape) pour que deux workers ne puissent pas accepter le même article:
+  - StripedDedupIndex : entre threads, verrous répartis par digest (lock striping)
+  - SqliteHashSet     : entre processus ou machines (fichier partagé), base SQLite
+"""
+
+import sqlite3
+import threading
+import time
+from contextlib import ExitStack
+from typing import Iterable, Optional
+
+from hash_store import TTL_DAYS, to_digest
+
+DEFAULT_STRIPES = 64
+
+
+class StripedDedupIndex:
+    """
+    Enveloppe un ensemble de hashes (GenerationalHashStore, set...) et rend
+    check_and_add atomique entre threads; deux digests différents ne
+    prennent en général pas le même verrou et ne se bloquent donc pas
+    """
+
+    def __init__(self, store, stripes: int = DEFAULT_STRIPES):
+        self.store = store
+        self.stripes = stripes
+        self._locks = [threading.Lock() for _ in range(stripes)]
+
+    def check_and_add(self, content_hash) -> bool:
+        """Enregistre le hash et retourne True s'il était nouveau, False sinon"""
+        # hash() est stable dans un processus, c'est tout ce qu'il faut pour choisir le verrou
+        with self._locks[hash(content_hash) % self.stripes]:
+            if content_hash in self.store:
+                return False
+            self.store.add(content_hash)
+            return True
+
+    def __contains__(self, content_hash) -> bool:
+        return content_hash in self.store
+
+    def __len__(self) -> int:
+        return len(self.store)
+
+    def locked(self, *keys) -> ExitStack:
+        """
+        Prend les verrous de plusieurs clés (hash de contenu + clé d'URL par
+        exemple), toujours dans le même ordre pour éviter les interblocages
+        """
+        stack = ExitStack()
+        for stripe in sorted({hash(key) % self.stripes for key in keys if key}):
+            stack.enter_context(self._locks[stripe])
+        return stack
+
+    def exclusive(self) -> ExitStack:
+        """Prend tous les verrous (flush, compaction) pendant le bloc with"""
+        stack = ExitStack()
+        for lock in self._locks:
+            stack.enter_context(lock)
+        return stack
+
+
+class SqliteHashSet:
+    """
+    Ensemble de hashes partagé par plusieurs workers via une base SQLite
+    (mode WAL). add() est un INSERT OR IGNORE: l'insertion et le test de
+    présence ne font qu'une opération atomique, même entre processus.
+    Même interface que GenerationalHashStore pour le DataTracker; plusieurs
+    ensembles (hashes de contenu, clés d'URL) peuvent partager la même base
+    """
+
+    def __init__(self, db_file: str, table: str = "hashes", ttl_days: int = TTL_DAYS,
+                 busy_timeout: float = 30.0):
+        self.db_file = db_file
+        self.table = table
+        self.ttl_seconds = ttl_days * 86400
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(db_file, timeout=busy_timeout, check_same_thread=False,
+                                   isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(f"CREATE TABLE IF NOT EXISTS {table} "
+                         "(digest BLOB PRIMARY KEY, first_seen INTEGER NOT NULL) WITHOUT ROWID")
+        self._db.execute(f"CREATE INDEX IF NOT EXISTS {table}_first_seen ON {table} (first_seen)")
+
+    def __contains__(self, content_hash) -> bool:
+        with self._lock:
+            row = self._db.execute(f"SELECT 1 FROM {self.table} WHERE digest = ?",
+                                   (to_digest(content_hash),)).fetchone()
+        return row is not None
+
+    def add(self, content_hash, first_seen: Optional[float] = None) -> bool:
+        """Ajoute un hash; retourne False s'il était déjà connu (d'un worker quelconque)"""
+        first_seen = int(time.time() if first_seen is None else first_seen)
+        with self._lock:
+            cursor = self._db.execute(f"INSERT OR IGNORE INTO {self.table} VALUES (?, ?)",
+                                      (to_digest(content_hash), first_seen))
+        return cursor.rowcount == 1
+
+    def add_many(self, content_hashes: Iterable, first_seen: Optional[float] = None) -> int:
+        """Ajoute un lot de hashes en une transaction; retourne le nombre de nouveaux"""
+        first_seen = int(time.time() if first_seen is None else first_seen)
+        with self._lock:
+            before = self._db.total_changes
+            self._db.execute("BEGIN IMMEDIATE")
+            self._db.executemany(f"INSERT OR IGNORE INTO {self.table} VALUES (?, ?)",
+                                 ((to_digest(h), first_seen) for h in content_hashes))
+            self._db.execute("COMMIT")
+            return self._db.total_changes - before
+
+    def seed_from(self, store) -> int:
+        """
+        Reprend le contenu d'un GenerationalHashStore local (première mise en
+        place du mode partagé); la date de chaque génération sert de première vue
+        """
+        return sum(self.add_many(iter(generation), first_seen=start)
+                   for start, generation in store.generations.items())
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+    def evict_expired(self, now: Optional[float] = None) -> int:
+        cutoff = int((now or time.time()) - self.ttl_seconds)
+        with self._lock:
+            cursor = self._db.execute(f"DELETE FROM {self.table} WHERE first_seen < ?", (cutoff,))
+        return cursor.rowcount
+
+    def flush(self, now: Optional[float] = None):
+        """Chaque ajout est déjà validé: il ne reste qu'à purger les hashes expirés"""
+        self.evict_expired(now)
+
+    def close(self):
+        self._db.close()
@@ -0,0 +1,146 @@
+"""
+Rapport de dédoublonnage par URL canonique sur les archives data/raw
+Rejoue les fichiers JSON / JSONL dans l'ordre chronologique comme le ferait le
+DataTracker et compte, par type de source, les articles que le hash
+titre + lien laissait passer mais que l'URL canonique identifie comme doublons
+
+Usage:
+    python dedup_report.py
+    python dedup_report.py --raw-dir ../data/raw --sources rss newsapi
+    python dedup_report.py --start 2025-10-20 --end 2025-10-26   (via le catalogue)
+"""
+
+import argparse
+import hashlib
+import json
+import os
+from collections import defaultdict
+
+from jsonl_sink import EXTENSION as JSONL_EXTENSION, collection_time, read_records
+from raw_catalog import RawCatalog
+from url_canonical import url_key
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+RAW_DIR = os.path.join(PROJECT_ROOT, "data", "raw")
+CATALOG_FILE = os.path.join(PROJECT_ROOT, "data", "tracking", "raw_catalog.sqlite")
+
+SOURCES = ['rss', 'newsapi', 'reddit', 'scraping', 'twitter']
+
+
+def load_records(path: str):
+    """Enregistrements d'un fichier de collecte (None si illisible, ex: pointeur Git LFS)"""
+    if path.endswith(JSONL_EXTENSION):
+        return list(read_records(path))
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (ValueError, UnicodeDecodeError):
+        return None
+    return data if isinstance(data, list) else None
+
+
+def record_link(record: dict) -> str:
+    return record.get('link') or record.get('url') or ""
+
+
+def record_hash(record: dict) -> str:
+    if record.get('content_hash'):
+        return record['content_hash']
+    text = (record.get('title') or "") + record_link(record)
+    return hashlib.md5(text.encode('utf-8')).hexdigest()
+
+
+def list_files(raw_dir: str, sources):
+    files = []
+    for source in sources:
+        directory = os.path.join(raw_dir, source)
+        if os.path.isdir(directory):
+            files += [(name, source, os.path.join(directory, name))
+                      for name in os.listdir(directory) if name.endswith(('.json', JSONL_EXTENSION))]
+    return files
+
+
+def catalog_files(catalog: RawCatalog, sources, start, end):
+    """Seuls les fichiers dont les dates de publication recoupent la période sont ouverts"""
+    files = []
+    for source in sources:
+        for entry in catalog.files(source_type=source, start=start, end=end,
+                                   formats=['json', JSONL_EXTENSION.lstrip('.')]):
+            files.append((entry['path'].rsplit('/', 1)[-1], source, catalog.absolute(entry['path'])))
+    return files
+
+
+def build_report(raw_dir: str, sources, files=None):
+    """Rejoue les archives et retourne les compteurs par type de source"""
+    if files is None:
+        files = list_files(raw_dir, sources)
+
+    known_hashes, known_urls = set(), set()
+    report = defaultdict(lambda: defaultdict(int))
+    unreadable = 0
+
+    # Ordre chronologique de collecte, toutes sources confondues
+    for name, source, path in sorted(files, key=lambda f: (collection_time(f[2]), f[0])):
+        records = load_records(path)
+        if records is None:
+            unreadable += 1
+            continue
+        counts = report[source]
+        counts['files'] += 1
+        for record in records:
+            counts['rows'] += 1
+            content_hash = record_hash(record)
+            if content_hash in known_hashes:
+                counts['hash_duplicates'] += 1
+                continue
+            known_hashes.add(content_hash)
+
+            key = url_key(record_link(record))
+            if key and key in known_urls:
+                counts['url_duplicates'] += 1
+                continue
+            if key:
+                known_urls.add(key)
+            counts['kept'] += 1
+
+    return report, unreadable
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Doublons elimines par l'URL canonique")
+    parser.add_argument('--raw-dir', default=RAW_DIR)
+    parser.add_argument('--sources', nargs='+', default=SOURCES)
+    parser.add_argument('--start', help='Debut de periode (YYYY-MM-DD), via le catalogue')
+    parser.add_argument('--end', help='Fin de periode (YYYY-MM-DD), via le catalogue')
+    parser.add_argument('--catalog', default=CATALOG_FILE)
+    args = parser.parse_args()
+
+    files = None
+    if args.start or args.end:
+        files = catalog_files(RawCatalog(args.catalog, args.raw_dir), args.sources, args.start, args.end)
+    report, unreadable = build_report(args.raw_dir, args.sources, files)
+
+    print(f"{'source':>10} {'fichiers':>9} {'lignes':>9} {'dbl hash':>9} {'dbl URL':>9} {'gardes':>9} {'gain':>7}")
+    print("-" * 69)
+    totals = defaultdict(int)
+    for source in args.sources:
+        counts = report.get(source)
+        if not counts:
+            continue
+        for k, v in counts.items():
+            totals[k] += v
+        gain = counts['url_duplicates'] / counts['rows'] * 100 if counts['rows'] else 0
+        print(f"{source:>10} {counts['files']:>9,} {counts['rows']:>9,} {counts['hash_duplicates']:>9,} "
+              f"{counts['url_duplicates']:>9,} {counts['kept']:>9,} {gain:>6.1f}%")
+    if totals['rows']:
+        gain = totals['url_duplicates'] / totals['rows'] * 100
+        print("-" * 69)
+        print(f"{'TOTAL':>10} {totals['files']:>9,} {totals['rows']:>9,} {totals['hash_duplicates']:>9,} "
+              f"{totals['url_duplicates']:>9,} {totals['kept']:>9,} {gain:>6.1f}%")
+    if unreadable:
+        print(f"\n{unreadable} fichiers illisibles ignores (pointeurs Git LFS non telecharges ?)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""
+Fausse API Reddit locale, pour essayer la collecte Reddit sans identifiants
+ni réseau
+Sert les deux points d'entrée utilisés par reddit_collector.py:
+  - POST /api/v1/access_token   (jeton OAuth « application only »)
+  - GET  /r/{subreddit}/new     (listing paginé: limit, after, raw_json)
+avec de vrais identifiants base 36 croissants, les en-têtes X-Ratelimit-*
+(quota par fenêtre, 429 une fois épuisé), 401 sans jeton valide et une
+latence réglable. De nouveaux posts arrivent en continu (--per-minute), ce
+qui permet de vérifier le rattrapage d'une collecte à l'autre.
+
+Usage:
+    python fake_reddit_api.py --port 8090 --posts 1500 --per-minute 30
+    REDDIT_CLIENT_ID=x REDDIT_CLIENT_SECRET=y \\
+    REDDIT_AUTH_URL=http://127.0.0.1:8090 REDDIT_API_URL=http://127.0.0.1:8090 \\
+        python -c "from collect_data_tracking import collect_reddit; collect_reddit()"
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+from urllib.parse import parse_qs, urlsplit
+
+FIRST_ID = int("1a0000", 36)
+TOKEN = "fake-token"
+WORDS = ("election", "market", "climate", "court", "ceasefire", "vaccine", "startup", "satellite",
+         "protest", "inflation", "earthquake", "summit", "AI", "merger", "study", "minister")
+
+
+def _base36(number: int) -> str:
+    digits = "0123456789abcdefghijklmnopqrstuvwxyz"
+    text = ""
+    while number:
+        number, digit = divmod(number, 36)
+        text = digits[digit] + text
+    return text or "0"
+
+
+class FakeReddit:
+    """Posts générés (partagés entre subreddits, identifiants globaux) et quota"""
+
+    def __init__(self, subreddits: List[str], posts: int, per_minute: float,
+                 quota: int, window: float, seed: int = 0):
+        self.subreddits = subreddits
+        self.per_minute = per_minute
+        self.quota = quota
+        self.window = window
+        self.random = random.Random(seed)
+        self.next_id = FIRST_ID
+        self.posts: Dict[str, List[Dict]] = {name: [] for name in subreddits}   # Du plus ancien au plus récent
+        self.started = time.time()
+        self.generated_until = self.started
+        self.window_start = time.monotonic()
+        self.used = 0
+        self.lock = threading.Lock()
+        # Historique: posts répartis sur les dernières 24 heures
+        for i in range(posts):
+            self._add(self.started - 24 * 3600 * (1 - i / max(1, posts)))
+
+    def _add(self, created: float):
+        # Le premier subreddit (worldnews) reçoit la moitié des posts
+        subreddit = self.random.choices(self.subreddits, weights=[len(self.subreddits) - 1]
+                                        + [1] * (len(self.subreddits) - 1))[0]
+        post_id = _base36(self.next_id)
+        self.next_id += self.random.randint(1, 50)
+        title = " ".join(self.random.choice(WORDS) for _ in range(6)).capitalize()
+        self.posts[subreddit].append({
+            "id": post_id, "name": f"t3_{post_id}", "subreddit": subreddit,
+            "title": f"{title} ({post_id})",
+            "url": f"https://example.com/{subreddit}/{post_id}",
+            "score": self.random.randint(0, 5000), "created_utc": created,
+        })
+
+    def refresh(self):
+        """Ajoute les posts arrivés depuis le dernier appel"""
+        now = time.time()
+        if self.per_minute <= 0:
+            return
+        interval = 60 / self.per_minute
+        while self.generated_until + interval <= now:
+            self.generated_until += interval
+            self._add(self.generated_until)
+
+    def take_quota(self):
+        """(autorisé, requêtes restantes, secondes avant la nouvelle fenêtre)"""
+        now = time.monotonic()
+        if now - self.window_start >= self.window:
+            self.window_start, self.used = now, 0
+        reset = self.window - (now - self.window_start)
+        if self.used >= self.quota:
+            return False, 0, reset
+        self.used += 1
+        return True, self.quota - self.used, reset
+
+    def listing(self, subreddit: str, limit: int, after: str) -> Dict:
+        posts = self.posts.get(subreddit, [])[::-1]
+        start = 0
+        if after:
+            names = [post["name"] for post in posts]
+            start = names.index(after) + 1 if after in names else len(posts)
+        page = posts[start:start + limit]
+        more = start + limit < len(posts)
+        return {"kind": "Listing", "data": {
+            "after": page[-1]["name"] if page and more else None,
+            "before": None, "dist": len(page),
+            "children": [{"kind": "t3", "data": post} for post in page]}}
+
+
+def make_handler(reddit: FakeReddit, latency: float):
+
+    class Handler(BaseHTTPRequestHandler):
+
+        def _send(self, status: int, body: Dict, headers: Dict[str, str] = None):
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=UTF-8")
+            self.send_header("Content-Length", str(len(data)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            if urlsplit(self.path).path != "/api/v1/access_token":
+                return self._send(404, {"error": 404})
+            if not self.headers.get("Authorization", "").startswith("Basic "):
+                return self._send(401, {"error": 401, "message": "Unauthorized"})
+            self._send(200, {"access_token": TOKEN, "token_type": "bearer",
+                             "expires_in": 86400, "scope": "*"})
+
+        def do_GET(self):
+            url = urlsplit(self.path)
+            match = re.fullmatch(r"/r/([A-Za-z0-9_]+)/new(?:\.json)?", url.path)
+            if not match:
+                return self._send(404, {"error": 404})
+            if self.headers.get("Authorization", "").lower() != f"bearer {TOKEN}":
+                return self._send(401, {"error": 401, "message": "Unauthorized"})
+            with reddit.lock:
+                allowed, remaining, reset = reddit.take_quota()
+                headers = {"X-Ratelimit-Used": str(reddit.used),
+                           "X-Ratelimit-Remaining": f"{remaining:.1f}",
+                           "X-Ratelimit-Reset": str(int(reset) + 1)}
+                if not allowed:
+                    headers["Retry-After"] = str(int(reset) + 1)
+                    return self._send(429, {"error": 429, "message": "Too Many Requests"}, headers)
+                reddit.refresh()
+                query = parse_qs(url.query)
+                limit = min(100, int(query.get("limit", ["25"])[0]))
+                body = reddit.listing(match.group(1), limit, query.get("after", [""])[0])
+            time.sleep(latency)
+            self._send(200, body, headers)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fausse API Reddit locale")
+    parser.add_argument('--host', default="127.0.0.1")
+    parser.add_argument('--port', type=int, default=8090)
+    parser.add_argument('--subreddits', default="worldnews,news,technology,science,business")
+    parser.add_argument('--posts', type=int, default=1500, help='Posts deja publies (24 dernieres heures)')
+    parser.add_argument('--per-minute', type=float, default=30, help='Nouveaux posts par minute')
+    parser.add_argument('--quota', type=int, default=100, help='Requetes par fenetre')
+    parser.add_argument('--window', type=float, default=60, help='Duree de la fenetre de quota (s)')
+    parser.add_argument('--latency', type=float, default=0.2, help='Delai de chaque listing (s)')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    reddit = FakeReddit(args.subreddits.split(","), args.posts, args.per_minute,
+                        args.quota, args.window, args.seed)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(reddit, args.latency))
+    counts = ", ".join(f"r/{name}: {len(posts)}" for name, posts in reddit.posts.items())
+    print(f"Fausse API Reddit sur http://{args.host}:{args.port} ({counts})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Cache des validateurs HTTP (ETag / Last-Modified) par feed
+Permet des GET conditionnels: un feed inchangé répond 304 et n'est ni
+re-téléchargé ni re-parsé
+"""
+
+import json
+import logging
+import os
+from datetime import datetime
+from typing import Dict
+
+logger = logging.getLogger(__name__)
+
+
+class FeedValidatorCache:
+    """Mémorise les validateurs HTTP de chaque feed entre les exécutions"""
+
+    def __init__(self, cache_file: str):
+        self.cache_file = cache_file
+        self.validators: Dict[str, Dict[str, str]] = {}
+        self.hits = 0     # Réponses 304: feed inchangé, parsing évité
+        self.misses = 0   # Réponses 200: feed téléchargé et parsé
+        self.load()
+
+    def load(self):
+        """Charge les validateurs sauvegardés"""
+        if not os.path.exists(self.cache_file):
+            return
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                self.validators = json.load(f)
+            logger.info(f"[Cache HTTP] {len(self.validators):,} feeds avec validateurs")
+        except Exception as e:
+            logger.error(f"[Cache HTTP] Erreur chargement: {e}")
+            self.validators = {}
+
+    def save(self):
+        """Sauvegarde les validateurs"""
+        try:
+            with open(self.cache_file, 'w', encoding='utf-8') as f:
+                json.dump(self.validators, f, indent=2)
+        except Exception as e:
+            logger.error(f"[Cache HTTP] Erreur sauvegarde: {e}")
+
+    def reset_counters(self):
+        """Remet à zéro les compteurs (début d'une nouvelle exécution)"""
+        self.hits = 0
+        self.misses = 0
+
+    def request_headers(self, url: str) -> Dict[str, str]:
+        """En-têtes conditionnels à envoyer pour ce feed"""
+        cached = self.validators.get(url, {})
+        headers = {}
+        if cached.get('etag'):
+            headers['If-None-Match'] = cached['etag']
+        if cached.get('last_modified'):
+            headers['If-Modified-Since'] = cached['last_modified']
+        return headers
+
+    def record_not_modified(self, url: str):
+        """Le serveur a répondu 304"""
+        self.hits += 1
+        if url in self.validators:
+            self.validators[url]['checked'] = datetime.now().isoformat()
+
+    def store(self, url: str, etag: str = "", last_modified: str = ""):
+        """
+        Enregistre les validateurs d'une réponse 200
+        À appeler seulement après un parsing réussi, sinon un 304 au prochain
+        passage ferait perdre les articles de cette version du feed
+        """
+        self.misses += 1
+        if etag or last_modified:
+            self.validators[url] = {
+                'etag': etag or "",
+                'last_modified': last_modified or "",
+                'checked': datetime.now().isoformat()
+            }
+        else:
+            self.validators.pop(url, None)
+
+    def summary(self) -> Dict[str, int]:
+        return {'not_modified': self.hits, 'downloaded': self.misses}
@@ -0,0 +1,125 @@
+"""
+Planificateur adaptatif des feeds RSS
+Apprend le rythme de publication de chaque feed à partir des collectes passées:
+les feeds très actifs (BBC_Top, AP_Top...) sont interrogés souvent, les blogs
+calmes rarement, le tout dans un budget global de requêtes par exécution
+"""
+
+import json
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# --------------------------
+# Configuration
+# --------------------------
+MIN_INTERVAL_MINUTES = 15        # Jamais plus d'une requête par quart d'heure
+MAX_INTERVAL_MINUTES = 24 * 60   # Au moins une requête par jour
+TARGET_NEW_PER_POLL = 5          # Nombre de nouveaux articles visé par requête
+RATE_SMOOTHING = 0.3             # Poids de la dernière observation (moyenne mobile)
+
+
+class FeedScheduler:
+    """Décide quels feeds interroger à chaque exécution"""
+
+    def __init__(self, state_file: str):
+        self.state_file = state_file
+        self.feeds: Dict[str, Dict] = {}
+        self.load()
+
+    def load(self):
+        """Charge l'état appris lors des collectes précédentes"""
+        if not os.path.exists(self.state_file):
+            return
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                self.feeds = json.load(f)
+            logger.info(f"[Planning] {len(self.feeds):,} feeds avec historique de publication")
+        except Exception as e:
+            logger.error(f"[Planning] Erreur chargement: {e}")
+            self.feeds = {}
+
+    def save(self):
+        """Sauvegarde l'état du planificateur"""
+        try:
+            with open(self.state_file, 'w', encoding='utf-8') as f:
+                json.dump(self.feeds, f, indent=2)
+        except Exception as e:
+            logger.error(f"[Planning] Erreur sauvegarde: {e}")
+
+    def expected_new_items(self, source: str, now: datetime) -> float:
+        """Nombre de nouveaux articles attendus si on interroge le feed maintenant"""
+        state = self.feeds.get(source)
+        if not state or not state.get('last_poll'):
+            return float('inf')  # Jamais interrogé: priorité maximale
+        hours = (now - datetime.fromisoformat(state['last_poll'])).total_seconds() / 3600
+        return state['rate_per_hour'] * hours
+
+    def due_feeds(self, feeds: Dict[str, str], max_feeds: Optional[int] = None,
+                  now: Optional[datetime] = None) -> Dict[str, str]:
+        """
+        Retourne les feeds dont l'échéance est passée, les plus productifs
+        d'abord, en s'arrêtant au budget de requêtes max_feeds
+        """
+        now = now or datetime.now()
+        due = []
+        for source in feeds:
+            state = self.feeds.get(source)
+            if state and state.get('next_poll') and datetime.fromisoformat(state['next_poll']) > now:
+                continue
+            due.append(source)
+
+        due.sort(key=lambda s: self.expected_new_items(s, now), reverse=True)
+        if max_feeds is not None:
+            due = due[:max_feeds]
+
+        logger.info(f"[Planning] {len(due)}/{len(feeds)} feeds a interroger")
+        return {source: feeds[source] for source in due}
+
+    def record_poll(self, source: str, new_items: int,
+                    max_interval_minutes: int = MAX_INTERVAL_MINUTES,
+                    now: Optional[datetime] = None):
+        """
+        Met à jour le rythme observé du feed (un 304 compte comme 0 nouvel article)
+        et calcule l'intervalle avant la prochaine requête
+        """
+        now = now or datetime.now()
+        state = self.feeds.setdefault(source, {
+            'rate_per_hour': 0.0,
+            'polls': 0,
+            'productive_polls': 0,
+            'last_poll': None,
+        })
+
+        if state['last_poll']:
+            hours = (now - datetime.fromisoformat(state['last_poll'])).total_seconds() / 3600
+            observed = new_items / max(hours, MIN_INTERVAL_MINUTES / 60)
+            state['rate_per_hour'] = ((1 - RATE_SMOOTHING) * state['rate_per_hour']
+                                      + RATE_SMOOTHING * observed)
+        else:
+            # Premier passage: on ne connaît pas la fenêtre couverte, on suppose 24h
+            state['rate_per_hour'] = new_items / 24
+
+        state['polls'] += 1
+        state['productive_polls'] += 1 if new_items else 0
+        state['last_poll'] = now.isoformat()
+
+        if state['rate_per_hour'] > 0:
+            interval = TARGET_NEW_PER_POLL / state['rate_per_hour'] * 60
+        else:
+            interval = max_interval_minutes
+        interval = max(MIN_INTERVAL_MINUTES, min(interval, max_interval_minutes))
+
+        state['interval_minutes'] = round(interval, 1)
+        state['next_poll'] = (now + timedelta(minutes=interval)).isoformat()
+
+    def record_error(self, source: str, now: Optional[datetime] = None):
+        """En cas d'échec, on retente à l'intervalle habituel sans toucher au rythme appris"""
+        now = now or datetime.now()
+        state = self.feeds.get(source)
+        if not state or not state.get('interval_minutes'):
+            return
+        state['next_poll'] = (now + timedelta(minutes=state['interval_minutes'])).isoformat()
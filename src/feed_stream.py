@@ -0,0 +1,268 @@
+"""
+Parsing en flux des feeds RSS/Atom, arrêté à la marque de niveau haut
+Pour chaque feed, on retient l'entrée la plus récente déjà lue (date de
+publication et GUID). La plupart des feeds listent leurs entrées de la plus
+récente à la plus ancienne: le document est lu morceau par morceau et la
+lecture s'arrête dès qu'une entrée est au niveau de la marque ou en dessous
+(même GUID sans date plus récente, ou date plus ancienne), ou plus ancienne
+que la fenêtre de collecte. En régime établi, seules les quelques entrées
+nouvelles sont parsées.
+
+Prudence:
+  - l'arrêt anticipé n'est utilisé que pour les feeds observés triés du plus
+    récent au plus ancien; les autres sont lus en entier
+  - tous les FULL_READ_EVERY arrêts anticipés, une lecture complète vérifie
+    que le feed est toujours trié
+  - un document que le parseur XML strict refuse (entités HTML, encodage
+    exotique, date illisible) est confié à feedparser, qui accepte tout;
+    le flux n'est retenté qu'après FULL_READ_EVERY collectes
+"""
+
+import html
+import json
+import logging
+import os
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+from urllib.parse import urljoin, urlsplit
+
+logger = logging.getLogger(__name__)
+
+# --------------------------
+# Configuration
+# --------------------------
+CHUNK_BYTES = 16 * 1024       # Taille des morceaux passés au parseur
+FULL_READ_EVERY = 10          # Lecture complète après ce nombre d'arrêts anticipés
+
+_ENTRY_TAGS = ('item', 'entry')
+# Champs lus d'après le nom qualifié: RSS 0.9x/2.0 (sans espace de noms), Atom 1.0
+# et 0.3, RSS 1.0, plus dc:date et content:encoded. Les extensions homonymes
+# (media:title, media:content...) ne remplacent jamais un champ du cœur
+_CORE_NAMESPACES = ('', '{http://www.w3.org/2005/Atom}', '{http://purl.org/atom/ns#}',
+                    '{http://purl.org/rss/1.0/}')
+_EXTENSION_FIELDS = {'{http://purl.org/dc/elements/1.1/}date': 'date',
+                     '{http://purl.org/rss/1.0/modules/content/}encoded': 'encoded'}
+_PUBLISHED_TAGS = ('pubDate', 'published', 'issued')
+_UPDATED_TAGS = ('updated', 'date', 'modified')
+
+
+class StreamError(ValueError):
+    """Document que le parseur en flux ne sait pas lire (feedparser prend le relais)"""
+
+
+@dataclass
+class StreamResult:
+    """Entrées lues avant l'arrêt et nouvelle marque du feed"""
+    entries: List[SimpleNamespace] = field(default_factory=list)
+    newest: Optional[datetime] = None     # Date la plus récente vue (UTC, sans fuseau)
+    newest_guid: str = ""
+    in_order: bool = True                 # Entrées datées lues du plus récent au plus ancien
+    stopped_early: bool = False
+    bytes_read: int = 0
+
+
+def _core_name(tag: str) -> Optional[str]:
+    """Nom d'un élément du cœur RSS/Atom ('{http://www.w3.org/2005/Atom}id' -> 'id'), None sinon"""
+    if tag in _EXTENSION_FIELDS:
+        return _EXTENSION_FIELDS[tag]
+    namespace, brace, name = tag.rpartition('}')
+    return name if (namespace + brace) in _CORE_NAMESPACES else None
+
+
+def _is_url(text: str) -> bool:
+    return urlsplit(text).scheme in ('http', 'https')
+
+
+def _parse_date(text: str) -> datetime:
+    """Date RFC 822 (RSS) ou ISO 8601 (Atom, dc:date), ramenée en UTC sans fuseau"""
+    text = text.strip()
+    try:
+        if text[:4].isdigit():
+            value = datetime.fromisoformat(text)
+        else:
+            value = parsedate_to_datetime(text)
+    except (TypeError, ValueError, IndexError) as e:
+        raise StreamError(f"date illisible: {text!r}") from e
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _entry(element: ET.Element, base_url: str) -> SimpleNamespace:
+    """
+    Entrée au format attendu par extract_feed_articles (mêmes attributs que
+    feedparser: title, link, id, summary, published_parsed, updated_parsed)
+    """
+    fields: Dict = {}
+    summary = content = None
+    guid_is_link = True
+    for child in element:
+        name = _core_name(child.tag)
+        text = child.text or ""
+        if name is None:
+            continue
+        if name == 'title':
+            # Titre Atom en XHTML: son texte; le nettoyage HTML est commun aux
+            # deux parseurs (extract_feed_articles)
+            title = html.escape("".join(child.itertext())) if child.get('type') == 'xhtml' else text
+            fields.setdefault('title', title.strip())
+        elif name == 'link':
+            href = child.get('href')
+            if href is None:
+                fields.setdefault('link', text.strip())
+            elif child.get('rel', 'alternate') == 'alternate':
+                fields.setdefault('link', href)
+        elif name in ('guid', 'id') and 'id' not in fields:
+            fields['id'] = text.strip()
+            guid_is_link = child.get('isPermaLink', 'true') != 'false'
+        elif name in _PUBLISHED_TAGS and text.strip():
+            fields.setdefault('published_parsed', _parse_date(text).timetuple())
+        elif name in _UPDATED_TAGS and text.strip():
+            fields.setdefault('updated_parsed', _parse_date(text).timetuple())
+        elif name in ('description', 'summary') and summary is None:
+            summary = text
+        elif name in ('encoded', 'content') and content is None:
+            if child.get('type') == 'xhtml':
+                # Contenu XHTML en éléments: seul son texte sert au résumé
+                content = html.escape("".join(child.itertext()))
+            else:
+                content = text
+    # Comme feedparser: le GUID d'un item RSS sans <link> sert de lien (s'il
+    # s'agit bien d'une URL, jamais d'un urn:...), le contenu sert de résumé
+    # en l'absence de <description>
+    if 'link' not in fields and guid_is_link and _is_url(fields.get('id', "")):
+        fields['link'] = fields['id']
+    if 'link' in fields and base_url:
+        fields['link'] = urljoin(base_url, fields['link'])
+    if summary is not None or content is not None:
+        fields['summary'] = summary if summary is not None else content
+    return SimpleNamespace(**fields)
+
+
+def _entry_date(entry: SimpleNamespace) -> Optional[datetime]:
+    parsed = getattr(entry, 'published_parsed', None) or getattr(entry, 'updated_parsed', None)
+    return datetime(*parsed[:6]) if parsed else None
+
+
+def stream_feed(content: bytes, base_url: str = "", mark: Optional[Dict] = None,
+                cutoff: Optional[datetime] = None) -> StreamResult:
+    """
+    Lit les entrées du feed dans l'ordre du document. Si mark indique un feed
+    trié, s'arrête à la première entrée au niveau de la marque ou plus
+    ancienne que cutoff (cette entrée n'est pas retournée)
+    """
+    result = StreamResult()
+    early_stop = bool(mark and mark.get('sorted'))
+    mark_guid = mark.get('guid', "") if early_stop else ""
+    mark_date = datetime.fromisoformat(mark['published']) if early_stop and mark.get('published') else None
+    previous: Optional[datetime] = None
+
+    parser = ET.XMLPullParser(events=('end',))
+    try:
+        for offset in range(0, max(1, len(content)), CHUNK_BYTES):
+            chunk = content[offset:offset + CHUNK_BYTES]
+            parser.feed(chunk)
+            result.bytes_read += len(chunk)
+            for _, element in parser.read_events():
+                if _core_name(element.tag) not in _ENTRY_TAGS:
+                    continue
+                entry = _entry(element, base_url)
+                element.clear()
+                date = _entry_date(entry)
+                guid = getattr(entry, 'id', "") or getattr(entry, 'link', "")
+
+                # Le GUID de la marque n'arrête la lecture que si l'entrée n'a pas été
+                # republiée depuis (mise à jour remontée en tête avec une date plus récente)
+                if early_stop and ((mark_guid and guid == mark_guid
+                                    and not (date and mark_date and date > mark_date))
+                                   or (date and mark_date and date < mark_date)
+                                   or (date and cutoff and date < cutoff)):
+                    result.stopped_early = True
+                    return result
+
+                if date:
+                    if previous and date > previous:
+                        result.in_order = False
+                    previous = date
+                    if result.newest is None or date > result.newest:
+                        result.newest, result.newest_guid = date, guid
+                elif not result.entries and not result.newest_guid:
+                    # Feed sans dates: la position fait foi
+                    result.newest_guid = guid
+                result.entries.append(entry)
+        parser.close()
+    except ET.ParseError as e:
+        raise StreamError(f"XML invalide: {e}") from e
+    return result
+
+
+class FeedMarks:
+    """Marque de niveau haut de chaque feed, conservée entre les exécutions"""
+
+    def __init__(self, state_file: str):
+        self.state_file = state_file
+        self.marks: Dict[str, Dict] = {}
+        self.parsed_entries = 0      # Entrées parsées pendant l'exécution
+        self.early_stops = 0         # Feeds dont la lecture s'est arrêtée à la marque
+        self.bytes_skipped = 0       # Octets jamais parsés grâce à ces arrêts
+        self.fallbacks = 0           # Feeds confiés à feedparser
+        self.load()
+
+    def load(self):
+        """Charge les marques sauvegardées"""
+        if not os.path.exists(self.state_file):
+            return
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                self.marks = json.load(f)
+            logger.info(f"[Marques] {len(self.marks):,} feeds avec marque de lecture")
+        except Exception as e:
+            logger.error(f"[Marques] Erreur chargement: {e}")
+            self.marks = {}
+
+    def save(self):
+        """Sauvegarde les marques"""
+        try:
+            with open(self.state_file, 'w', encoding='utf-8') as f:
+                json.dump(self.marks, f, indent=2)
+        except Exception as e:
+            logger.error(f"[Marques] Erreur sauvegarde: {e}")
+
+    def reset_counters(self):
+        """Remet à zéro les compteurs (début d'une nouvelle exécution)"""
+        self.parsed_entries = 0
+        self.early_stops = 0
+        self.bytes_skipped = 0
+        self.fallbacks = 0
+
+    def get(self, source: str) -> Dict:
+        """
+        Marque à transmettre au parsing du feed; sans 'sorted' (lecture
+        complète) quand une vérification périodique est due
+        """
+        mark = dict(self.marks.get(source, {}))
+        if mark.get('early_reads', 0) >= FULL_READ_EVERY:
+            mark.pop('sorted', None)
+        return mark
+
+    def update(self, source: str, outcome: Dict):
+        """Enregistre le résultat d'un parsing (voir parse_feed_content)"""
+        self.parsed_entries += outcome.get('entries', 0)
+        if outcome.get('fallback'):
+            self.fallbacks += 1
+        if outcome.get('stopped_early'):
+            self.early_stops += 1
+            self.bytes_skipped += outcome.get('bytes_skipped', 0)
+        mark = self.marks.setdefault(source, {})
+        for key in ('published', 'guid', 'sorted', 'stream_retry_in'):
+            if key in outcome:
+                mark[key] = outcome[key]
+        mark['early_reads'] = mark.get('early_reads', 0) + 1 if outcome.get('stopped_early') else 0
+
+    def summary(self) -> Dict[str, int]:
+        return {'parsed_entries': self.parsed_entries, 'early_stops': self.early_stops,
+                'bytes_skipped': self.bytes_skipped, 'fallbacks': self.fallbacks}
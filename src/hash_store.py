@@ -0,0 +1,396 @@
+"""
+Stockage binaire compact des hashes déjà collectés
+Remplace la liste JSON de chaînes hexadécimales par des générations
+hebdomadaires (selon la date de première collecte), chacune composée de:
+  - gen_<date>.bin   : tableau trié d'enregistrements (digest MD5 brut 16 octets
+                       + date de première collecte 4 octets), lu via mmap
+  - gen_<date>.log   : journal en ajout seul des enregistrements récents
+  - gen_<date>.bloom : filtre de Bloom du tableau trié (préfiltre optionnel)
+Le chargement ne lit que les journaux (petits), la recherche se fait par
+dichotomie directement dans les fichiers mappés en mémoire. Les générations
+plus anciennes que la durée de rétention sont supprimées: un article vu il y a
+plusieurs semaines ne peut plus passer le filtre hours_back des collecteurs
+"""
+
+import heapq
+import json
+import logging
+import mmap
+import os
+import re
+import struct
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DIGEST_SIZE = 16
+RECORD_SIZE = DIGEST_SIZE + 4          # digest + première collecte (uint32, secondes epoch)
+COMPACT_MIN_ENTRIES = 50_000           # Taille du journal à partir de laquelle on compacte
+COMPACT_RATIO = 0.10                   # ... ou dès qu'il dépasse 10% du tableau trié
+
+TTL_DAYS = 28                          # Durée de rétention d'un hash
+GENERATION_DAYS = 7                    # Largeur d'une génération
+USE_BLOOM_FILTER = True                # Préfiltre probabiliste devant chaque tableau trié
+BLOOM_BITS_PER_ENTRY = 10              # ~1% de faux positifs
+BLOOM_HASHES = 7
+
+_GENERATION_FILE = re.compile(r"^gen_(\d{8})\.(bin|log)$")
+
+
+def to_digest(content_hash) -> bytes:
+    """Convertit un hash hexadécimal (generate_hash) en digest brut de 16 octets"""
+    if isinstance(content_hash, bytes):
+        return content_hash
+    return bytes.fromhex(content_hash)
+
+
+def _pack(digest: bytes, first_seen: int) -> bytes:
+    return digest + struct.pack('>I', first_seen)
+
+
+# --------------------------
+# Filtre de Bloom
+# --------------------------
+class BloomFilter:
+    """
+    Filtre de Bloom sur des digests MD5: le digest étant déjà uniforme, ses
+    deux moitiés servent directement de fonctions de hachage (double hashing)
+    """
+
+    def __init__(self, bits: bytearray, hashes: int = BLOOM_HASHES):
+        self.bits = bits
+        self.size = len(bits) * 8
+        self.hashes = hashes
+
+    @classmethod
+    def for_entries(cls, count: int) -> "BloomFilter":
+        return cls(bytearray(max(1, count * BLOOM_BITS_PER_ENTRY // 8)))
+
+    def _positions(self, digest: bytes):
+        h1 = int.from_bytes(digest[:8], 'big')
+        h2 = int.from_bytes(digest[8:16], 'big') | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, digest: bytes):
+        for pos in self._positions(digest):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, digest: bytes) -> bool:
+        bits = self.bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(digest))
+
+
+# --------------------------
+# Une génération
+# --------------------------
+class HashStore:
+    """Ensemble persistant de digests de 16 octets avec leur date de première collecte"""
+
+    def __init__(self, base_path: str):
+        self.sorted_file = base_path + ".bin"
+        self.log_file = base_path + ".log"
+        self.bloom_file = base_path + ".bloom"
+        self._file = None
+        self._mm = None
+        self._bloom: Optional[BloomFilter] = None
+        self._sorted_count = 0
+        self._recent: Dict[bytes, int] = {}   # Journal + ajoutés pendant l'exécution
+        self._pending: List[bytes] = []       # Enregistrements pas encore écrits dans le journal
+        self.open()
+
+    # --------------------------
+    # Ouverture / fermeture
+    # --------------------------
+    def open(self):
+        """Mappe le tableau trié et son filtre de Bloom, puis relit le journal"""
+        self.close()
+        if os.path.exists(self.sorted_file) and os.path.getsize(self.sorted_file) >= RECORD_SIZE:
+            self._file = open(self.sorted_file, 'rb')
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._sorted_count = len(self._mm) // RECORD_SIZE
+            if USE_BLOOM_FILTER and os.path.exists(self.bloom_file):
+                with open(self.bloom_file, 'rb') as f:
+                    self._bloom = BloomFilter(bytearray(f.read()))
+
+        self._recent = {}
+        if os.path.exists(self.log_file):
+            with open(self.log_file, 'rb') as f:
+                data = f.read()
+            # Une fin de journal tronquée (crash pendant l'écriture) est ignorée
+            usable = len(data) - len(data) % RECORD_SIZE
+            for i in range(0, usable, RECORD_SIZE):
+                digest = data[i:i + DIGEST_SIZE]
+                self._recent[digest] = struct.unpack('>I', data[i + DIGEST_SIZE:i + RECORD_SIZE])[0]
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._bloom = None
+        self._sorted_count = 0
+
+    def delete(self):
+        """Supprime tous les fichiers de la génération"""
+        self.close()
+        for path in (self.sorted_file, self.log_file, self.bloom_file):
+            if os.path.exists(path):
+                os.remove(path)
+        self._recent = {}
+        self._pending = []
+
+    # --------------------------
+    # Ensemble
+    # --------------------------
+    def _find_sorted(self, digest: bytes) -> int:
+        """Position de l'enregistrement dans le tableau trié, -1 si absent"""
+        if self._bloom is not None and digest not in self._bloom:
+            return -1
+        lo, hi = 0, self._sorted_count
+        mm = self._mm
+        while lo < hi:
+            mid = (lo + hi) // 2
+            offset = mid * RECORD_SIZE
+            value = mm[offset:offset + DIGEST_SIZE]
+            if value < digest:
+                lo = mid + 1
+            elif value > digest:
+                hi = mid
+            else:
+                return mid
+        return -1
+
+    def __contains__(self, content_hash) -> bool:
+        digest = to_digest(content_hash)
+        return digest in self._recent or self._find_sorted(digest) >= 0
+
+    def first_seen(self, content_hash) -> Optional[int]:
+        """Date de première collecte (secondes epoch) ou None si inconnu"""
+        digest = to_digest(content_hash)
+        if digest in self._recent:
+            return self._recent[digest]
+        index = self._find_sorted(digest)
+        if index < 0:
+            return None
+        offset = index * RECORD_SIZE + DIGEST_SIZE
+        return struct.unpack('>I', self._mm[offset:offset + 4])[0]
+
+    def add(self, content_hash, first_seen: Optional[int] = None) -> bool:
+        """Ajoute un hash; retourne False s'il était déjà connu"""
+        digest = to_digest(content_hash)
+        if digest in self:
+            return False
+        first_seen = int(time.time()) if first_seen is None else int(first_seen)
+        self._recent[digest] = first_seen
+        self._pending.append(_pack(digest, first_seen))
+        return True
+
+    def __len__(self) -> int:
+        return self._sorted_count + len(self._recent)
+
+    def _sorted_records(self) -> Iterator[bytes]:
+        for i in range(self._sorted_count):
+            yield self._mm[i * RECORD_SIZE:(i + 1) * RECORD_SIZE]
+
+    def __iter__(self) -> Iterator[bytes]:
+        for record in self._sorted_records():
+            yield record[:DIGEST_SIZE]
+        yield from self._recent
+
+    @property
+    def has_journal(self) -> bool:
+        return bool(self._recent)
+
+    # --------------------------
+    # Persistance
+    # --------------------------
+    def flush(self):
+        """Ajoute les nouveaux enregistrements à la fin du journal (aucune réécriture)"""
+        if self._pending:
+            with open(self.log_file, 'ab') as f:
+                f.write(b"".join(self._pending))
+                f.flush()
+                os.fsync(f.fileno())
+            self._pending = []
+
+        if len(self._recent) >= max(COMPACT_MIN_ENTRIES, COMPACT_RATIO * self._sorted_count):
+            self.compact()
+
+    def compact(self):
+        """Fusionne le journal dans le tableau trié et reconstruit le filtre de Bloom"""
+        tmp_file = self.sorted_file + ".tmp"
+        recent = sorted(_pack(d, ts) for d, ts in self._recent.items())
+        bloom = BloomFilter.for_entries(self._sorted_count + len(recent)) if USE_BLOOM_FILTER else None
+        count = 0
+        previous = None
+        with open(tmp_file, 'wb') as f:
+            # Fusion de deux suites triées; les doublons (journal rejoué après
+            # un crash pendant une compaction) sont éliminés au passage
+            for record in heapq.merge(self._sorted_records(), recent):
+                digest = record[:DIGEST_SIZE]
+                if digest == previous:
+                    continue
+                f.write(record)
+                if bloom is not None:
+                    bloom.add(digest)
+                count += 1
+                previous = digest
+            f.flush()
+            os.fsync(f.fileno())
+
+        # Sous Windows, un fichier mappé ne peut pas être remplacé
+        self.close()
+        os.replace(tmp_file, self.sorted_file)
+        if bloom is not None:
+            with open(self.bloom_file + ".tmp", 'wb') as f:
+                f.write(bloom.bits)
+            os.replace(self.bloom_file + ".tmp", self.bloom_file)
+        if os.path.exists(self.log_file):
+            os.remove(self.log_file)
+        self._pending = []
+        self.open()
+        logger.info(f"[HashStore] Compaction {os.path.basename(self.sorted_file)}: {count:,} hashes")
+
+
+# --------------------------
+# Ensemble des générations
+# --------------------------
+class GenerationalHashStore:
+    """
+    Hashes répartis en générations selon leur date de première collecte;
+    les nouvelles entrées vont dans la génération courante et les générations
+    expirées sont supprimées en bloc
+    """
+
+    def __init__(self, directory: str, ttl_days: int = TTL_DAYS,
+                 generation_days: int = GENERATION_DAYS):
+        self.directory = directory
+        self.ttl_seconds = ttl_days * 86400
+        self.generation_seconds = generation_days * 86400
+        self.generations: Dict[int, HashStore] = {}
+        # Vue figée (plus récente d'abord) pour les lectures concurrentes
+        self._newest_first: tuple = ()
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self.open()
+
+    def _generation_start(self, timestamp: float) -> int:
+        return int(timestamp // self.generation_seconds * self.generation_seconds)
+
+    def _path(self, start: int) -> str:
+        day = datetime.fromtimestamp(start, tz=timezone.utc).strftime("%Y%m%d")
+        return os.path.join(self.directory, f"gen_{day}")
+
+    def open(self):
+        """Ouvre toutes les générations présentes sur disque"""
+        starts = set()
+        for name in os.listdir(self.directory):
+            match = _GENERATION_FILE.match(name)
+            if match:
+                day = datetime.strptime(match.group(1), "%Y%m%d").replace(tzinfo=timezone.utc)
+                starts.add(int(day.timestamp()))
+        self.generations = {start: HashStore(self._path(start)) for start in sorted(starts)}
+        self._refresh_view()
+        self.evict_expired()
+
+    def _refresh_view(self):
+        self._newest_first = tuple(store for _, store in sorted(self.generations.items(), reverse=True))
+
+    def close(self):
+        for store in self.generations.values():
+            store.close()
+
+    def _generation_for(self, timestamp: float) -> HashStore:
+        start = self._generation_start(timestamp)
+        if start not in self.generations:
+            with self._lock:
+                if start not in self.generations:
+                    self.generations[start] = HashStore(self._path(start))
+                    self._refresh_view()
+        return self.generations[start]
+
+    def __contains__(self, content_hash) -> bool:
+        digest = to_digest(content_hash)
+        # Les générations récentes d'abord: ce sont elles qui répondent le plus souvent
+        return any(digest in store for store in self._newest_first)
+
+    def first_seen(self, content_hash) -> Optional[int]:
+        for store in self.generations.values():
+            seen = store.first_seen(content_hash)
+            if seen is not None:
+                return seen
+        return None
+
+    def add(self, content_hash, first_seen: Optional[float] = None) -> bool:
+        """Ajoute un hash dans la génération de sa date de première collecte"""
+        if content_hash in self:
+            return False
+        first_seen = time.time() if first_seen is None else first_seen
+        return self._generation_for(first_seen).add(content_hash, int(first_seen))
+
+    def add_many(self, content_hashes: Iterable, first_seen: Optional[float] = None) -> int:
+        """Ajoute un lot de hashes; retourne le nombre de nouveaux"""
+        return sum(1 for h in content_hashes if self.add(h, first_seen))
+
+    def __len__(self) -> int:
+        return sum(len(store) for store in self.generations.values())
+
+    def __iter__(self) -> Iterator[bytes]:
+        for store in self.generations.values():
+            yield from store
+
+    def evict_expired(self, now: Optional[float] = None) -> int:
+        """Supprime les générations dont tous les hashes ont dépassé la rétention"""
+        now = time.time() if now is None else now
+        expired = [start for start in self.generations
+                   if start + self.generation_seconds <= now - self.ttl_seconds]
+        evicted = 0
+        for start in expired:
+            store = self.generations.pop(start)
+            evicted += len(store)
+            store.delete()
+        if expired:
+            self._refresh_view()
+        if evicted:
+            logger.info(f"[HashStore] {evicted:,} hashes expires supprimes ({len(expired)} generations)")
+        return evicted
+
+    def flush(self, now: Optional[float] = None):
+        """Écrit les journaux; les générations closes sont compactées une fois pour toutes"""
+        current = self._generation_start(time.time() if now is None else now)
+        for start, store in self.generations.items():
+            store.flush()
+            if start < current and store.has_journal:
+                store.compact()
+        self.evict_expired(now)
+
+    def migrate_from_json(self, json_files: Iterable[str]) -> int:
+        """
+        Migration unique depuis l'ancien format JSON (collected_hashes.json,
+        backup_hashes.json): {'hashes': [...]} ou simple liste de hashes hex.
+        La date de première collecte étant inconnue, on prend la date de migration
+        """
+        added = 0
+        for path in json_files:
+            if not os.path.exists(path):
+                continue
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                hashes = data.get('hashes', []) if isinstance(data, dict) else data
+                count = self.add_many(h for h in hashes if isinstance(h, str) and len(h) == 32)
+                added += count
+                logger.info(f"[HashStore] Migration {os.path.basename(path)}: {count:,} hashes")
+            except Exception as e:
+                logger.error(f"[HashStore] Migration impossible depuis {path}: {e}")
+        return added
+
+    def compact(self):
+        for store in self.generations.values():
+            if store.has_journal:
+                store.compact()
@@ -0,0 +1,143 @@
+"""
+Extraction rapide du texte d'un fragment HTML (résumés de feeds)
+Remplace BeautifulSoup(fragment, "html.parser").get_text() pour les résumés
+RSS: une seule expression régulière repère les balises, commentaires et
+déclarations, le texte entre deux balises est décodé (entités nommées et
+numériques) comme le fait html.parser pour BeautifulSoup, et le parcours
+s'arrête dès que limit caractères de texte sont obtenus, au lieu de
+construire l'arbre complet pour n'en garder que le début.
+
+Mêmes règles que get_text(): contenu de <script>, <style>, <template>, <rt>
+et <rp> ignoré, sections CDATA gardées telles quelles, texte composé
+uniquement d'espaces entre deux balises réduit à '\n' (ou ' ' sans retour à
+la ligne) hors de <pre>/<textarea>. Seul du HTML très mal formé (balise
+jamais refermée, '&#' isolé...) peut donner un résultat différent;
+bench_html_text.py compare les deux sur de vrais feeds
+"""
+
+import re
+from html.entities import html5
+from typing import Optional, Tuple
+
+# Balises (grammaire tolérante de html.parser: guillemets seulement autour
+# d'une valeur d'attribut), commentaires et déclarations, dans cet ordre
+_MARKUP = re.compile(r"""
+    <(script|style|template|rt|rp)\b(?:[^>"']|"[^"]*"|'[^']*')*>.*?</(?i:\1)\s*>   # contenu ignoré
+  | <!--.*?-->
+  | <!\[CDATA\[(.*?)\]\]>                                                           # texte brut gardé
+  | <(/?)([a-zA-Z][^\t\n\r\f />\x00]*)
+      (?:[\s/]*(?:(?<=['"\s/])[^\s/>][^\s/=>]*
+        (?:\s*=+\s*(?:'[^']*'|"[^"]*"|(?!['"])[^>\s]*)\s*)?(?:\s|/(?!>))*)*)?\s*/?>
+  | </[^>]*>
+  | <[!?][^>]*>
+""", re.S | re.I | re.X)
+
+# Références de caractères telles que les reconnaît html.parser: numériques ou
+# nommées, terminées par un caractère hors du nom (consommé si c'est ';').
+# Entre deux balises, la fin du texte compte comme terminaison ('<' suit);
+# en fin de document, une référence non terminée reste telle quelle
+_ENTITY = r"&(?:#([0-9]+|[xX][0-9a-fA-F]+)(?=[^0-9a-fA-F]{end});?|([a-zA-Z][-.a-zA-Z0-9]*)(?=[^a-zA-Z0-9]{end});?)"
+_ENTITY_BEFORE_TAG = re.compile(_ENTITY.format(end=r"|\Z"))
+_ENTITY_AT_END = re.compile(_ENTITY.format(end=""))
+_INCOMPLETE_AT_END = re.compile(r"&[a-zA-Z]\Z")
+_BARE_CHARREF = r"&#(?![0-9]+(?=[^0-9a-fA-F]{end})|[xX][0-9a-fA-F]+(?=[^0-9a-fA-F]{end}))"
+_BARE_BEFORE_TAG = re.compile(_BARE_CHARREF.format(end=r"|\Z"))
+_BARE_AT_END = re.compile(_BARE_CHARREF.format(end=""))
+
+_ASCII_SPACES = " \n\t\x0c\r"
+_PRESERVE_WHITESPACE = ('pre', 'textarea')
+
+
+def _character(number: int) -> str:
+    """Caractère d'une référence numérique (règles HTML5, comme BeautifulSoup)"""
+    if number == 0 or number > 0x10FFFF or 0xD800 <= number <= 0xDFFF:
+        return "\ufffd"
+    if 0x80 <= number <= 0x9F:
+        # Références écrites en windows-1252 au lieu d'Unicode (&#150; pour '–')
+        try:
+            return bytes([number]).decode('cp1252')
+        except UnicodeDecodeError:
+            pass
+    return chr(number)
+
+
+def _decode_entity(match: "re.Match") -> str:
+    number, name = match.groups()
+    if number is not None:
+        return _character(int(number[1:], 16) if number[0] in 'xX' else int(number))
+    character = html5.get(name + ';')
+    # Entité inconnue: BeautifulSoup garde '&nom' et perd le point-virgule
+    return character if character is not None else '&' + name
+
+
+def _decode(text: str, at_end: bool = False) -> str:
+    if '&' not in text:
+        return text
+    if not at_end:
+        return _ENTITY_BEFORE_TAG.sub(_decode_entity, text)
+    if _INCOMPLETE_AT_END.search(text):
+        # html.parser abandonne un '&' suivi d'une seule lettre en fin de document
+        return _ENTITY_BEFORE_TAG.sub(_decode_entity, text[:-2]) + text[-1]
+    return _ENTITY_AT_END.sub(_decode_entity, text)
+
+
+def _raw_from(markup: str, start: int, text: str, at_end: bool, bare_seen: bool) -> Tuple[int, bool]:
+    """
+    Un '&#' qui n'introduit aucune référence fait abandonner l'analyse à
+    html.parser: au deuxième, ou dès le premier si aucun ';' ne le suit, tout
+    le reste du document devient du texte brut, balises comprises. Retourne
+    la position de cet abandon dans text (-1 sinon) et si un tel '&#' a été vu
+    """
+    for bare in (_BARE_AT_END if at_end else _BARE_BEFORE_TAG).finditer(text):
+        if bare_seen or markup.find(';', start + bare.start()) < 0:
+            return bare.start(), True
+        bare_seen = True
+    return -1, bare_seen
+
+
+def _node(text: str, preserve_whitespace: bool) -> str:
+    """Un texte fait uniquement d'espaces se réduit à un seul séparateur"""
+    if preserve_whitespace or text.strip(_ASCII_SPACES):
+        return text
+    return "\n" if "\n" in text else " "
+
+
+def html_to_text(markup: str, limit: Optional[int] = None) -> str:
+    """
+    Texte d'un fragment HTML, limité à limit caractères (None: tout le texte);
+    html_to_text(s, 500) == BeautifulSoup(s, "html.parser").get_text()[:500]
+    """
+    if not markup:
+        return ""
+    parts, size, position, preserve, bare_seen = [], 0, 0, 0, False
+    matches = _MARKUP.finditer(markup) if '<' in markup else ()
+    for match in matches:
+        if match.start() > position:
+            text = markup[position:match.start()]
+            if '&#' in text:
+                cut, bare_seen = _raw_from(markup, position, text, False, bare_seen)
+                if cut >= 0:
+                    parts.append(_decode(text[:cut]) + markup[position + cut:])
+                    return "".join(parts)[:limit]
+            text = _node(_decode(text), preserve > 0)
+            parts.append(text)
+            size += len(text)
+        cdata, closing, tag = match.group(2, 3, 4)
+        if cdata:
+            cdata = _node(cdata, preserve > 0)
+            parts.append(cdata)
+            size += len(cdata)
+        elif tag and tag.lower() in _PRESERVE_WHITESPACE and not match.group(0).endswith('/>'):
+            preserve = max(0, preserve - 1) if closing else preserve + 1
+        position = match.end()
+        if limit is not None and size >= limit:
+            return "".join(parts)[:limit]
+
+    if position < len(markup):
+        text = markup[position:]
+        cut = _raw_from(markup, position, text, True, bare_seen)[0] if '&#' in text else -1
+        if cut >= 0:
+            parts.append(_decode(text[:cut]) + text[cut:])
+        else:
+            parts.append(_node(_decode(text, at_end=True), preserve > 0))
+    return "".join(parts)[:limit]
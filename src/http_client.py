@@ -0,0 +1,199 @@
+"""
+Couche HTTP commune à tous les collecteurs
+Un seul client par processus: une session requests (NewsAPI, scraping,
+Reddit, feeds en mode synchrone) dont les pools gardent les
+connexions ouvertes par hôte, et des sessions aiohttp configurées de la même
+façon pour le téléchargement asynchrone des feeds (cache DNS, keep-alive).
+Les dizaines de feeds servis par feeds.bbci.co.uk ou rss.cnn.com réutilisent
+ainsi quelques connexions TCP/TLS au lieu d'une poignée de main par feed.
+
+Chaque requête et chaque nouvelle connexion sont comptées par hôte:
+stats.summary() donne le taux de réutilisation depuis le démarrage du
+processus, stats.track() celui d'une seule collecte même si d'autres
+tournent en parallèle sur le même client
+"""
+
+import logging
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Compteurs de la collecte en cours (stats.track()): hérités par les tâches
+# asyncio, et par les threads des pools via contextvars.copy_context()
+_run_stats: ContextVar[Optional['ConnectionStats']] = ContextVar('http_run_stats', default=None)
+
+# --------------------------
+# Configuration
+# --------------------------
+CONNECT_TIMEOUT = 5           # Secondes pour établir une connexion
+READ_TIMEOUT = 20             # Secondes sans données avant abandon
+POOL_HOSTS = 200              # Hôtes dont les connexions sont gardées (requests)
+PER_HOST_CONNECTIONS = 6      # Connexions ouvertes au plus par hôte
+GLOBAL_CONNECTIONS = 200      # Connexions simultanées, tous hôtes confondus (aiohttp)
+DNS_CACHE_SECONDS = 300       # Durée de vie des résolutions DNS (aiohttp)
+KEEPALIVE_SECONDS = 30        # Connexion inactive gardée ouverte (aiohttp)
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 NewsCollector/1.0"
+
+
+class ConnectionStats:
+    """Requêtes et nouvelles connexions par hôte (partagé entre threads)"""
+
+    def __init__(self):
+        self.hosts: Dict[str, list] = {}   # hôte -> [requêtes, connexions]
+        self._lock = threading.Lock()
+
+    def record(self, host: str, requests: int = 0, connections: int = 0):
+        self._add(host, requests, connections)
+        run = _run_stats.get()
+        if run is not None:
+            run._add(host, requests, connections)
+
+    def _add(self, host: str, requests: int, connections: int):
+        with self._lock:
+            counts = self.hosts.setdefault(host or "", [0, 0])
+            counts[0] += requests
+            counts[1] += connections
+
+    @contextmanager
+    def track(self):
+        """
+        Compteurs propres au contexte courant (une collecte): seules les
+        requêtes lancées depuis ce contexte y sont comptées
+        """
+        run = ConnectionStats()
+        token = _run_stats.set(run)
+        try:
+            yield run
+        finally:
+            _run_stats.reset(token)
+
+    def snapshot(self) -> Dict[str, Tuple[int, int]]:
+        with self._lock:
+            return {host: tuple(counts) for host, counts in self.hosts.items()}
+
+    def summary(self, since: Optional[Dict[str, Tuple[int, int]]] = None, top: int = 10) -> Dict:
+        """
+        Totaux (depuis un snapshot() antérieur si since est fourni) et les
+        hôtes les plus sollicités
+        """
+        since = since or {}
+        deltas = {}
+        for host, (requests, connections) in self.snapshot().items():
+            before = since.get(host, (0, 0))
+            if requests - before[0] or connections - before[1]:
+                deltas[host] = (requests - before[0], connections - before[1])
+        requests = sum(r for r, _ in deltas.values())
+        connections = sum(c for _, c in deltas.values())
+        busiest = sorted(deltas.items(), key=lambda item: item[1][0], reverse=True)[:top]
+        return {
+            'requests': requests,
+            'connections': connections,
+            'reuse_ratio': round(1 - connections / requests, 3) if requests else 0.0,
+            'hosts': {host: {'requests': r, 'connections': c} for host, (r, c) in busiest},
+        }
+
+
+# --------------------------
+# requests (synchrone)
+# --------------------------
+def _counting_pool(base, stats: ConnectionStats):
+    """Pool urllib3 qui signale chaque requête et chaque connexion ouverte"""
+
+    class CountingPool(base):
+        def _new_conn(self):
+            stats.record(self.host, connections=1)
+            return super()._new_conn()
+
+        def urlopen(self, method, url, *args, **kwargs):
+            stats.record(self.host, requests=1)
+            return super().urlopen(method, url, *args, **kwargs)
+
+    return CountingPool
+
+
+def _new_session(stats: ConnectionStats):
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+    class PooledAdapter(HTTPAdapter):
+        def init_poolmanager(self, *args, **kwargs):
+            super().init_poolmanager(*args, **kwargs)
+            self.poolmanager.pool_classes_by_scheme = {
+                'http': _counting_pool(HTTPConnectionPool, stats),
+                'https': _counting_pool(HTTPSConnectionPool, stats),
+            }
+
+    class PooledSession(requests.Session):
+        def request(self, method, url, **kwargs):
+            # Même délai partout, sauf si l'appelant en fixe un
+            kwargs.setdefault('timeout', (CONNECT_TIMEOUT, READ_TIMEOUT))
+            return super().request(method, url, **kwargs)
+
+    session = PooledSession()
+    # pool_block=False: au-delà de PER_HOST_CONNECTIONS, connexion temporaire plutôt qu'attente
+    adapter = PooledAdapter(pool_connections=POOL_HOSTS, pool_maxsize=PER_HOST_CONNECTIONS)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers['User-Agent'] = USER_AGENT
+    return session
+
+
+class HttpClient:
+    """Client HTTP partagé du processus"""
+
+    def __init__(self):
+        self.stats = ConnectionStats()
+        self._session = None
+        self._lock = threading.Lock()
+
+    @property
+    def session(self):
+        """Session requests partagée (créée au premier accès)"""
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    self._session = _new_session(self.stats)
+        return self._session
+
+    def get(self, url: str, **kwargs):
+        return self.session.get(url, **kwargs)
+
+    # --------------------------
+    # aiohttp (asynchrone)
+    # --------------------------
+    def async_session(self, timeout: Optional[float] = None):
+        """
+        Session aiohttp pour une boucle d'événements (une par collecte RSS),
+        à utiliser avec async with; timeout: durée totale maximale d'une requête
+        """
+        import aiohttp
+
+        trace = aiohttp.TraceConfig()
+
+        async def on_request_start(session, context, params):
+            context.host = params.url.host
+            self.stats.record(context.host, requests=1)
+
+        async def on_connection_create_end(session, context, params):
+            self.stats.record(getattr(context, 'host', ""), connections=1)
+
+        trace.on_request_start.append(on_request_start)
+        trace.on_connection_create_end.append(on_connection_create_end)
+
+        connector = aiohttp.TCPConnector(limit=GLOBAL_CONNECTIONS, limit_per_host=PER_HOST_CONNECTIONS,
+                                         use_dns_cache=True, ttl_dns_cache=DNS_CACHE_SECONDS,
+                                         keepalive_timeout=KEEPALIVE_SECONDS)
+        client_timeout = aiohttp.ClientTimeout(total=timeout, sock_connect=CONNECT_TIMEOUT,
+                                               sock_read=READ_TIMEOUT)
+        return aiohttp.ClientSession(connector=connector, timeout=client_timeout,
+                                     headers={"User-Agent": USER_AGENT}, trace_configs=[trace])
+
+    def close(self):
+        if self._session is not None:
+            self._session.close()
+            self._session = None
@@ -0,0 +1,217 @@
+"""
+Écriture en flux des collectes en JSONL compressé
+Les collecteurs écrivent chaque article dès qu'il est retenu au lieu de
+garder toute l'exécution en mémoire. Les enregistrements sont regroupés par
+lots de BATCH_SIZE; chaque lot devient un membre gzip indépendant ajouté au
+fichier puis synchronisé sur disque. Après MAX_RECORDS_PER_FILE
+enregistrements, le fichier est finalisé et un nouveau est ouvert.
+
+Sûreté en cas de crash: le fichier en cours porte le suffixe .partial et
+n'est renommé en .jsonl.gz qu'une fois fermé, sans jamais écraser un fichier
+déjà finalisé. Un .partial laissé par un
+crash contient tous les lots déjà synchronisés; recover_partials en récupère
+les lignes complètes (le dernier membre peut être tronqué) et le finalise.
+Le sink garde un verrou exclusif sur son .partial tant qu'il l'écrit (libéré
+par le système si le processus meurt): recover_partials ne touche donc
+jamais au fichier d'un autre shard ou d'une autre collecte encore en cours
+"""
+
+import gzip
+import json
+import logging
+import os
+import re
+import sys
+import time
+import zlib
+from typing import Dict, Iterator, List
+
+if sys.platform == 'win32':
+    import msvcrt
+else:
+    import fcntl
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500                 # Enregistrements par membre gzip (et par fsync)
+MAX_RECORDS_PER_FILE = 50_000    # Rotation du fichier au-delà
+EXTENSION = ".jsonl.gz"
+PARTIAL_SUFFIX = ".partial"
+STALE_EMPTY_SECONDS = 60         # .partial vide et non verrouillé depuis plus longtemps: abandonné
+
+# Date de collecte dans les noms de fichiers: rss_articles_2025-01-31_060012_<id>-000.jsonl.gz,
+# et dans les anciennes archives à la minute ou au jour (posts_2025-10-22.json)
+_COLLECTION_TIME = re.compile(r"\d{4}-\d{2}-\d{2}(?:_\d{4,6})?")
+
+
+def collection_time(path: str) -> str:
+    """
+    Date de collecte contenue dans un nom de fichier, à utiliser comme clé de
+    tri chronologique quel que soit le préfixe de la source. Pour une archive
+    sans date (newsapi_articles.json), date de dernière modification du fichier
+    ('' s'il n'existe pas)
+    """
+    match = _COLLECTION_TIME.search(os.path.basename(path))
+    if match:
+        return match.group(0)
+    try:
+        return time.strftime("%Y-%m-%d_%H%M%S", time.localtime(os.path.getmtime(path)))
+    except OSError:
+        return ""
+
+
+def read_records(path) -> Iterator[Dict]:
+    """
+    Enregistrements d'un fichier JSONL gzip (chemin ou fichier ouvert en
+    binaire); s'arrête proprement sur une fin tronquée
+    """
+    try:
+        with gzip.open(path, 'rb') as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                yield json.loads(line)
+    except (EOFError, gzip.BadGzipFile, zlib.error) as e:
+        logger.warning(f"[JSONL] Fin de fichier tronquee ignoree: {os.path.basename(getattr(path, 'name', path))} ({e})")
+
+
+def _lock(file, blocking: bool = True) -> bool:
+    """Verrou exclusif sur un fichier ouvert; sans attente, False s'il est déjà pris"""
+    try:
+        if sys.platform == 'win32':
+            # Verrou sur le premier octet: les écritures se font toujours en fin de fichier
+            file.seek(0)
+            msvcrt.locking(file.fileno(), msvcrt.LK_LOCK if blocking else msvcrt.LK_NBLCK, 1)
+        else:
+            fcntl.flock(file.fileno(), fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return True
+    except OSError:
+        return False
+
+
+def publish(source: str, final: str) -> str:
+    """
+    Renomme source en final sans jamais écraser un fichier existant: en cas
+    de collision, le fichier prend le suffixe libre suivant (-000.1.jsonl.gz...).
+    Retourne le chemin retenu
+    """
+    stem, attempt, target = final[:-len(EXTENSION)], 0, final
+    while True:
+        try:
+            if sys.platform == 'win32':
+                os.rename(source, target)       # Refuse d'écraser sous Windows
+            else:
+                os.link(source, target)         # Idem: échoue si la cible existe
+                os.remove(source)
+            return target
+        except FileExistsError:
+            attempt += 1
+            target = f"{stem}.{attempt}{EXTENSION}"
+
+
+def recover_partials(directory: str) -> List[str]:
+    """
+    Finalise les fichiers .partial laissés par un crash; ceux qu'un sink
+    vivant tient verrouillés sont laissés en place. Retourne les fichiers
+    finalisés (à enregistrer dans le catalogue comme ceux d'une collecte)
+    """
+    if not os.path.isdir(directory):
+        return []
+    recovered = []
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith(EXTENSION + PARTIAL_SUFFIX):
+            continue
+        partial = os.path.join(directory, name)
+        final = partial[:-len(PARTIAL_SUFFIX)]
+        try:
+            handle = open(partial, 'rb')
+        except FileNotFoundError:
+            continue   # Finalisé entre-temps par son propriétaire
+        with handle:
+            if not _lock(handle, blocking=False):
+                continue   # Encore écrit par un sink vivant
+            status = os.fstat(handle.fileno())
+            if status.st_size == 0 and time.time() - status.st_mtime < STALE_EMPTY_SECONDS:
+                continue   # Tout juste créé: son sink va le verrouiller
+            # Lu par le descripteur verrouillé (sous Windows, le verrou bloque les autres)
+            handle.seek(0)
+            records = list(read_records(handle))
+            if records:
+                tmp_file = final + ".tmp"
+                with gzip.open(tmp_file, 'wb') as f:
+                    f.write(b"".join(_encode(r) for r in records))
+                recovered.append(publish(tmp_file, final))
+        os.remove(partial)
+        logger.warning(f"[JSONL] {name}: {len(records)} enregistrements recuperes apres interruption")
+    return recovered
+
+
+def _encode(record: Dict) -> bytes:
+    return (json.dumps(record, ensure_ascii=False, default=str) + "\n").encode('utf-8')
+
+
+class JsonlSink:
+    """Écrit des enregistrements au fil de l'eau dans des fichiers JSONL gzip tournants"""
+
+    def __init__(self, base_path: str, batch_size: int = BATCH_SIZE,
+                 max_records_per_file: int = MAX_RECORDS_PER_FILE):
+        self.base_path = base_path
+        self.batch_size = batch_size
+        self.max_records_per_file = max_records_per_file
+        self.count = 0                 # Enregistrements écrits depuis l'ouverture
+        self.paths: List[str] = []     # Fichiers finalisés
+        self._batch: List[bytes] = []
+        self._part = 0
+        self._in_file = 0
+        self._file = None
+
+    def __enter__(self) -> "JsonlSink":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # Même après une erreur, les enregistrements déjà reçus sont conservés
+        self.close()
+
+    @property
+    def current_path(self) -> str:
+        return f"{self.base_path}-{self._part:03d}{EXTENSION}"
+
+    def write(self, record: Dict):
+        self._batch.append(_encode(record))
+        self.count += 1
+        self._in_file += 1
+        if len(self._batch) >= self.batch_size:
+            self.flush()
+        if self._in_file >= self.max_records_per_file:
+            self._rotate()
+
+    def flush(self):
+        """Ajoute le lot en attente comme membre gzip et le synchronise sur disque"""
+        if not self._batch:
+            return
+        if self._file is None:
+            os.makedirs(os.path.dirname(self.base_path) or ".", exist_ok=True)
+            self._file = open(self.current_path + PARTIAL_SUFFIX, 'ab')
+            # Gardé jusqu'au renommage: signale aux autres processus que le fichier est vivant
+            _lock(self._file)
+        self._file.write(gzip.compress(b"".join(self._batch)))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._batch = []
+
+    def _rotate(self):
+        """Finalise le fichier courant (renommage atomique) et passe au suivant"""
+        self.flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            path = publish(self.current_path + PARTIAL_SUFFIX, self.current_path)
+            self.paths.append(path)
+            logger.info(f"[OK] Sauvegarde: {path} ({self._in_file} entrees)")
+            self._part += 1
+        self._in_file = 0
+
+    def close(self) -> List[str]:
+        """Finalise le dernier fichier; retourne la liste des fichiers écrits"""
+        self._rotate()
+        return self.paths
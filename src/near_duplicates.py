@@ -0,0 +1,178 @@
+"""
+Détection des quasi-doublons entre sources (MinHash + LSH par bandes)
+Une même dépêche AP/AFP reprise par CNN_World, Guardian_World et une dizaine
+de feeds régionaux n'a jamais exactement le même titre + lien: le hash de
+contenu la compte plusieurs fois. Ici chaque article reçoit une signature
+MinHash des mots de son titre (le seul texte commun à RSS, scraping et
+Reddit); deux articles dont la similarité de Jaccard estimée dépasse
+SIMILARITY_THRESHOLD racontent la même histoire et partagent un
+story_cluster_id.
+
+Recherche: la signature (NUM_PERM valeurs de 16 bits) est découpée en BANDS
+bandes de ROWS valeurs; chaque bande forme une clé de 64 bits. Seuls les
+articles qui partagent au moins une clé sont comparés, soit une requête sur
+la clé primaire de la table des bandes par article, quelle que soit la
+taille de l'index
+"""
+
+import hashlib
+import logging
+import random
+import re
+import sqlite3
+import struct
+import threading
+import time
+from array import array
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+# --------------------------
+# Configuration
+# --------------------------
+NUM_PERM = 32                  # Valeurs MinHash par signature
+BANDS = 8                      # 8 bandes de 4 valeurs: seuil LSH ~ (1/8)^(1/4) = 0.59
+ROWS = NUM_PERM // BANDS
+SIMILARITY_THRESHOLD = 0.6     # Jaccard estimé minimal pour fusionner deux articles
+MIN_WORDS = 4                  # En dessous, pas assez de mots pour juger
+TTL_DAYS = 28                  # Même rétention que les hashes de contenu
+PURGE_EVERY_SECONDS = 86400    # Purge des signatures expirées au plus une fois par jour
+
+_MERSENNE = (1 << 61) - 1
+_rng = random.Random(20251022)  # Graine fixe: les signatures doivent rester comparables
+_PERMUTATIONS = [(_rng.randrange(1, _MERSENNE), _rng.randrange(0, _MERSENNE)) for _ in range(NUM_PERM)]
+_SIGNATURE = struct.Struct(f'>{NUM_PERM}H')
+_ROWS = struct.Struct(f'>{ROWS}H')
+_BAND = struct.Struct('>q')
+_SIGN = 1 << 63                # Décalage des clusters (64 bits non signés) vers un INTEGER SQLite
+_FIND_QUERY = ("SELECT DISTINCT s.id, s.cluster, s.signature FROM bands b JOIN signatures s ON s.id = b.id "
+               "WHERE (" + " OR ".join(["(b.band = ? AND b.key = ?)"] * BANDS) + ") AND s.first_seen >= ?")
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+def minhash(text: str) -> Optional[array]:
+    """Signature MinHash (NUM_PERM entiers de 16 bits) des mots du texte, None si trop court"""
+    words = set(_WORD.findall(text.lower()))
+    if len(words) < MIN_WORDS:
+        return None
+    hashes = [int.from_bytes(hashlib.blake2b(w.encode('utf-8'), digest_size=8).digest(), 'big')
+              for w in words]
+    return array('H', (min((a * h + b) % _MERSENNE for h in hashes) & 0xFFFF
+                       for a, b in _PERMUTATIONS))
+
+
+def similarity(sig_a, sig_b) -> float:
+    """Similarité de Jaccard estimée: part des valeurs MinHash identiques"""
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / NUM_PERM
+
+
+def _band_keys(signature) -> List[int]:
+    """Une clé par bande: ses ROWS valeurs de 16 bits, en entier signé de 64 bits (INTEGER SQLite)"""
+    return [_BAND.unpack(_ROWS.pack(*signature[band * ROWS:(band + 1) * ROWS]))[0]
+            for band in range(BANDS)]
+
+
+class NearDuplicateIndex:
+    """
+    Index incrémental des signatures dans une base SQLite (mode WAL): seules
+    les pages lues restent en mémoire et l'ouverture ne charge rien, quelle que
+    soit la taille de l'index. Plusieurs processus peuvent partager la même
+    base; l'attribution d'un cluster est une transaction, deux workers ne
+    créent donc pas deux clusters pour la même histoire
+    """
+
+    def __init__(self, db_file: str, ttl_days: int = TTL_DAYS, busy_timeout: float = 30.0):
+        self.db_file = db_file
+        self.ttl_seconds = ttl_days * 86400
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(db_file, timeout=busy_timeout, check_same_thread=False,
+                                   isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS signatures (id INTEGER PRIMARY KEY, "
+                         "cluster INTEGER NOT NULL, first_seen INTEGER NOT NULL, signature BLOB NOT NULL)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS signatures_first_seen ON signatures (first_seen)")
+        # Une table pour toutes les bandes: (bande, clé) -> premier article qui l'a produite
+        self._db.execute("CREATE TABLE IF NOT EXISTS bands (band INTEGER, key INTEGER, id INTEGER NOT NULL, "
+                         "PRIMARY KEY (band, key)) WITHOUT ROWID")
+        logger.info(f"[QuasiDoublons] {len(self):,} signatures dans {db_file}")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM signatures").fetchone()[0]
+
+    def find(self, signature) -> Optional[int]:
+        """
+        Cluster de l'article indexé le plus semblable (au-dessus du seuil),
+        sinon None; une seule requête sur la clé primaire des bandes
+        """
+        params = [value for band, key in enumerate(_band_keys(signature)) for value in (band, key)]
+        rows = self._db.execute(_FIND_QUERY, params + [int(time.time() - self.ttl_seconds)]).fetchall()
+        best, best_score = None, SIMILARITY_THRESHOLD
+        for _, cluster, candidate in rows:
+            score = similarity(signature, _SIGNATURE.unpack(candidate))
+            if score >= best_score:
+                best, best_score = cluster + _SIGN, score
+        return best
+
+    def assign(self, text: str, content_hash: str) -> str:
+        """
+        Retourne le story_cluster_id de l'article: celui d'une histoire déjà vue
+        s'il en est proche, sinon un nouveau cluster identifié par son propre hash
+        """
+        own_cluster = int(content_hash[:16], 16)
+        signature = minhash(text)
+        if signature is None:
+            return f"{own_cluster:016x}"
+
+        with self._lock:
+            # BEGIN IMMEDIATE: recherche + insertion atomiques entre processus
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                cluster = self.find(signature)
+                if cluster is None:
+                    cluster = own_cluster
+                row_id = self._db.execute("INSERT INTO signatures (cluster, first_seen, signature) "
+                                          "VALUES (?, ?, ?)",
+                                          (cluster - _SIGN, int(time.time()),
+                                           _SIGNATURE.pack(*signature))).lastrowid
+                self._db.executemany("INSERT OR IGNORE INTO bands VALUES (?, ?, ?)",
+                                     ((band, key, row_id) for band, key in enumerate(_band_keys(signature))))
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return f"{cluster:016x}"
+
+    def save(self):
+        """
+        Chaque attribution est déjà validée: il ne reste qu'à purger les
+        signatures expirées, au plus une fois par jour (la recherche les
+        ignore déjà)
+        """
+        cutoff = int(time.time() - self.ttl_seconds)
+        with self._lock:
+            oldest = self._db.execute("SELECT MIN(first_seen) FROM signatures").fetchone()[0]
+            if oldest is not None and oldest < cutoff - PURGE_EVERY_SECONDS:
+                self._purge(cutoff)
+        logger.info(f"[QuasiDoublons] {len(self):,} signatures indexees")
+
+    def _purge(self, cutoff: int):
+        """Supprime les signatures expirées et les clés de bande qui y mènent"""
+        # Les identifiants croissent avec first_seen: tout ce qui précède la dernière expirée part
+        last = self._db.execute("SELECT MAX(id) FROM signatures WHERE first_seen < ?", (cutoff,)).fetchone()[0]
+        if last is None:
+            return
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            self._db.execute("DELETE FROM bands WHERE id <= ?", (last,))
+            removed = self._db.execute("DELETE FROM signatures WHERE id <= ?", (last,)).rowcount
+            self._db.execute("COMMIT")
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+        logger.info(f"[QuasiDoublons] {removed:,} signatures expirees supprimees")
+
+    def close(self):
+        self._db.close()
@@ -0,0 +1,121 @@
+"""
+Classification des articles par type de news (mots-clés)
+Tous les mots-clés des six catégories sont compilés une seule fois, à
+l'import, en une expression régulière (arbre de préfixes): un seul parcours
+du texte donne le score de chaque catégorie, au lieu d'une recherche de
+sous-chaîne par mot-clé. Les mots-clés
+sont reconnus comme mots entiers (avec un éventuel pluriel en 's'): 'ai' ne
+correspond plus à "said", ni 'app' à "happen". Un mot-clé terminé par '*' est
+un radical: 'technolog*' couvre technology, technologies, technologique...
+
+Un mot-clé compte une fois par texte, même s'il y apparaît plusieurs fois;
+la catégorie la mieux notée l'emporte ('general' si aucun mot-clé)
+"""
+
+import re
+from typing import Dict, Iterable, List
+
+# Ordre des catégories = ordre de départage en cas d'égalité
+CATEGORY_KEYWORDS = {
+    'technology': ('ai', 'intelligence artificielle', 'tech', 'technolog*', 'software',
+                   'app', 'digital', 'cyber*', 'robot*', 'internet', 'data', 'algorithm*',
+                   'startup', 'google', 'apple', 'microsoft', 'meta', 'tesla'),
+    'business': ('business', 'market', 'stock', 'économie', 'economy', 'finance',
+                 'bank', 'trade', 'invest*', 'company', 'ceo', 'entreprise',
+                 'dollar', 'euro', 'bourse', 'croissance'),
+    'politics': ('politic*', 'government', 'election', 'president', 'minister',
+                 'parlement', 'vote', 'law', 'congress', 'senate', 'diplomacy',
+                 'gouvernement', 'ministre', 'député'),
+    'science': ('science', 'research', 'study', 'scientist', 'discover*',
+                'space', 'nasa', 'climat*', 'climate', 'environment', 'energy',
+                'médical', 'health', 'covid', 'vaccine', 'cancer'),
+    'sports': ('sport', 'football', 'basketball', 'tennis', 'match', 'game',
+               'player', 'team', 'champion*', 'olympic*', 'world cup', 'league'),
+    'entertainment': ('film', 'movie', 'music', 'actor', 'celebrity', 'hollywood',
+                      'series', 'tv', 'concert', 'album', 'netflix', 'disney'),
+}
+CATEGORIES = tuple(CATEGORY_KEYWORDS)
+DEFAULT_CATEGORY = 'general'
+
+# Catégories NewsAPI -> catégories du classifieur ('health' n'a pas de mots-clés propres)
+NEWSAPI_LABELS = {'health': 'science', 'general': DEFAULT_CATEGORY}
+
+
+def to_category(label: str) -> str:
+    """Ramène une catégorie NewsAPI dans l'ensemble des catégories ci-dessus"""
+    return NEWSAPI_LABELS.get(label, label)
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """
+    Alternative regex en forme d'arbre de préfixes ('a(?:i|pp(?:le)?)' pour
+    ai, app, apple): le moteur écarte une branche dès le premier caractère
+    au lieu d'essayer chaque mot-clé à chaque position
+    """
+    trie: Dict = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node: Dict) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        # Le plus long d'abord (quantificateur gourmand): 'apple' avant 'app'
+        return f'(?:{body})?' if '' in node else body
+
+    return build(trie)
+
+
+def _compile():
+    keyword_category: Dict[str, int] = {}
+    words, stems = [], []
+    for index, keywords in enumerate(CATEGORY_KEYWORDS.values()):
+        for kw in keywords:
+            kw_text = kw.rstrip('*')
+            keyword_category[kw_text] = index
+            (stems if kw.endswith('*') else words).append(kw_text)
+    # Groupe 1: mot entier (pluriel accepté); groupe 2: radical suivi de n'importe quelle fin.
+    # Un mot du texte compte pour un seul mot-clé, le mot entier en priorité
+    pattern = re.compile(rf"\b(?:({_trie_pattern(words)})s?(?!\w)|({_trie_pattern(stems)})\w*)")
+    return pattern, keyword_category
+
+
+_PATTERN, _KEYWORD_CATEGORY = _compile()
+
+
+def _keywords_in(text: str) -> set:
+    """Mots-clés distincts présents dans un texte déjà en minuscules"""
+    return {word or stem for word, stem in _PATTERN.findall(text)}
+
+
+def _best(found: Iterable[str]) -> str:
+    counts = [0] * len(CATEGORIES)
+    for kw in found:
+        counts[_KEYWORD_CATEGORY[kw]] += 1
+    best = max(range(len(counts)), key=counts.__getitem__)
+    return CATEGORIES[best] if counts[best] else DEFAULT_CATEGORY
+
+
+def scores(text: str) -> Dict[str, int]:
+    """Nombre de mots-clés distincts de chaque catégorie présents dans le texte"""
+    counts = dict.fromkeys(CATEGORIES, 0)
+    for kw in _keywords_in(text.lower()):
+        counts[CATEGORIES[_KEYWORD_CATEGORY[kw]]] += 1
+    return counts
+
+
+def classify(title: str, summary: str = "", category: str = "") -> str:
+    """Type de news d'un article; une catégorie déjà fournie (NewsAPI) est gardée telle quelle"""
+    if category:
+        return category
+    return _best(_keywords_in((title + " " + summary).lower()))
+
+
+def classify_batch(texts: Iterable[str]) -> List[str]:
+    """Type de news de chaque texte d'un lot (titres, titre + résumé...)"""
+    findall, best = _PATTERN.findall, _best
+    return [best({word or stem for word, stem in findall(text.lower())}) for text in texts]
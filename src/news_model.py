@@ -0,0 +1,288 @@
+"""
+Classifieur de type de news entraînable (hashing trick + modèle linéaire)
+Les articles NewsAPI arrivent avec une catégorie fiable: ils servent à
+entraîner un classifieur qui étiquette ensuite les titres RSS, Reddit et
+scrapés. Chaque texte devient un sac de mots et de bigrammes hachés (CRC32)
+dans N_FEATURES colonnes, sans vocabulaire à stocker; une régression
+logistique multinomiale est apprise en ligne par descente de gradient,
+lot par lot, et peut donc être complétée à chaque nouvelle collecte.
+
+Les catégories NewsAPI sont ramenées à celles du classifieur par mots-clés
+(health -> science, voir news_classifier.to_category). Une prédiction trop
+incertaine (texte d'une catégorie jamais apprise, comme la politique) donne
+'general', comme un texte sans mot-clé.
+
+Le modèle est sauvegardé dans data/tracking/news_type_model.npz. Les fichiers
+NewsAPI déjà appris sont suivis par le catalogue de data/raw (consommateur
+'news_type_model'): --train n'apprend que les nouveaux. Environ un article
+sur cinq (choisi par hachage du titre, donc toujours le même) est réservé à
+l'évaluation et n'est jamais appris.
+
+Usage:
+    python news_model.py --train
+    python news_model.py --evaluate
+    python news_model.py --classify "Apple unveils a new AI chip"
+"""
+
+import argparse
+import logging
+import os
+import random
+import re
+import time
+import zlib
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+from news_classifier import DEFAULT_CATEGORY, to_category
+
+logger = logging.getLogger(__name__)
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+MODEL_FILE = os.path.join(PROJECT_ROOT, "data", "tracking", "news_type_model.npz")
+CONSUMER = "news_type_model"
+
+# --------------------------
+# Configuration
+# --------------------------
+N_FEATURES = 1 << 18          # Colonnes du hachage (collisions négligeables pour des titres)
+LEARNING_RATE = 0.5
+L2 = 1e-6                     # Régularisation des poids mis à jour
+BATCH_SIZE = 256
+HOLDOUT_MODULO = 5            # 1 article sur 5 réservé à l'évaluation
+MIN_CONFIDENCE = 0.5          # Probabilité minimale de la meilleure classe, sinon DEFAULT_CATEGORY
+
+_TOKEN = re.compile(r"\w+")
+
+
+def features(text: str, n_features: int = N_FEATURES) -> List[int]:
+    """Colonnes des mots et bigrammes du texte (stables d'un processus à l'autre)"""
+    words = _TOKEN.findall(text.lower())
+    grams = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    return [zlib.crc32(g.encode('utf-8')) % n_features for g in grams]
+
+
+def is_holdout(text: str) -> bool:
+    return zlib.crc32(text.encode('utf-8')) % HOLDOUT_MODULO == 0
+
+
+class NewsTypeModel:
+    """Régression logistique multinomiale sur des caractéristiques hachées"""
+
+    def __init__(self, n_features: int = N_FEATURES, classes: Sequence[str] = ()):
+        self.n_features = n_features
+        self.classes: List[str] = list(classes)
+        self.weights = np.zeros((n_features, len(self.classes)), dtype=np.float32)
+        self.bias = np.zeros(len(self.classes), dtype=np.float32)
+        self.trained_examples = 0      # Exemples vus, passes répétées comprises
+
+    # --------------------------
+    # Persistance
+    # --------------------------
+    @classmethod
+    def load(cls, path: str = MODEL_FILE) -> "NewsTypeModel":
+        """Modèle sauvegardé, ou modèle vide si le fichier n'existe pas"""
+        if not os.path.exists(path):
+            return cls()
+        with np.load(path, allow_pickle=False) as data:
+            model = cls(int(data['n_features']), [str(c) for c in data['classes']])
+            model.weights = data['weights']
+            model.bias = data['bias']
+            model.trained_examples = int(data['trained_examples'])
+        logger.info(f"[Modele] {model.trained_examples:,} exemples appris, classes: {', '.join(model.classes)}")
+        return model
+
+    def save(self, path: str = MODEL_FILE):
+        # Écriture dans un fichier temporaire puis remplacement: jamais de modèle à moitié écrit
+        temp_path = path + ".tmp.npz"
+        np.savez_compressed(temp_path, n_features=self.n_features, classes=np.array(self.classes),
+                            weights=self.weights, bias=self.bias,
+                            trained_examples=self.trained_examples)
+        os.replace(temp_path, path)
+
+    @property
+    def ready(self) -> bool:
+        return self.trained_examples > 0
+
+    # --------------------------
+    # Prédiction
+    # --------------------------
+    def _vectorize(self, texts: Sequence[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Colonnes, numéro du texte et valeur (1/sqrt(n), texte normalisé) de chaque caractéristique"""
+        columns, rows, values = [], [], []
+        for row, text in enumerate(texts):
+            cols = features(text, self.n_features)
+            if cols:
+                columns.extend(cols)
+                rows.extend([row] * len(cols))
+                values.extend([len(cols) ** -0.5] * len(cols))
+        return (np.array(columns, dtype=np.int64), np.array(rows, dtype=np.int64),
+                np.array(values, dtype=np.float32))
+
+    def _scores(self, columns: np.ndarray, rows: np.ndarray, values: np.ndarray, count: int) -> np.ndarray:
+        contributions = self.weights[columns] * values[:, None]
+        scores = np.tile(self.bias, (count, 1))
+        for k in range(len(self.classes)):
+            scores[:, k] += np.bincount(rows, weights=contributions[:, k], minlength=count)
+        return scores
+
+    def predict(self, texts: Sequence[str], min_confidence: float = MIN_CONFIDENCE) -> List[str]:
+        """
+        Type de news le plus probable de chaque texte, DEFAULT_CATEGORY si sa
+        probabilité est sous min_confidence (ou si le modèle n'est pas entraîné)
+        """
+        texts = list(texts)
+        if not self.ready or not texts:
+            return [DEFAULT_CATEGORY] * len(texts)
+        scores = self._scores(*self._vectorize(texts), len(texts))
+        scores -= scores.max(axis=1, keepdims=True)
+        probabilities = np.exp(scores)
+        probabilities /= probabilities.sum(axis=1, keepdims=True)
+        # Modèles appris avant la correspondance des catégories: 'health' -> 'science'
+        classes = [to_category(c) for c in self.classes]
+        return [classes[k] if probabilities[row, k] >= min_confidence else DEFAULT_CATEGORY
+                for row, k in enumerate(probabilities.argmax(axis=1))]
+
+    # --------------------------
+    # Apprentissage
+    # --------------------------
+    def _add_classes(self, labels: Iterable[str]):
+        new = sorted(set(labels) - set(self.classes))
+        if new:
+            self.classes += new
+            self.weights = np.hstack([self.weights, np.zeros((self.n_features, len(new)), dtype=np.float32)])
+            self.bias = np.concatenate([self.bias, np.zeros(len(new), dtype=np.float32)])
+
+    def partial_fit(self, texts: Sequence[str], labels: Sequence[str],
+                    learning_rate: float = LEARNING_RATE) -> float:
+        """Une passe de gradient sur les exemples, par lots; retourne la perte moyenne"""
+        self._add_classes(labels)
+        index = {c: k for k, c in enumerate(self.classes)}
+        total_loss = 0.0
+        for start in range(0, len(texts), BATCH_SIZE):
+            batch = texts[start:start + BATCH_SIZE]
+            targets = np.array([index[l] for l in labels[start:start + BATCH_SIZE]])
+            columns, rows, values = self._vectorize(batch)
+            scores = self._scores(columns, rows, values, len(batch))
+
+            # Softmax puis gradient de l'entropie croisée
+            scores -= scores.max(axis=1, keepdims=True)
+            probabilities = np.exp(scores)
+            probabilities /= probabilities.sum(axis=1, keepdims=True)
+            total_loss -= float(np.log(probabilities[np.arange(len(batch)), targets] + 1e-12).sum())
+            gradient = probabilities
+            gradient[np.arange(len(batch)), targets] -= 1
+            # Caractéristiques creuses: pas par exemple (comme une SGD exemple par
+            # exemple), la moyenne du lot rendrait chaque mot presque immobile
+            gradient *= learning_rate
+
+            touched = np.unique(columns)
+            self.weights[touched] *= (1 - learning_rate * L2)
+            np.subtract.at(self.weights, columns, gradient[rows] * values[:, None])
+            self.bias -= gradient.mean(axis=0)
+        self.trained_examples += len(texts)
+        return total_loss / max(1, len(texts))
+
+
+# --------------------------
+# Données NewsAPI
+# --------------------------
+def labelled_examples(records: Iterable[Dict]) -> List[Tuple[str, str]]:
+    """
+    (titre + description, catégorie) des articles NewsAPI catégorisés, la
+    catégorie ramenée à celles du classifieur par mots-clés
+    """
+    examples = []
+    for record in records:
+        title, category = record.get('title'), record.get('category')
+        if title and category and isinstance(title, str):
+            examples.append((f"{title} {record.get('description') or ''}", to_category(str(category))))
+    return examples
+
+
+def train_from_catalog(model: NewsTypeModel, catalog, epochs: int = 1,
+                       model_path: str = MODEL_FILE) -> int:
+    """
+    Apprend les fichiers NewsAPI du catalogue jamais vus par le modèle;
+    retourne le nombre d'exemples. Le modèle est sauvegardé avant que les
+    fichiers soient marqués lus: une sauvegarde interrompue les laisse à
+    apprendre à la prochaine fois
+    """
+    from raw_catalog import read_raw_file
+
+    entries = catalog.pending(CONSUMER, source_type='newsapi')
+    examples = []
+    for entry in entries:
+        records = read_raw_file(catalog.absolute(entry['path']))
+        examples += [e for e in labelled_examples(records or []) if not is_holdout(e[0])]
+    if examples:
+        for epoch in range(epochs):
+            random.Random(epoch).shuffle(examples)
+            texts, labels = zip(*examples)
+            loss = model.partial_fit(list(texts), list(labels))
+            logger.info(f"[Modele] Passe {epoch + 1}/{epochs}: {len(examples):,} exemples, perte {loss:.3f}")
+        model.save(model_path)
+    catalog.mark_ingested(CONSUMER, entries)
+    return len(examples)
+
+
+def holdout_examples(catalog) -> List[Tuple[str, str]]:
+    from raw_catalog import read_raw_file
+
+    examples = []
+    for path in catalog.paths(source_type='newsapi'):
+        examples += [e for e in labelled_examples(read_raw_file(path) or []) if is_holdout(e[0])]
+    return examples
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Classifieur de type de news entrainable")
+    parser.add_argument('--model', default=MODEL_FILE)
+    parser.add_argument('--raw-dir', default=os.path.join(PROJECT_ROOT, "data", "raw"))
+    parser.add_argument('--db', default=os.path.join(PROJECT_ROOT, "data", "tracking", "raw_catalog.sqlite"))
+    parser.add_argument('--train', action='store_true', help='Apprend les nouveaux fichiers NewsAPI')
+    parser.add_argument('--epochs', type=int, default=3)
+    parser.add_argument('--evaluate', action='store_true',
+                        help='Exactitude et debit sur les articles reserves, face aux mots-cles')
+    parser.add_argument('--classify', nargs='+', metavar='TEXTE')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    from raw_catalog import RawCatalog
+    model = NewsTypeModel.load(args.model)
+
+    if args.train:
+        catalog = RawCatalog(args.db, args.raw_dir)
+        catalog.refresh()
+        learned = train_from_catalog(model, catalog, args.epochs, args.model)
+        print(f"{learned:,} nouveaux exemples appris ({model.trained_examples:,} au total)")
+
+    if args.evaluate:
+        import news_classifier
+        catalog = RawCatalog(args.db, args.raw_dir)
+        if not args.train:
+            catalog.refresh()
+        examples = holdout_examples(catalog)
+        if not examples:
+            print("Aucun article NewsAPI reserve a l'evaluation")
+            return
+        texts, labels = [t for t, _ in examples], [l for _, l in examples]
+        start = time.perf_counter()
+        predicted = model.predict(texts)
+        seconds = time.perf_counter() - start
+        keywords = news_classifier.classify_batch(texts)
+        # Étiquettes déjà ramenées aux catégories des mots-clés (labelled_examples)
+        print(f"{len(examples):,} articles reserves")
+        print(f"  modele    : {sum(p == l for p, l in zip(predicted, labels)) / len(labels):.1%} "
+              f"({len(texts) / seconds:,.0f} textes/s)")
+        print(f"  mots-cles : {sum(p == l for p, l in zip(keywords, labels)) / len(labels):.1%}")
+
+    if args.classify:
+        for text, label in zip(args.classify, model.predict(args.classify)):
+            print(f"{label:>14}  {text}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+"""
+Catalogue des fichiers de collecte de data/raw (SQLite)
+Pour chaque fichier: type de source, format, nombre de lignes, dates de
+publication min / max, taille et somme de contrôle. Le catalogue est mis à
+jour à chaque sauvegarde; les analyses interrogent le catalogue au lieu de
+lister les dossiers et d'ouvrir chaque fichier:
+
+    catalog = RawCatalog(db_file, raw_dir)
+    catalog.files(source_type="rss", start="2025-10-22", end="2025-10-23")
+
+La table ingested retient, par consommateur (compaction, backfill...), les
+fichiers déjà traités et leur somme de contrôle: un fichier modifié redevient
+à traiter
+"""
+
+import argparse
+import csv
+import gzip
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+
+# Champ de date de chaque type de source (le premier renseigné est retenu)
+DATE_FIELDS = ('published', 'publishedAt', 'created_utc', 'retrieved_date')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,          -- relatif à data/raw, séparateurs '/'
+    source_type TEXT NOT NULL,
+    format TEXT NOT NULL,
+    rows INTEGER NOT NULL,
+    min_published TEXT,             -- ISO 8601 UTC, NULL si aucune date
+    max_published TEXT,
+    bytes INTEGER NOT NULL,
+    checksum TEXT NOT NULL,         -- SHA-256 du fichier
+    cataloged_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS files_by_source_date ON files (source_type, max_published, min_published);
+CREATE TABLE IF NOT EXISTS ingested (
+    consumer TEXT NOT NULL,
+    path TEXT NOT NULL,
+    checksum TEXT NOT NULL,
+    ingested_at TEXT NOT NULL,
+    PRIMARY KEY (consumer, path)
+);
+"""
+
+
+def normalize_date(value) -> Optional[str]:
+    """Date ISO 8601 UTC (sans fuseau) à partir des formats des collecteurs, None si illisible"""
+    if not value:
+        return None
+    value = str(value).strip()
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        try:
+            parsed = parsedate_to_datetime(value)   # RFC 822 des feeds RSS
+        except (TypeError, ValueError):
+            return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed.isoformat(timespec='seconds')
+
+
+def record_date(record: Dict) -> Optional[str]:
+    for field in DATE_FIELDS:
+        if record.get(field):
+            return normalize_date(record[field])
+    return None
+
+
+def file_checksum(path: str) -> str:
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def read_raw_file(path: str) -> Optional[Iterable[Dict]]:
+    """Enregistrements d'un fichier JSON, JSONL gzip ou CSV (None si illisible, ex: pointeur Git LFS)"""
+    try:
+        if path.endswith('.jsonl.gz'):
+            with gzip.open(path, 'rb') as f:
+                return [json.loads(line) for line in f if line.endswith(b"\n")]
+        if path.endswith('.csv'):
+            with open(path, 'r', encoding='utf-8', newline='') as f:
+                return list(csv.DictReader(f))
+        if path.endswith('.json'):
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return data if isinstance(data, list) else None
+    except (ValueError, UnicodeDecodeError, EOFError, OSError, csv.Error):
+        return None
+    return None
+
+
+def file_format(path: str) -> str:
+    name = os.path.basename(path)
+    return name.split('.', 1)[1] if '.' in name else ""
+
+
+class RawCatalog:
+    """Index SQLite des fichiers de data/raw"""
+
+    def __init__(self, db_file: str, raw_dir: str):
+        self.db_file = db_file
+        self.raw_dir = raw_dir
+        self._lock = threading.Lock()
+        # Les workers de sharded_collector.py écrivent en même temps
+        self._db = sqlite3.connect(db_file, timeout=30, check_same_thread=False)
+        self._db.executescript(_SCHEMA)
+
+    def close(self):
+        self._db.close()
+
+    def relative(self, path: str) -> str:
+        return os.path.relpath(os.path.abspath(path), os.path.abspath(self.raw_dir)).replace(os.sep, '/')
+
+    def absolute(self, relative_path: str) -> str:
+        return os.path.join(self.raw_dir, *relative_path.split('/'))
+
+    # --------------------------
+    # Mise à jour
+    # --------------------------
+    def register(self, path: str, records: Iterable[Dict], source_type: Optional[str] = None):
+        """
+        Enregistre (ou met à jour) un fichier écrit; records est parcouru une
+        seule fois, un générateur suffit
+        """
+        rows = 0
+        min_published = max_published = None
+        for record in records:
+            rows += 1
+            published = record_date(record)
+            if published is None:
+                continue
+            if min_published is None or published < min_published:
+                min_published = published
+            if max_published is None or published > max_published:
+                max_published = published
+
+        relative = self.relative(path)
+        source_type = source_type or relative.split('/', 1)[0]
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (relative, source_type, file_format(path), rows, min_published, max_published,
+                 os.path.getsize(path), file_checksum(path), datetime.now().isoformat(timespec='seconds')))
+        logger.debug(f"[Catalogue] {relative}: {rows} lignes, {min_published} -> {max_published}")
+
+    def forget(self, path: str):
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM files WHERE path = ?", (self.relative(path),))
+
+    def refresh(self) -> int:
+        """
+        Catalogue les fichiers de data/raw absents de l'index (historique
+        antérieur au catalogue) et oublie ceux qui ont disparu
+        """
+        with self._lock:
+            known = {row[0] for row in self._db.execute("SELECT path FROM files")}
+        on_disk = set()
+        added = 0
+        for root, _, names in os.walk(self.raw_dir):
+            for name in names:
+                path = os.path.join(root, name)
+                relative = self.relative(path)
+                on_disk.add(relative)
+                if relative in known:
+                    continue
+                records = read_raw_file(path)
+                if records is None:
+                    continue
+                self.register(path, records)
+                added += 1
+        with self._lock, self._db:
+            self._db.executemany("DELETE FROM files WHERE path = ?",
+                                 [(p,) for p in known - on_disk])
+        logger.info(f"[Catalogue] {added} fichiers ajoutes, {len(known - on_disk)} retires")
+        return added
+
+    # --------------------------
+    # Requêtes
+    # --------------------------
+    def files(self, source_type: Optional[str] = None, start: Optional[str] = None,
+              end: Optional[str] = None, formats: Optional[Iterable[str]] = None) -> List[Dict]:
+        """
+        Fichiers dont l'intervalle de publication recoupe [start, end] (bornes
+        ISO, incluses; une date seule couvre toute la journée de end).
+        Les fichiers sans date ne sont retenus que sans filtre de date
+        """
+        query, params = "SELECT * FROM files WHERE 1 = 1", []
+        if source_type:
+            query += " AND source_type = ?"
+            params.append(source_type)
+        if formats:
+            formats = list(formats)
+            query += f" AND format IN ({','.join('?' * len(formats))})"
+            params += formats
+        if start:
+            query += " AND max_published >= ?"
+            params.append(normalize_date(start))
+        if end:
+            query += " AND min_published <= ?"
+            # Une date seule (YYYY-MM-DD) inclut toute la journée
+            params.append(normalize_date(end) if len(end) > 10 else end + 'T23:59:59')
+        query += " ORDER BY min_published, path"
+
+        with self._lock:
+            cursor = self._db.execute(query, params)
+            columns = [c[0] for c in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor]
+
+    def paths(self, **filters) -> List[str]:
+        """Chemins absolus des fichiers retenus par files()"""
+        return [self.absolute(f['path']) for f in self.files(**filters)]
+
+    # --------------------------
+    # Suivi des consommateurs
+    # --------------------------
+    def pending(self, consumer: str, **filters) -> List[Dict]:
+        """Fichiers jamais traités par ce consommateur, ou modifiés depuis"""
+        with self._lock:
+            done = dict(self._db.execute(
+                "SELECT path, checksum FROM ingested WHERE consumer = ?", (consumer,)))
+        return [f for f in self.files(**filters) if done.get(f['path']) != f['checksum']]
+
+    def mark_ingested(self, consumer: str, entries: Iterable[Dict]):
+        now = datetime.now().isoformat(timespec='seconds')
+        with self._lock, self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO ingested VALUES (?, ?, ?, ?)",
+                [(consumer, e['path'], e['checksum'], now) for e in entries])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Catalogue des fichiers de data/raw")
+    parser.add_argument('--raw-dir', default=os.path.join(PROJECT_ROOT, "data", "raw"))
+    parser.add_argument('--db', default=os.path.join(PROJECT_ROOT, "data", "tracking", "raw_catalog.sqlite"))
+    parser.add_argument('--refresh', action='store_true', help="Catalogue l'historique non indexe")
+    parser.add_argument('--source')
+    parser.add_argument('--start', help='YYYY-MM-DD ou ISO 8601')
+    parser.add_argument('--end', help='YYYY-MM-DD ou ISO 8601')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    catalog = RawCatalog(args.db, args.raw_dir)
+    if args.refresh:
+        catalog.refresh()
+    for entry in catalog.files(source_type=args.source, start=args.start, end=args.end):
+        print(f"{entry['path']:<60} {entry['rows']:>7,} {entry['min_published'] or '-':>19} "
+              f"{entry['max_published'] or '-':>19} {entry['bytes']:>10,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,333 @@
+"""
+Collecte Reddit concurrente, avec rattrapage par pagination
+Les subreddits sont lus en parallèle (un thread chacun) directement via l'API
+OAuth de Reddit, avec la session HTTP partagée (http_client.py). Pour chaque
+subreddit, le listing /new est parcouru page par page (after=...) jusqu'au
+dernier post déjà vu (identifiant base 36 croissant dans le temps), jusqu'à
+la fenêtre de collecte ou jusqu'à la limite de Reddit (~1000 posts): un
+subreddit très actif comme r/worldnews ne perd plus les posts au-delà des
+100 premiers.
+
+Le quota de l'API est suivi grâce aux en-têtes X-Ratelimit-Remaining et
+X-Ratelimit-Reset, partagé entre les threads: en approchant de la limite,
+les requêtes attendent la nouvelle fenêtre au lieu de recevoir des 429.
+
+AUTH_URL et API_URL sont configurables (REDDIT_AUTH_URL, REDDIT_API_URL) pour
+collecter depuis une fausse API locale (fake_reddit_api.py)
+"""
+
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# --------------------------
+# Configuration
+# --------------------------
+SUBREDDITS = ["worldnews", "news", "technology", "science", "business"]
+AUTH_URL = "https://www.reddit.com"        # Obtention du jeton OAuth
+API_URL = "https://oauth.reddit.com"       # Requêtes authentifiées
+REDDIT_WORKERS = 5            # Subreddits lus en parallèle
+PAGE_SIZE = 100               # Posts par page (maximum accepté par Reddit)
+MAX_PAGES = 10                # Reddit ne remonte pas au-delà de ~1000 posts
+REQUEST_TIMEOUT = 10          # Secondes par requête
+RATE_RESERVE = 5              # Requêtes gardées en réserve sur le quota
+MAX_RETRIES = 2               # Nouvelles tentatives après 429 / erreur serveur
+TOKEN_MARGIN = 60             # Le jeton est renouvelé une minute avant expiration
+
+
+class RedditError(Exception):
+    """Réponse inattendue de l'API Reddit"""
+
+
+def _id_value(post_id: str) -> int:
+    """Identifiant Reddit (base 36, croissant dans le temps) en entier"""
+    return int(post_id, 36)
+
+
+class RateLimiter:
+    """Quota de requêtes de l'API, partagé entre les threads"""
+
+    def __init__(self, reserve: int = RATE_RESERVE):
+        self.reserve = reserve
+        self.remaining: Optional[float] = None   # Inconnu avant la première réponse
+        self.reset_at = 0.0                      # time.monotonic() de la nouvelle fenêtre
+        self.waited = 0.0                        # Secondes passées à attendre le quota
+        self._lock = threading.Lock()
+
+    def acquire(self, deadline: Optional[float] = None) -> bool:
+        """
+        Réserve une requête, en attendant la nouvelle fenêtre si le quota est
+        épuisé; False si cette attente dépasserait deadline
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if self.remaining is not None and now >= self.reset_at:
+                    self.remaining = None
+                if self.remaining is None or self.remaining > self.reserve:
+                    if self.remaining is not None:
+                        self.remaining -= 1
+                    return True
+                wait = self.reset_at - now
+            if deadline is not None and now + wait > deadline:
+                return False
+            if wait >= 1:
+                logger.info(f"[Reddit] Quota presque epuise, attente de {wait:.0f}s")
+            time.sleep(max(0.0, wait))
+            with self._lock:
+                self.waited += wait
+
+    def update(self, headers):
+        """Met à jour le quota d'après les en-têtes d'une réponse"""
+        try:
+            remaining = float(headers['x-ratelimit-remaining'])
+            reset = float(headers['x-ratelimit-reset'])
+        except (KeyError, ValueError):
+            return
+        with self._lock:
+            self.remaining = remaining
+            self.reset_at = time.monotonic() + reset
+
+    def pause(self, seconds: float):
+        """Réponse 429: plus aucune requête pendant seconds secondes"""
+        with self._lock:
+            self.remaining = 0
+            self.reset_at = max(self.reset_at, time.monotonic() + seconds)
+
+
+class RedditAPI:
+    """Accès en lecture seule à l'API Reddit (OAuth « application only »)"""
+
+    def __init__(self, session, client_id: str, client_secret: str, user_agent: str,
+                 auth_url: str = AUTH_URL, api_url: str = API_URL):
+        self.session = session
+        self.client_id = client_id
+        self.client_secret = client_secret
+        # Reddit exige un User-Agent propre à l'application
+        self.headers = {"User-Agent": user_agent}
+        self.auth_url = auth_url.rstrip('/')
+        self.api_url = api_url.rstrip('/')
+        self.rate_limiter = RateLimiter()
+        self.requests = 0
+        self._token = ""
+        self._token_expires = 0.0
+        self._lock = threading.Lock()
+
+    def _access_token(self, renew: bool = False) -> str:
+        """Jeton OAuth, conservé entre les collectes jusqu'à son expiration"""
+        with self._lock:
+            if renew or not self._token or time.monotonic() > self._token_expires - TOKEN_MARGIN:
+                response = self.session.post(f"{self.auth_url}/api/v1/access_token",
+                                             auth=(self.client_id, self.client_secret),
+                                             data={"grant_type": "client_credentials"},
+                                             headers=self.headers, timeout=REQUEST_TIMEOUT)
+                response.raise_for_status()
+                token = response.json()
+                if 'access_token' not in token:
+                    raise RedditError(f"jeton refuse: {token.get('error', token)}")
+                self._token = token['access_token']
+                self._token_expires = time.monotonic() + float(token.get('expires_in', 3600))
+            return self._token
+
+    def get(self, path: str, params: Optional[Dict] = None,
+            deadline: Optional[float] = None) -> Optional[Dict]:
+        """
+        GET authentifié, en respectant le quota; None si l'échéance est
+        atteinte avant que la requête puisse partir
+        """
+        renewed = False
+        for attempt in range(MAX_RETRIES + 1):
+            if not self.rate_limiter.acquire(deadline):
+                return None
+            timeout = REQUEST_TIMEOUT
+            if deadline is not None:
+                timeout = min(timeout, max(1.0, deadline - time.monotonic()))
+            headers = dict(self.headers, Authorization=f"bearer {self._access_token()}")
+            response = self.session.get(f"{self.api_url}{path}", params=params,
+                                        headers=headers, timeout=timeout)
+            with self._lock:
+                self.requests += 1
+            self.rate_limiter.update(response.headers)
+
+            if response.status_code == 401 and not renewed:
+                # Jeton expiré ou révoqué: un seul renouvellement
+                self._access_token(renew=True)
+                renewed = True
+                continue
+            if response.status_code == 429 or response.status_code >= 500:
+                if attempt == MAX_RETRIES:
+                    break
+                try:
+                    retry_after = float(response.headers.get('retry-after', 2 ** attempt))
+                except ValueError:
+                    retry_after = 2 ** attempt
+                if response.status_code == 429:
+                    self.rate_limiter.pause(retry_after)
+                else:
+                    time.sleep(retry_after)
+                continue
+            response.raise_for_status()
+            return response.json()
+        response.raise_for_status()
+        raise RedditError(f"HTTP {response.status_code} apres {MAX_RETRIES + 1} tentatives")
+
+
+@dataclass
+class SubredditResult:
+    """Posts nouveaux d'un subreddit (du plus récent au plus ancien), ou erreur"""
+    subreddit: str
+    posts: List[Dict] = field(default_factory=list)   # Champs 'data' des posts de l'API
+    newest_id: str = ""
+    pages: int = 0
+    complete: bool = False     # Rattrapage mené jusqu'à la marque, à la fenêtre ou au bout du listing
+    gap: bool = False          # Limite de pages atteinte avant la marque: posts plus anciens perdus
+    error: str = ""
+    elapsed: float = 0.0
+
+
+class RedditMarks:
+    """Dernier post vu de chaque subreddit, conservé entre les exécutions"""
+
+    def __init__(self, state_file: str):
+        self.state_file = state_file
+        self.marks: Dict[str, Dict] = {}
+        self.load()
+
+    def load(self):
+        """Charge les marques sauvegardées"""
+        if not os.path.exists(self.state_file):
+            return
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                self.marks = json.load(f)
+            logger.info(f"[Reddit] {len(self.marks)} subreddits avec marque de lecture")
+        except Exception as e:
+            logger.error(f"[Reddit] Erreur chargement des marques: {e}")
+            self.marks = {}
+
+    def save(self):
+        """Sauvegarde les marques"""
+        try:
+            with open(self.state_file, 'w', encoding='utf-8') as f:
+                json.dump(self.marks, f, indent=2)
+        except Exception as e:
+            logger.error(f"[Reddit] Erreur sauvegarde des marques: {e}")
+
+    def last_id(self, subreddit: str) -> str:
+        return self.marks.get(subreddit, {}).get('last_id', "")
+
+    def update(self, result: SubredditResult):
+        """
+        Avance la marque d'un subreddit; un rattrapage interrompu (échéance)
+        la laisse en place pour que la collecte suivante le termine
+        """
+        if not result.complete or not result.newest_id:
+            return
+        mark = self.marks.setdefault(result.subreddit, {})
+        if not mark.get('last_id') or _id_value(result.newest_id) > _id_value(mark['last_id']):
+            mark['last_id'] = result.newest_id
+        mark['gaps'] = mark.get('gaps', 0) + int(result.gap)
+
+
+class RedditCollector:
+    """Lit les posts nouveaux de plusieurs subreddits en parallèle"""
+
+    def __init__(self, api: RedditAPI, workers: int = REDDIT_WORKERS,
+                 max_pages: int = MAX_PAGES, page_size: int = PAGE_SIZE):
+        self.api = api
+        self.workers = workers
+        self.max_pages = max_pages
+        self.page_size = page_size
+
+    def fetch_new(self, subreddit: str, last_id: str = "", cutoff_utc: Optional[float] = None,
+                  deadline: Optional[float] = None) -> SubredditResult:
+        """
+        Parcourt /r/{subreddit}/new page par page, jusqu'au post last_id, au
+        premier post antérieur à cutoff_utc (timestamp) ou au bout du listing
+        """
+        result = SubredditResult(subreddit=subreddit)
+        start = time.perf_counter()
+        mark = _id_value(last_id) if last_id else None
+        after = None
+        try:
+            while result.pages < self.max_pages:
+                params = {"limit": self.page_size, "raw_json": 1}
+                if after:
+                    params["after"] = after
+                listing = self.api.get(f"/r/{subreddit}/new", params, deadline)
+                if listing is None:
+                    break
+                result.pages += 1
+                data = listing.get('data', {})
+                for child in data.get('children', []):
+                    post = child.get('data', {})
+                    if mark is not None and _id_value(post['id']) <= mark:
+                        result.complete = True
+                        break
+                    if cutoff_utc is not None and post.get('created_utc', 0) < cutoff_utc:
+                        result.complete = True
+                        break
+                    if not result.newest_id:
+                        result.newest_id = post['id']
+                    result.posts.append(post)
+                if result.complete:
+                    break
+                after = data.get('after')
+                if not after:
+                    result.complete = True
+                    break
+            else:
+                # Limite de pages: Reddit ne fournirait de toute façon pas plus loin
+                result.complete = result.gap = True
+        except Exception as e:
+            result.error = str(e) or type(e).__name__
+        result.elapsed = time.perf_counter() - start
+        return result
+
+    def collect(self, subreddits: List[str], marks: RedditMarks,
+                on_result: Callable[[SubredditResult], None],
+                cutoff_utc: Optional[float] = None, time_limit: Optional[float] = None) -> List[str]:
+        """
+        Lit tous les subreddits et appelle on_result dans le thread appelant
+        dès qu'un subreddit est terminé (dédoublonnage et écriture restent
+        séquentiels), puis avance sa marque. Au-delà de time_limit secondes,
+        les subreddits pas encore commencés sont abandonnés et leurs noms
+        retournés
+        """
+        deadline = time.monotonic() + time_limit if time_limit is not None else None
+        skipped: List[str] = []
+        requests_before = self.api.requests
+
+        def task(subreddit: str) -> Optional[SubredditResult]:
+            if deadline is not None and deadline - time.monotonic() <= 1:
+                return None
+            return self.fetch_new(subreddit, marks.last_id(subreddit), cutoff_utc, deadline)
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            # Contexte copié: les requêtes restent comptées dans la collecte appelante
+            futures = {pool.submit(contextvars.copy_context().run, task, subreddit): subreddit
+                       for subreddit in subreddits}
+            for future in as_completed(futures):
+                result = future.result()
+                if result is None:
+                    skipped.append(futures[future])
+                    continue
+                try:
+                    on_result(result)
+                except Exception as e:
+                    logger.error(f"  [ERREUR] r/{result.subreddit}: {e}")
+                    continue
+                if not result.error:
+                    marks.update(result)
+
+        logger.info(f"[Reddit] {len(subreddits) - len(skipped)} subreddits lus "
+                    f"({self.api.requests - requests_before} requetes, {self.workers} en parallele)")
+        return skipped
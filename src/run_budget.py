@@ -0,0 +1,47 @@
+"""
+Budget de temps d'une collecte
+Remplace l'arrêt brutal du collecteur au bout de 30 minutes: chaque source
+consulte le budget avant chaque requête, les feeds les plus productifs passent
+en premier et, une fois l'échéance atteinte, les téléchargements en retard sont
+annulés proprement. Ce qui a déjà été collecté est conservé (fichiers finalisés,
+hashes sauvegardés) et les éléments non traités sont listés dans le résultat
+"""
+
+import logging
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class RunBudget:
+    """Échéance d'une collecte (None = pas de limite) et éléments sautés faute de temps"""
+
+    def __init__(self, seconds: Optional[float] = None):
+        self.seconds = seconds
+        self.deadline = time.monotonic() + seconds if seconds else None
+        self.skipped: Dict[str, List[str]] = {}
+        # Les collecteurs RSS (boucle d'événements) et les autres peuvent signaler en même temps
+        self._lock = threading.Lock()
+
+    def remaining(self) -> float:
+        """Secondes restantes (infini sans échéance, jamais négatif)"""
+        if self.deadline is None:
+            return float('inf')
+        return max(0.0, self.deadline - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def timeout(self, default: float) -> float:
+        """Délai d'une requête, raccourci pour ne pas dépasser l'échéance"""
+        return max(1.0, min(default, self.remaining()))
+
+    def skip(self, source: str, items: Iterable[str] = ()):
+        """Enregistre les éléments d'une source non traités (toute la source si items est vide)"""
+        items = list(items)
+        with self._lock:
+            self.skipped.setdefault(source, []).extend(items or ["*"])
+        what = f"{len(items)} elements non traites" if items else "source non traitee"
+        logger.warning(f"[Budget] {source}: {what}, budget de {self.seconds or 0:.0f}s epuise")
@@ -0,0 +1,148 @@
+"""
+Collecte répartie sur plusieurs processus
+Chaque worker reçoit, par hachage cohérent, une part des feeds RSS et des
+sites scrapés (voir sharding.py) et les collecte avec run_once; les hashes
+sont dédoublonnés dans une base SQLite partagée (data/tracking/shared_dedup.sqlite),
+si bien qu'un article publié par deux feeds de shards différents n'est
+gardé qu'une fois. Cette base devient ensuite l'historique de toutes les
+collectes, réparties ou non; l'index des quasi-doublons
+(story_signatures.sqlite) est lui aussi commun à tous les shards.
+NewsAPI et Reddit (quota par clé) restent sur le shard 0.
+Le parent fusionne ensuite tous les fichiers dans le dataset maître.
+
+Usage:
+    python sharded_collector.py --workers 4
+    python sharded_collector.py --workers 8 --sources rss scraping --hours-back 12
+"""
+
+import argparse
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Sequence
+
+logger = logging.getLogger(__name__)
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+TRACKING_DIR = os.path.join(PROJECT_ROOT, "data", "tracking")
+
+SHARED_DEDUP_DB = os.path.join(TRACKING_DIR, "shared_dedup.sqlite")
+# Sources réparties entre les shards; les autres ne tournent que sur le shard 0
+SHARDED_SOURCES = ('rss', 'scraping')
+
+
+# --------------------------
+# Base partagée
+# --------------------------
+def prepare_shared_store(db_file: str):
+    """
+    Reprend les hashes locaux dans la base partagée (INSERT OR IGNORE, donc
+    sans effet sur ceux déjà connus). Une fois la base créée, run_once et
+    continuous_collector.py n'utilisent plus qu'elle (shared_dedup_db()):
+    l'historique local ne reçoit plus rien et il n'y a rien à recopier en retour
+    """
+    import collect_data_tracking as collector
+    from dedup_index import SqliteHashSet
+    from hash_store import GenerationalHashStore
+
+    for table, directory in (("content_hashes", "hashes"), ("url_keys", "url_hashes")):
+        shared = SqliteHashSet(db_file, table, ttl_days=collector.HASH_TTL_DAYS)
+        local = GenerationalHashStore(os.path.join(TRACKING_DIR, directory),
+                                      ttl_days=collector.HASH_TTL_DAYS)
+        seeded = shared.seed_from(local)
+        local.close()
+        if seeded:
+            logger.info(f"[Shards] {table}: {seeded:,} hashes locaux repris")
+        shared.close()
+
+
+# --------------------------
+# Worker
+# --------------------------
+def run_shard(shard_index: int, shard_count: int, db_file: str,
+              sources: Sequence[str], hours_back: int) -> Dict:
+    """Exécuté dans un processus séparé: collecte la part du shard sans compaction"""
+    logging.basicConfig(level=logging.INFO,
+                        format=f'%(asctime)s - shard {shard_index} - %(levelname)s - %(message)s')
+    import collect_data_tracking as collector
+
+    collector.configure_shard(shard_index, shard_count, db_file)
+    if shard_index > 0:
+        sources = [s for s in sources if s in SHARDED_SOURCES]
+    result = collector.run_once(collector.RunConfig(hours_back=hours_back, sources=tuple(sources),
+                                                    compact=False))
+    return result.to_dict()
+
+
+def run_sharded(workers: int, sources: Sequence[str], hours_back: int = 24,
+                db_file: str = SHARED_DEDUP_DB, compact: bool = True) -> Dict:
+    """Lance les workers, attend leurs résultats puis fusionne dans le dataset maître"""
+    start = time.perf_counter()
+    prepare_shared_store(db_file)
+
+    # spawn: chaque worker charge ses propres états (pas de verrous hérités par fork)
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        futures = [pool.submit(run_shard, i, workers, db_file, sources, hours_back)
+                   for i in range(workers)]
+        shards = []
+        for i, future in enumerate(futures):
+            try:
+                shards.append(future.result())
+            except Exception as e:
+                logger.error(f"[Shards] Shard {i} en echec: {e}")
+                shards.append({'total_new': 0, 'by_source': {}, 'errors': {'shard': str(e)}})
+    collect_seconds = time.perf_counter() - start
+
+    master_added = 0
+    if compact:
+        import collect_data_tracking as collector
+        master_added = collector.combine_all_sources()
+
+    by_source: Dict[str, int] = {}
+    for shard in shards:
+        for source, count in shard['by_source'].items():
+            by_source[source] = by_source.get(source, 0) + count
+    return {
+        'workers': workers,
+        'shards': shards,
+        'by_source': by_source,
+        'total_new': sum(by_source.values()),
+        'collect_seconds': round(collect_seconds, 3),
+        'duration_seconds': round(time.perf_counter() - start, 3),
+        'master_added': master_added,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Collecte repartie sur plusieurs processus")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--sources', nargs='+', default=['rss', 'newsapi', 'reddit', 'scraping'])
+    parser.add_argument('--hours-back', type=int, default=24)
+    parser.add_argument('--shared-db', default=SHARED_DEDUP_DB,
+                        help='Autre chemin: le donner aussi aux collectes non reparties (SHARED_DEDUP_DB)')
+    parser.add_argument('--no-compact', action='store_true', help='Ne pas mettre a jour le dataset maitre')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    summary = run_sharded(args.workers, args.sources, args.hours_back, args.shared_db,
+                          compact=not args.no_compact)
+
+    print("\n" + "=" * 60)
+    print(f"COLLECTE REPARTIE ({summary['workers']} workers)")
+    print("=" * 60)
+    for i, shard in enumerate(summary['shards']):
+        errors = f"  erreurs: {', '.join(shard['errors'])}" if shard.get('errors') else ""
+        print(f"  shard {i}: {shard['total_new']:>6} nouveaux{errors}")
+    for source, count in summary['by_source'].items():
+        print(f"  {source:<10} {count:>6}")
+    rate = summary['total_new'] / summary['collect_seconds'] if summary['collect_seconds'] else 0
+    print(f"Nouveaux: {summary['total_new']} en {summary['collect_seconds']:.1f}s ({rate:.1f}/s)")
+    print(f"Ajoutes au dataset maitre: {summary['master_added']}")
+
+
+if __name__ == "__main__":
+    main()
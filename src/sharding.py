@@ -0,0 +1,45 @@
+"""
+Répartition des sources entre plusieurs workers (hachage cohérent)
+Chaque worker ne collecte que sa part de feeds.json et des sites scrapés.
+Les sources sont placées sur un anneau de hachage où chaque shard occupe
+VIRTUAL_NODES positions: la répartition reste équilibrée et, si le nombre
+de workers change, seule ~1/N des sources change de worker (leurs
+validateurs HTTP et leur rythme appris ne sont perdus que pour celles-là)
+"""
+
+import bisect
+import hashlib
+from typing import Dict, List, Tuple
+
+VIRTUAL_NODES = 128
+
+
+def _position(key: str) -> int:
+    return int.from_bytes(hashlib.md5(key.encode('utf-8')).digest()[:8], 'big')
+
+
+class HashRing:
+    """Anneau de hachage cohérent à shard_count shards"""
+
+    def __init__(self, shard_count: int, virtual_nodes: int = VIRTUAL_NODES):
+        if shard_count < 1:
+            raise ValueError("shard_count doit etre >= 1")
+        self.shard_count = shard_count
+        points: List[Tuple[int, int]] = sorted(
+            (_position(f"shard-{shard}-{v}"), shard)
+            for shard in range(shard_count) for v in range(virtual_nodes))
+        self._positions = [p for p, _ in points]
+        self._shards = [s for _, s in points]
+
+    def shard_of(self, key: str) -> int:
+        """Shard responsable de la clé: premier point de l'anneau après sa position"""
+        index = bisect.bisect(self._positions, _position(key)) % len(self._positions)
+        return self._shards[index]
+
+
+def select_shard(sources: Dict[str, str], shard_index: int, shard_count: int) -> Dict[str, str]:
+    """Part d'un dictionnaire {nom: url} attribuée au shard (tout si un seul shard)"""
+    if shard_count <= 1:
+        return sources
+    ring = HashRing(shard_count)
+    return {name: url for name, url in sources.items() if ring.shard_of(name) == shard_index}
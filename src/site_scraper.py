@@ -0,0 +1,327 @@
+"""
+Scraping concurrent et poli des pages d'accueil des sites d'information
+Les sites sont téléchargés en parallèle (un thread par site en cours), avec
+un intervalle minimal entre deux requêtes vers un même domaine au lieu d'une
+pause fixe après chaque site: la collecte dure à peu près le temps du site le
+plus lent, pas la somme de tous.
+
+Chaque page est lue en flux et tronquée à MAX_PAGE_BYTES; seuls les titres
+(h1-h3 par défaut) sont extraits, par un parseur html.parser qui ne construit
+pas d'arbre et s'arrête au dernier titre utile. Les règles d'extraction
+(balises, longueur, forme des liens d'articles) peuvent être précisées site
+par site dans SITE_RULES
+"""
+
+import contextvars
+import logging
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from html.parser import HTMLParser
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
+
+logger = logging.getLogger(__name__)
+
+# --------------------------
+# Configuration
+# --------------------------
+SCRAPE_WORKERS = 8            # Sites téléchargés simultanément
+DOMAIN_INTERVAL_SECONDS = 2   # Délai minimal entre deux requêtes vers un même domaine
+PAGE_TIMEOUT = 15             # Secondes par page
+MAX_PAGE_BYTES = 2 * 1024 * 1024   # Au-delà, la page est tronquée (les titres sont en tête)
+CHUNK_BYTES = 64 * 1024
+
+SITES = {
+    "BBC": "https://www.bbc.com/news",
+    "Reuters": "https://www.reuters.com/world/",
+    "Guardian": "https://www.theguardian.com/international",
+    "CNN": "https://edition.cnn.com/world",
+    "NYTimes": "https://www.nytimes.com/section/world",
+    "WashingtonPost": "https://www.washingtonpost.com/world/",
+    "AlJazeera": "https://www.aljazeera.com/news/",
+    "France24": "https://www.france24.com/en/",
+    "LeMonde": "https://www.lemonde.fr/",
+    "LeFigaro": "https://www.lefigaro.fr/",
+    "ElPais": "https://elpais.com/",
+    "DeutscheWelle": "https://www.dw.com/en/top-stories/s-9097",
+    "DerSpiegel": "https://www.spiegel.de/international/",
+    "CBC": "https://www.cbc.ca/news",
+    "AP": "https://apnews.com/hub/world-news",
+    "Bloomberg": "https://www.bloomberg.com/europe",
+    "Politico": "https://www.politico.eu/",
+    "TheEconomist": "https://www.economist.com/",
+    "TheVerge": "https://www.theverge.com/",
+    "TechCrunch": "https://techcrunch.com/",
+    "Wired": "https://www.wired.com/",
+    "HindustanTimes": "https://www.hindustantimes.com/world-news",
+    "TheHindu": "https://www.thehindu.com/news/",
+    "JapanTimes": "https://www.japantimes.co.jp/news/",
+    "ArabNews": "https://www.arabnews.com/",
+    "AlAhram": "https://english.ahram.org.eg/",
+    "TimesOfIsrael": "https://www.timesofisrael.com/",
+    "CBC (Canada)": "https://www.cbc.ca/news",
+    "ABC_Australia": "https://www.abc.net.au/news/",
+}
+
+
+@dataclass(frozen=True)
+class SiteRule:
+    """Règles d'extraction des titres d'un site"""
+    tags: Tuple[str, ...] = ('h1', 'h2', 'h3')
+    min_chars: int = 15
+    max_chars: int = 300
+    max_headings: int = 100       # Titres examinés au plus, dans l'ordre de la page
+    link_pattern: str = ""        # Regex que doit contenir le lien (articles seulement)
+
+
+DEFAULT_RULE = SiteRule()
+
+# Sites dont les liens d'articles ont une forme reconnaissable: les titres de
+# rubriques, menus et encarts sans lien d'article sont écartés
+_DATED_PATH = r"/20\d\d/\d\d?/\d\d?/"
+SITE_RULES: Dict[str, SiteRule] = {
+    "Guardian": SiteRule(link_pattern=r"/20\d\d/[a-z]{3}/\d\d/"),
+    "CNN": SiteRule(link_pattern=_DATED_PATH),
+    "NYTimes": SiteRule(link_pattern=_DATED_PATH),
+    "WashingtonPost": SiteRule(link_pattern=_DATED_PATH),
+    "TechCrunch": SiteRule(link_pattern=_DATED_PATH),
+    "AlJazeera": SiteRule(link_pattern=_DATED_PATH),
+    "AP": SiteRule(link_pattern=r"/article/"),
+    "Wired": SiteRule(link_pattern=r"/story/"),
+    "DeutscheWelle": SiteRule(link_pattern=r"/a-\d+"),
+    "LeMonde": SiteRule(link_pattern=r"/article/20\d\d/"),
+}
+
+_CHARSET = re.compile(rb"""<meta[^>]+charset\s*=\s*["']?([\w.:-]+)""", re.I)
+
+
+class DomainRateLimiter:
+    """Espace les requêtes vers un même domaine (partagé entre threads)"""
+
+    def __init__(self, interval: float = DOMAIN_INTERVAL_SECONDS):
+        self.interval = interval
+        self._next_slot: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def wait(self, url: str):
+        """Attend le prochain créneau libre du domaine de url et le réserve"""
+        host = urlsplit(url).hostname or ""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, 0.0))
+            self._next_slot[host] = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class HeadingParser(HTMLParser):
+    """
+    Extrait (texte, lien) des titres sans construire d'arbre, avec les mêmes
+    règles que l'ancienne version BeautifulSoup: texte = morceaux non vides,
+    sans espaces autour, mis bout à bout (get_text(strip=True)); lien = premier
+    <a> du titre, sinon <a> englobant
+    """
+
+    def __init__(self, tags: Tuple[str, ...], max_headings: int):
+        super().__init__(convert_charrefs=True)
+        self.tags = tags
+        self.max_headings = max_headings
+        self.headings: List[List] = []     # [morceaux de texte, lien, <a> interne vu]
+        self._open: List[Tuple[str, List]] = []
+        self._links: List[Optional[str]] = []
+        self._skip_depth = 0               # Dans <script>/<style>
+        self._text: List[str] = []         # Texte en cours (un nœud peut arriver en plusieurs morceaux)
+
+    @property
+    def done(self) -> bool:
+        return len(self.headings) >= self.max_headings and not self._open
+
+    def _flush(self):
+        """Fin d'un nœud texte: ajouté, sans espaces autour, aux titres ouverts"""
+        if self._text:
+            text = "".join(self._text).strip()
+            self._text = []
+            if text:
+                for _, heading in self._open:
+                    heading[0].append(text)
+
+    def handle_starttag(self, tag, attrs):
+        self._flush()
+        if tag in ('script', 'style'):
+            self._skip_depth += 1
+        elif tag == 'a':
+            href = dict(attrs).get('href')
+            self._links.append(href)
+            for _, heading in self._open:
+                if not heading[2]:
+                    heading[1], heading[2] = href, True
+        elif tag in self.tags and len(self.headings) < self.max_headings:
+            enclosing = self._links[-1] if self._links else None
+            heading = [[], enclosing, False]
+            self.headings.append(heading)
+            self._open.append((tag, heading))
+
+    def handle_endtag(self, tag):
+        self._flush()
+        if tag in ('script', 'style'):
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag == 'a':
+            if self._links:
+                self._links.pop()
+        elif tag in self.tags:
+            # Ferme le titre ouvert le plus récent de cette balise (et ceux qu'il contient)
+            for i in range(len(self._open) - 1, -1, -1):
+                if self._open[i][0] == tag:
+                    del self._open[i:]
+                    break
+
+    def handle_data(self, data):
+        if self._open and not self._skip_depth:
+            self._text.append(data)
+
+    def handle_comment(self, data):
+        self._flush()
+
+    def results(self) -> List[Tuple[str, Optional[str]]]:
+        self._flush()
+        return [("".join(parts), link) for parts, link, _ in self.headings]
+
+
+def extract_headings(page: str, base_url: str, rule: SiteRule = DEFAULT_RULE) -> List[Tuple[str, str]]:
+    """(titre, lien absolu ou "") des titres de la page qui respectent la règle du site"""
+    parser = HeadingParser(rule.tags, rule.max_headings)
+    for offset in range(0, len(page), CHUNK_BYTES):
+        parser.feed(page[offset:offset + CHUNK_BYTES])
+        if parser.done:
+            break
+    link_pattern = re.compile(rule.link_pattern) if rule.link_pattern else None
+    headings = []
+    for text, href in parser.results():
+        if len(text) < rule.min_chars or len(text) > rule.max_chars:
+            continue
+        link = ""
+        if href:
+            link = urljoin(base_url, href) if not href.startswith('http') else href
+        if link_pattern and not link_pattern.search(link):
+            continue
+        headings.append((text, link))
+    return headings
+
+
+def _encoding(content_type: str, head: bytes) -> str:
+    """Encodage déclaré par l'en-tête HTTP, sinon par <meta charset>, sinon UTF-8"""
+    for param in content_type.split(';')[1:]:
+        name, _, value = param.partition('=')
+        if name.strip().lower() == 'charset' and value.strip():
+            return value.strip().strip('"\'')
+    match = _CHARSET.search(head[:4096])
+    return match.group(1).decode('ascii') if match else 'utf-8'
+
+
+def fetch_page(session, url: str, timeout: float, max_bytes: int = MAX_PAGE_BYTES) -> Tuple[str, bool]:
+    """Page décodée (au plus max_bytes lus, en flux) et si elle a été tronquée"""
+    deadline = time.monotonic() + timeout
+    with session.get(url, timeout=timeout, stream=True) as response:
+        response.raise_for_status()
+        chunks, size, truncated = [], 0, False
+        for chunk in response.iter_content(CHUNK_BYTES):
+            chunks.append(chunk)
+            size += len(chunk)
+            if size >= max_bytes:
+                truncated = True
+                break
+            if time.monotonic() > deadline:
+                # Serveur qui distille la page: on garde ce qui est arrivé
+                truncated = True
+                break
+        content = b"".join(chunks)[:max_bytes]
+        encoding = _encoding(response.headers.get('content-type', ''), content)
+    try:
+        return content.decode(encoding, errors='replace'), truncated
+    except LookupError:
+        return content.decode('utf-8', errors='replace'), truncated
+
+
+@dataclass
+class ScrapeResult:
+    """Titres extraits d'un site, ou erreur"""
+    source: str
+    url: str
+    headings: List[Tuple[str, str]] = field(default_factory=list)
+    error: str = ""
+    request_failed: bool = False    # Erreur réseau / HTTP (compte pour la quarantaine)
+    truncated: bool = False
+    elapsed: float = 0.0
+
+
+class SiteScraper:
+    """Télécharge et analyse plusieurs sites en parallèle, poliment"""
+
+    def __init__(self, session, workers: int = SCRAPE_WORKERS,
+                 domain_interval: float = DOMAIN_INTERVAL_SECONDS,
+                 timeout: float = PAGE_TIMEOUT, max_bytes: int = MAX_PAGE_BYTES):
+        self.session = session
+        self.workers = workers
+        self.rate_limiter = DomainRateLimiter(domain_interval)
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+
+    def scrape(self, source: str, url: str, timeout: Optional[float] = None) -> ScrapeResult:
+        """Télécharge et analyse un site (sans attendre le créneau de son domaine)"""
+        import requests
+
+        result = ScrapeResult(source=source, url=url)
+        start = time.perf_counter()
+        try:
+            page, result.truncated = fetch_page(self.session, url, timeout or self.timeout, self.max_bytes)
+            result.headings = extract_headings(page, url, SITE_RULES.get(source, DEFAULT_RULE))
+        except requests.RequestException as e:
+            result.error, result.request_failed = str(e) or type(e).__name__, True
+        except Exception as e:
+            result.error = str(e) or type(e).__name__
+        result.elapsed = time.perf_counter() - start
+        return result
+
+    def scrape_all(self, sites: Dict[str, str], on_result: Callable[[ScrapeResult], None],
+                   time_limit: Optional[float] = None) -> List[str]:
+        """
+        Scrape tous les sites et appelle on_result dans le thread appelant dès
+        qu'un site est traité (dédoublonnage et écriture restent séquentiels).
+        Au-delà de time_limit secondes, les sites pas encore commencés sont
+        abandonnés et leurs noms retournés
+        """
+        deadline = time.monotonic() + time_limit if time_limit is not None else None
+        skipped: List[str] = []
+        lock = threading.Lock()
+
+        def task(source: str, url: str) -> Optional[ScrapeResult]:
+            self.rate_limiter.wait(url)
+            timeout = self.timeout
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 1:
+                    with lock:
+                        skipped.append(source)
+                    return None
+                timeout = min(timeout, remaining)
+            return self.scrape(source, url, timeout)
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            # Contexte copié: les requêtes restent comptées dans la collecte appelante
+            futures = [pool.submit(contextvars.copy_context().run, task, source, url)
+                       for source, url in sites.items()]
+            for future in as_completed(futures):
+                result = future.result()
+                if result is None:
+                    continue
+                try:
+                    on_result(result)
+                except Exception as e:
+                    logger.error(f"  [ERREUR] {result.source}: {e}")
+
+        logger.info(f"[Scraping] {len(sites) - len(skipped)} sites traites "
+                    f"({self.workers} en parallele, {self.rate_limiter.interval:.0f}s entre deux requetes par domaine)")
+        return skipped
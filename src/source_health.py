@@ -0,0 +1,134 @@
+"""
+Disjoncteur (circuit breaker) et quarantaine des sources mortes
+Suit la santé de chaque source (échecs consécutifs, dernier succès, latences)
+et met en quarantaine celles qui échouent en boucle, avec un délai qui double
+à chaque nouvel échec; une fois le délai écoulé, une seule requête de test
+est autorisée pour vérifier si la source est revenue
+"""
+
+import json
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# --------------------------
+# Configuration
+# --------------------------
+FAILURE_THRESHOLD = 3                # Échecs consécutifs avant quarantaine
+BASE_QUARANTINE_HOURS = 6            # Première quarantaine
+MAX_QUARANTINE_HOURS = 7 * 24        # Plafond du backoff exponentiel
+LATENCY_WINDOW = 50                  # Nombre de latences conservées par source
+
+
+def _percentile(values, pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class SourceHealth:
+    """Registre persistant de la santé des sources (feeds RSS, sites scrapés)"""
+
+    def __init__(self, state_file: str):
+        self.state_file = state_file
+        self.sources: Dict[str, Dict] = {}
+        # Collecteurs RSS et scraping planifiés en parallèle partagent le registre
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        """Charge le registre sauvegardé"""
+        if not os.path.exists(self.state_file):
+            return
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                self.sources = json.load(f)
+            quarantined = sum(1 for s in self.sources.values() if s.get('quarantined_until'))
+            logger.info(f"[Sante] {len(self.sources):,} sources suivies, {quarantined} en quarantaine")
+        except Exception as e:
+            logger.error(f"[Sante] Erreur chargement: {e}")
+            self.sources = {}
+
+    def save(self):
+        """Sauvegarde le registre (avec les percentiles de latence à jour)"""
+        with self._lock:
+            for state in self.sources.values():
+                if state['latencies']:
+                    state['latency_p50'] = round(_percentile(state['latencies'], 50), 3)
+                    state['latency_p95'] = round(_percentile(state['latencies'], 95), 3)
+            try:
+                with open(self.state_file, 'w', encoding='utf-8') as f:
+                    json.dump(self.sources, f, indent=2)
+            except Exception as e:
+                logger.error(f"[Sante] Erreur sauvegarde: {e}")
+
+    def _state(self, key: str) -> Dict:
+        return self.sources.setdefault(key, {
+            'failure_streak': 0,
+            'total_failures': 0,
+            'total_successes': 0,
+            'last_success': None,
+            'last_failure': None,
+            'last_error': "",
+            'quarantined_until': None,
+            'latencies': [],
+        })
+
+    def allow(self, key: str, now: Optional[datetime] = None) -> bool:
+        """
+        Faux tant que la source est en quarantaine; vrai ensuite, ce qui sert
+        de requête de test (un nouvel échec relance une quarantaine plus longue)
+        """
+        state = self.sources.get(key)
+        if not state or not state.get('quarantined_until'):
+            return True
+        now = now or datetime.now()
+        return datetime.fromisoformat(state['quarantined_until']) <= now
+
+    def filter_allowed(self, sources: Dict[str, str], prefix: str = "") -> Dict[str, str]:
+        """Retire d'un dictionnaire {nom: url} les sources en quarantaine"""
+        allowed = {name: url for name, url in sources.items() if self.allow(prefix + name)}
+        skipped = len(sources) - len(allowed)
+        if skipped:
+            logger.info(f"[Sante] {skipped} sources en quarantaine ignorees")
+        return allowed
+
+    def _add_latency(self, state: Dict, latency: float):
+        state['latencies'].append(round(latency, 3))
+        del state['latencies'][:-LATENCY_WINDOW]
+
+    def record_success(self, key: str, latency: float, now: Optional[datetime] = None):
+        """La source a répondu correctement: fin de quarantaine éventuelle"""
+        now = now or datetime.now()
+        with self._lock:
+            state = self._state(key)
+            if state['quarantined_until']:
+                logger.info(f"  [Sante] {key}: de nouveau disponible, fin de quarantaine")
+            state['failure_streak'] = 0
+            state['total_successes'] += 1
+            state['last_success'] = now.isoformat()
+            state['quarantined_until'] = None
+            self._add_latency(state, latency)
+
+    def record_failure(self, key: str, latency: float, error: str = "",
+                       now: Optional[datetime] = None):
+        """Échec: au-delà du seuil, la source part en quarantaine (backoff exponentiel)"""
+        now = now or datetime.now()
+        with self._lock:
+            state = self._state(key)
+            state['failure_streak'] += 1
+            state['total_failures'] += 1
+            state['last_failure'] = now.isoformat()
+            state['last_error'] = str(error)[:200]
+            self._add_latency(state, latency)
+
+            excess = state['failure_streak'] - FAILURE_THRESHOLD
+            if excess >= 0:
+                hours = min(BASE_QUARANTINE_HOURS * 2 ** excess, MAX_QUARANTINE_HOURS)
+                state['quarantined_until'] = (now + timedelta(hours=hours)).isoformat()
+                logger.warning(f"  [Sante] {key}: {state['failure_streak']} echecs consecutifs, "
+                               f"quarantaine {hours}h")
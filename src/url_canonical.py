@@ -0,0 +1,78 @@
+"""
+Canonicalisation des URLs d'articles
+Deux liens vers le même article diffèrent souvent par des paramètres de suivi
+(utm_*, ref, fbclid...), une variante AMP, http/https, www ou un slash final.
+canonicalize_url ramène ces variantes à une forme unique qui sert de clé de
+dédoublonnage en plus du hash titre + lien
+"""
+
+import hashlib
+import re
+from urllib.parse import parse_qsl, unquote, urlencode, urlsplit, urlunsplit
+
+# Paramètres de suivi / de provenance qui ne changent pas l'article
+TRACKING_PARAMS = {
+    'ref', 'ref_src', 'ref_url', 'referrer', 'via',
+    'fbclid', 'gclid', 'dclid', 'msclkid', 'igshid', 'yclid', 'twclid',
+    'mc_cid', 'mc_eid', 'cmpid', 'cmp', 'ocid', 'smid', 'smtyp', 'soc_src', 'soc_trk',
+    'taid', 'ito', 'xtor', 'outputtype', 'amp',
+    'guccounter', 'guce_referrer', 'guce_referrer_sig', 'sr_share',
+}
+TRACKING_PREFIXES = ('utm_', 'at_', 'ns_', 'pk_', 'mtm_', 'hsa_')
+
+# Sous-domaines qui servent la même page sous une autre forme
+_HOST_PREFIXES = ('www.', 'amp.', 'm.', 'mobile.')
+_AMP_PATH = re.compile(r'/amp(\.html?)?/?$', re.IGNORECASE)
+_AMP_EXTENSION = re.compile(r'\.amp(\.html?)$', re.IGNORECASE)
+_GOOGLE_AMP = re.compile(r'^/amp/s/(.+)$')
+_DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+def canonicalize_url(url: str) -> str:
+    """Forme canonique d'une URL d'article ('' si l'URL est vide ou invalide)"""
+    if not url:
+        return ""
+    url = url.strip()
+    try:
+        parts = urlsplit(url if '://' in url else 'https://' + url)
+        host = (parts.hostname or "").lower()
+        port = parts.port
+    except ValueError:
+        return url
+
+    path = parts.path or "/"
+
+    # Cache AMP de Google: www.google.com/amp/s/<url d'origine>
+    google_amp = _GOOGLE_AMP.match(path)
+    if host.endswith('google.com') and google_amp:
+        return canonicalize_url('https://' + unquote(google_amp.group(1)))
+
+    for prefix in _HOST_PREFIXES:
+        if host.startswith(prefix) and host.count('.') > 1:
+            host = host[len(prefix):]
+            break
+    if port and port != _DEFAULT_PORTS.get(parts.scheme.lower()):
+        host = f"{host}:{port}"
+
+    # Variantes AMP et index
+    path = _AMP_PATH.sub('', path) or "/"
+    path = _AMP_EXTENSION.sub(r'\1', path)
+    path = re.sub(r'/index\.(html?|php)$', '/', path, flags=re.IGNORECASE)
+    path = re.sub(r'/{2,}', '/', path)
+    if len(path) > 1:
+        path = path.rstrip('/')
+
+    query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+                   if k.lower() not in TRACKING_PARAMS
+                   and not k.lower().startswith(TRACKING_PREFIXES))
+
+    # http et https servent le même article: on garde https; le fragment est ignoré
+    return urlunsplit(('https', host, path, urlencode(query), ''))
+
+
+def url_key(url: str) -> str:
+    """Clé de dédoublonnage (MD5 hex de l'URL canonique), '' si pas d'URL"""
+    canonical = canonicalize_url(url)
+    if not canonical:
+        return ""
+    return hashlib.md5(canonical.encode('utf-8')).hexdigest()